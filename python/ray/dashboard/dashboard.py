@@ -751,6 +751,8 @@ class TuneCollector(threading.Thread):
         super().__init__()
         self._logdir = logdir
         self._trial_records = {}
+        # Analysis of each job, which only reads new results on reload.
+        self._analyses = {}
         self._data_lock = threading.Lock()
         self._reload_interval = reload_interval
         self._available = False
@@ -783,7 +785,12 @@ class TuneCollector(threading.Thread):
 
         # search through all the sub_directories in log directory
         for job_name in job_names:
-            analysis = Analysis(str(os.path.join(self._logdir, job_name)))
+            analysis = self._analyses.get(job_name)
+            if analysis is None:
+                analysis = Analysis(str(os.path.join(self._logdir, job_name)))
+                self._analyses[job_name] = analysis
+            else:
+                analysis.fetch_trial_dataframes()
             df = analysis.dataframe()
             if len(df) == 0:
                 continue
@@ -180,7 +180,7 @@ def set_backend_config(backend_tag, backend_config):
     global_state.backend_table.register_info(backend_tag, backend_config_dict)
 
     # inform the router about change in configuration
-    # particularly for setting max_batch_size
+    # particularly for setting max_batch_size and batching timeouts
     ray.get(global_state.init_or_get_router().set_backend_config.remote(
         backend_tag, backend_config_dict))
 
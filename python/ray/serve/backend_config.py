@@ -4,7 +4,10 @@ from copy import deepcopy
 class BackendConfig:
     # configs not needed for actor creation when
     # instantiating a replica
-    _serve_configs = ["_num_replicas", "max_batch_size"]
+    _serve_configs = [
+        "_num_replicas", "max_batch_size", "batch_wait_timeout_ms",
+        "adaptive_batching"
+    ]
 
     # configs which when changed leads to restarting
     # the existing replicas.
@@ -14,17 +17,36 @@ class BackendConfig:
                  num_replicas=1,
                  resources=None,
                  max_batch_size=None,
+                 batch_wait_timeout_ms=None,
+                 adaptive_batching=False,
                  num_cpus=None,
                  num_gpus=None,
                  memory=None,
                  object_store_memory=None):
         """
         Class for defining backend configuration.
+
+        By default, the router sends a replica whatever queries are waiting
+        when it becomes idle, up to max_batch_size of them. With
+        batch_wait_timeout_ms set, a partial batch is held back until it is
+        full or its oldest query has waited that long. With
+        adaptive_batching, the batch size is additionally adapted between 1
+        and max_batch_size, so that batches take about
+        batch_wait_timeout_ms to process.
         """
 
+        if batch_wait_timeout_ms is not None and max_batch_size is None:
+            raise Exception(
+                "batch_wait_timeout_ms requires max_batch_size to be set")
+        if adaptive_batching and batch_wait_timeout_ms is None:
+            raise Exception(
+                "adaptive_batching requires batch_wait_timeout_ms to be set")
+
         # serve configs
         self.num_replicas = num_replicas
         self.max_batch_size = max_batch_size
+        self.batch_wait_timeout_ms = batch_wait_timeout_ms
+        self.adaptive_batching = adaptive_batching
 
         # ray actor configs
         self.resources = resources
@@ -0,0 +1,113 @@
+"""Microbenchmark of the serve router's routing overhead.
+
+The router runs in-process, without Ray, against fake replicas that reply
+immediately, so that only the time spent in the router is measured:
+
+- latency: time from enqueue_request() until the query is dispatched to a
+  replica, for one client and with idle replicas available.
+- throughput: requests/s with many concurrent clients.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from ray.serve.policy import RandomPolicyQueue
+from ray.serve.request_params import RequestMetadata
+
+
+class FakeReplica:
+    """Stands in for a replica actor handle and its `_ray_serve_call`."""
+
+    def __init__(self, router, backend, actor_id):
+        self.router = router
+        self.backend = backend
+        self._actor_id = actor_id
+        self._ray_serve_call = self
+        self.last_dispatch = None
+        self.result = None
+
+    def remote(self, request):
+        self.last_dispatch = time.perf_counter()
+        self.result = (["ok"] * len(request)
+                       if isinstance(request, list) else "ok")
+        # Like a real replica, ask for more work once done.
+        asyncio.ensure_future(self.router.dequeue_request(self.backend, self))
+        return self
+
+    def as_future(self):
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self.result)
+        return future
+
+
+async def setup(num_endpoints, num_replicas):
+    router = RandomPolicyQueue()
+    replicas = {}
+    for i in range(num_replicas):
+        backend = "backend-{}".format(i % num_endpoints)
+        replica = FakeReplica(router, backend, i)
+        replicas.setdefault(backend, []).append(replica)
+        await router.dequeue_request(backend, replica)
+    for i in range(num_endpoints):
+        await router.link("endpoint-{}".format(i), "backend-{}".format(i))
+    return router, replicas
+
+
+async def measure_latency(router, replicas, num_endpoints, num_requests):
+    latencies = []
+    last_dispatch = {}
+    for _ in range(num_requests):
+        i = random.randrange(num_endpoints)
+        backend_replicas = replicas["backend-{}".format(i)]
+        for replica in backend_replicas:
+            last_dispatch[replica] = replica.last_dispatch
+        start = time.perf_counter()
+        await router.enqueue_request(
+            RequestMetadata("endpoint-{}".format(i), None), i)
+        dispatched = [
+            r for r in backend_replicas if r.last_dispatch != last_dispatch[r]
+        ]
+        latencies.append(dispatched[0].last_dispatch - start)
+    return np.array(latencies) * 1e6
+
+
+async def measure_throughput(router, num_endpoints, num_requests, num_clients):
+    async def client(n):
+        for _ in range(n):
+            i = random.randrange(num_endpoints)
+            await router.enqueue_request(
+                RequestMetadata("endpoint-{}".format(i), None), i)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[client(num_requests // num_clients) for _ in range(num_clients)])
+    return num_requests / (time.perf_counter() - start)
+
+
+async def main(args):
+    router, replicas = await setup(args.num_endpoints, args.num_replicas)
+    # Warm up.
+    await measure_latency(router, replicas, args.num_endpoints, 500)
+    latencies = await measure_latency(router, replicas, args.num_endpoints,
+                                      args.num_requests)
+    print("Routing overhead with {} endpoints and {} replicas (us): "
+          "p50 {:.1f}, p99 {:.1f}".format(args.num_endpoints,
+                                          args.num_replicas,
+                                          np.percentile(latencies, 50),
+                                          np.percentile(latencies, 99)))
+    throughput = await measure_throughput(router, args.num_endpoints,
+                                          args.num_requests, args.num_clients)
+    print("Throughput with {} concurrent clients: {:.0f} requests/s".format(
+        args.num_clients, throughput))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-endpoints", type=int, default=100)
+    parser.add_argument("--num-replicas", type=int, default=1000)
+    parser.add_argument("--num-requests", type=int, default=10000)
+    parser.add_argument("--num-clients", type=int, default=100)
+    asyncio.get_event_loop().run_until_complete(main(parser.parse_args()))
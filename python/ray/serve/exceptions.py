@@ -1,2 +1,12 @@
 class RayServeException(Exception):
     pass
+
+
+class RayServeDeadlineExceeded(RayServeException):
+    """Raised for a query whose latency objective can't be met.
+
+    The router rejects the query when it arrives if the backend is too
+    loaded to complete it in time, and drops it before it's sent to a
+    replica if its deadline has passed.
+    """
+    pass
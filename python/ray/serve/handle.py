@@ -25,6 +25,8 @@ class RayServeHandle:
        # result
        >>> ray.get(handle.remote(let_it_crash_request))
        # raises RayTaskError Exception
+       >>> ray.get(handle.options(relative_slo_ms=1).remote(...))
+       # raises RayServeDeadlineExceeded if the router sheds the query
     """
 
     def __init__(self,
@@ -1,11 +1,138 @@
+import math
 import time
+from collections import Counter
 
 import numpy as np
-import pandas as pd
 
 import ray
 
 
+class QuantileSketch:
+    """Streaming quantile sketch with relative error guarantee (DDSketch).
+
+    Values are counted in logarithmically sized bins, so that any quantile
+    is estimated within `relative_accuracy` of its true value, using memory
+    that only depends on the range of the values. Sketches are merged by
+    adding up bin counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        # bin index -> count, for positive values and for the absolute
+        # values of negative ones.
+        self.positive_bins = Counter()
+        self.negative_bins = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += len(values)
+        nonzero = np.abs(values) > 1e-9
+        self.zero_count += int((~nonzero).sum())
+        for bins, selected in [(self.positive_bins, values[values > 1e-9]),
+                               (self.negative_bins, -values[values < -1e-9])]:
+            if len(selected) == 0:
+                continue
+            indices, counts = np.unique(
+                np.ceil(np.log(selected) / self.log_gamma).astype(np.int64),
+                return_counts=True)
+            bins.update(dict(zip(indices.tolist(), counts.tolist())))
+            self._collapse(bins)
+
+    def merge(self, other):
+        self.positive_bins.update(other.positive_bins)
+        self.negative_bins.update(other.negative_bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self._collapse(self.positive_bins)
+        self._collapse(self.negative_bins)
+
+    def quantiles(self, percentiles):
+        """Returns the estimated values at the given percentiles (0-100)."""
+        # Bins in increasing order of their values.
+        ordered = [
+            (-self._bin_value(i), c)
+            for i, c in sorted(self.negative_bins.items(), reverse=True)
+        ]
+        if self.zero_count:
+            ordered.append((0.0, self.zero_count))
+        ordered += [(self._bin_value(i), c)
+                    for i, c in sorted(self.positive_bins.items())]
+        values = np.array([v for v, _ in ordered])
+        cumulative_counts = np.cumsum([c for _, c in ordered])
+        ranks = np.asarray(
+            percentiles, dtype=np.float64) / 100 * (self.count - 1)
+        return values[np.searchsorted(cumulative_counts, ranks, side="right")]
+
+    def _bin_value(self, index):
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def _collapse(self, bins):
+        # Merges the bins of the smallest values, which are the least
+        # interesting ones for latencies.
+        while len(bins) > self.max_bins:
+            lowest, second = sorted(bins)[:2]
+            bins[second] += bins.pop(lowest)
+
+
+class MetricStore:
+    """Fixed memory store of scraped metric values.
+
+    For each `list` metric, values are added to a quantile sketch of the
+    time bucket (`bucket_seconds` long) they were scraped in. The buckets
+    form a ring covering `gc_window_seconds`, and a bucket is reused once
+    it falls out of the window, so there is no garbage collection and
+    queries over a window only merge the sketches of its buckets. For
+    `counter` metrics only the latest value is kept.
+    """
+
+    def __init__(self, gc_window_seconds=3600, bucket_seconds=1):
+        self.gc_window_seconds = gc_window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = int(math.ceil(
+            gc_window_seconds / bucket_seconds)) + 1
+        # metric name -> (retrieved_at, value)
+        self.counters = dict()
+        # metric name -> ring of [bucket number, sketch] or None
+        self.buckets = dict()
+
+    def add_counter(self, name, value, now):
+        self.counters[name] = (now, value)
+
+    def add_list(self, name, values, now):
+        if len(values) == 0:
+            return
+        if name not in self.buckets:
+            self.buckets[name] = [None] * self.num_buckets
+        ring = self.buckets[name]
+        bucket = int(now // self.bucket_seconds)
+        slot = bucket % self.num_buckets
+        if ring[slot] is None or ring[slot][0] != bucket:
+            ring[slot] = [bucket, QuantileSketch()]
+        ring[slot][1].add(values)
+
+    def latest_counters(self, now):
+        return {
+            name: value
+            for name, (retrieved_at, value) in self.counters.items()
+            if retrieved_at >= now - self.gc_window_seconds
+        }
+
+    def window_sketch(self, name, window_seconds, now):
+        """Returns the merged sketch of a metric over the last seconds."""
+        earliest_bucket = int((now - window_seconds) // self.bucket_seconds)
+        latest_bucket = int(now // self.bucket_seconds)
+        sketch = QuantileSketch()
+        for entry in self.buckets.get(name, []):
+            if (entry is not None
+                    and earliest_bucket <= entry[0] <= latest_bucket):
+                sketch.merge(entry[1])
+        return sketch
+
+
 @ray.remote(num_cpus=0)
 class MetricMonitor:
     def __init__(self, gc_window_seconds=3600):
@@ -19,10 +146,8 @@ class MetricMonitor:
         #: Mapping actor ID (hex) -> actor handle
         self.actor_handles = dict()
 
-        self.data_entries = []
-
         self.gc_window_seconds = gc_window_seconds
-        self.latest_gc_time = time.time()
+        self.store = MetricStore(gc_window_seconds)
 
     def is_ready(self):
         return True
@@ -36,12 +161,6 @@ class MetricMonitor:
         self.actor_handles.pop(hex_id)
 
     def scrape(self):
-        # If expected gc time has passed, we will perform metric value GC.
-        expected_gc_time = self.latest_gc_time + self.gc_window_seconds
-        if expected_gc_time < time.time():
-            self._perform_gc()
-            self.latest_gc_time = time.time()
-
         curr_time = time.time()
         result = [
             handle._serve_metric.remote()
@@ -50,42 +169,21 @@ class MetricMonitor:
         # TODO(simon): handle the possibility that an actor_handle is removed
         for handle_result in ray.get(result):
             for metric_name, metric_info in handle_result.items():
-                data_entry = {
-                    "retrieved_at": curr_time,
-                    "name": metric_name,
-                    "type": metric_info["type"],
-                }
-
                 if metric_info["type"] == "counter":
-                    data_entry["value"] = metric_info["value"]
-                    self.data_entries.append(data_entry)
+                    self.store.add_counter(metric_name, metric_info["value"],
+                                           curr_time)
 
                 elif metric_info["type"] == "list":
-                    for metric_value in metric_info["value"]:
-                        new_entry = data_entry.copy()
-                        new_entry["value"] = metric_value
-                        self.data_entries.append(new_entry)
-
-    def _perform_gc(self):
-        curr_time = time.time()
-        earliest_time_allowed = curr_time - self.gc_window_seconds
-
-        # If we don"t have any data at hand, no need to gc.
-        if len(self.data_entries) == 0:
-            return
-
-        df = pd.DataFrame(self.data_entries)
-        df = df[df["retrieved_at"] >= earliest_time_allowed]
-        self.data_entries = df.to_dict(orient="record")
-
-    def _get_dataframe(self):
-        return pd.DataFrame(self.data_entries)
+                    self.store.add_list(metric_name, metric_info["value"],
+                                        curr_time)
 
     def collect(self,
                 percentiles=[50, 90, 95],
                 agg_windows_seconds=[10, 60, 300, 600, 3600]):
         """Collect and perform aggregation on all metrics.
 
+        Percentiles are estimated within 1% of their true value.
+
         Args:
             percentiles(List[int]): The percentiles for aggregation operations.
                 Default is 50th, 90th, 95th percentile.
@@ -93,27 +191,16 @@ class MetricMonitor:
                 The longest aggregation window must be shorter or equal to the
                 gc_window_seconds.
         """
-        result = {}
-        df = pd.DataFrame(self.data_entries)
-
-        if len(df) == 0:  # no metric to report
-            return {}
-
-        # Retrieve the {metric_name -> metric_type} mapping
-        metric_types = df[["name",
-                           "type"]].set_index("name").squeeze().to_dict()
-
-        for metric_name, metric_type in metric_types.items():
-            if metric_type == "counter":
-                result[metric_name] = df.loc[df["name"] == metric_name,
-                                             "value"].tolist()[-1]
-            if metric_type == "list":
-                result.update(
-                    self._aggregate(metric_name, percentiles,
-                                    agg_windows_seconds))
+        curr_time = time.time()
+        result = self.store.latest_counters(curr_time)
+        for metric_name in self.store.buckets:
+            result.update(
+                self._aggregate(metric_name, percentiles, agg_windows_seconds,
+                                curr_time))
         return result
 
-    def _aggregate(self, metric_name, percentiles, agg_windows_seconds):
+    def _aggregate(self, metric_name, percentiles, agg_windows_seconds,
+                   curr_time):
         """Perform aggregation over a metric.
 
         Note:
@@ -123,29 +210,16 @@ class MetricMonitor:
             "Aggregation window exceeds gc window. You should set a longer gc "
             "window or shorter aggregation window.")
 
-        curr_time = time.time()
-        df = pd.DataFrame(self.data_entries)
-        filtered_df = df[df["name"] == metric_name]
-        if len(filtered_df) == 0:
-            return dict()
-
-        data_types = filtered_df["type"].unique().tolist()
-        assert data_types == [
-            "list"
-        ], ("Can't aggreagte over non-list type. {} has type {}".format(
-            metric_name, data_types))
-
         aggregated_metric = {}
         for window in agg_windows_seconds:
-            earliest_time = curr_time - window
-            windowed_df = filtered_df[
-                filtered_df["retrieved_at"] > earliest_time]
-            percentile_values = np.percentile(windowed_df["value"],
-                                              percentiles)
+            sketch = self.store.window_sketch(metric_name, window, curr_time)
+            if sketch.count == 0:
+                continue
+            percentile_values = sketch.quantiles(percentiles)
             for percentile, value in zip(percentiles, percentile_values):
                 result_key = "{name}_{perc}th_perc_{window}_window".format(
                     name=metric_name, perc=percentile, window=window)
-                aggregated_metric[result_key] = value
+                aggregated_metric[result_key] = float(value)
 
         return aggregated_metric
 
@@ -17,21 +17,12 @@ class RandomPolicyQueue(CentralizedQueues):
     weights assigned to backends.
     """
 
-    async def _flush_service_queues(self):
-        # perform traffic splitting for requests
-        for service, queue in self.service_queues.items():
-            # while there are incoming requests and there are backends
-            while queue.qsize() and len(self.traffic[service]):
-                backend_names = list(self.traffic[service].keys())
-                backend_weights = list(self.traffic[service].values())
-                # randomly choose a backend for every query
-                chosen_backend = np.random.choice(
-                    backend_names, replace=False, p=backend_weights).squeeze()
-                logger.debug("Matching service {} to backend {}".format(
-                    service, chosen_backend))
-
-                request = await queue.get()
-                self.buffer_queues[chosen_backend].add(request)
+    def _select_backend(self, service):
+        backend_names = list(self.traffic[service].keys())
+        backend_weights = list(self.traffic[service].values())
+        # randomly choose a backend for every query
+        return np.random.choice(
+            backend_names, replace=False, p=backend_weights).squeeze()
 
 
 @ray.remote
@@ -62,18 +53,9 @@ class RoundRobinPolicyQueue(CentralizedQueues):
         self.round_robin_iterator_map[service] = itertools.cycle(backend_names)
         await self.flush()
 
-    async def _flush_service_queues(self):
-        # perform traffic splitting for requests
-        for service, queue in self.service_queues.items():
-            # if there are incoming requests and there are backends
-            if queue.qsize() and len(self.traffic[service]):
-                while queue.qsize():
-                    # choose the next backend available from persistent
-                    # information
-                    chosen_backend = next(
-                        self.round_robin_iterator_map[service])
-                    request = await queue.get()
-                    self.buffer_queues[chosen_backend].add(request)
+    def _select_backend(self, service):
+        # choose the next backend available from persistent information
+        return next(self.round_robin_iterator_map[service])
 
 
 @ray.remote
@@ -91,35 +73,29 @@ class PowerOfTwoPolicyQueue(CentralizedQueues):
     the weights assigned to backends.
     """
 
-    async def _flush_service_queues(self):
-        # perform traffic splitting for requests
-        for service, queue in self.service_queues.items():
-            # while there are incoming requests and there are backends
-            while queue.qsize() and len(self.traffic[service]):
-                backend_names = list(self.traffic[service].keys())
-                backend_weights = list(self.traffic[service].values())
-                if len(self.traffic[service]) >= 2:
-                    # randomly pick 2 backends
-                    backend1, backend2 = np.random.choice(
-                        backend_names, 2, replace=False, p=backend_weights)
-
-                    # see the length of buffer queues of the two backends
-                    # and pick the one which has less no. of queries
-                    # in the buffer
-                    if (len(self.buffer_queues[backend1]) <= len(
-                            self.buffer_queues[backend2])):
-                        chosen_backend = backend1
-                    else:
-                        chosen_backend = backend2
-                    logger.debug("[Power of two chocies] found two backends "
-                                 "{} and {}: choosing {}.".format(
-                                     backend1, backend2, chosen_backend))
-                else:
-                    chosen_backend = np.random.choice(
-                        backend_names, replace=False,
-                        p=backend_weights).squeeze()
-                request = await queue.get()
-                self.buffer_queues[chosen_backend].add(request)
+    def _select_backend(self, service):
+        backend_names = list(self.traffic[service].keys())
+        backend_weights = list(self.traffic[service].values())
+        if len(self.traffic[service]) >= 2:
+            # randomly pick 2 backends
+            backend1, backend2 = np.random.choice(
+                backend_names, 2, replace=False, p=backend_weights)
+
+            # see the length of buffer queues of the two backends
+            # and pick the one which has less no. of queries
+            # in the buffer
+            if (len(self.buffer_queues[backend1]) <= len(
+                    self.buffer_queues[backend2])):
+                chosen_backend = backend1
+            else:
+                chosen_backend = backend2
+            logger.debug("[Power of two chocies] found two backends "
+                         "{} and {}: choosing {}.".format(
+                             backend1, backend2, chosen_backend))
+        else:
+            chosen_backend = np.random.choice(
+                backend_names, replace=False, p=backend_weights).squeeze()
+        return chosen_backend
 
 
 @ray.remote
@@ -156,18 +132,9 @@ class FixedPackingPolicyQueue(CentralizedQueues):
                 itertools.repeat(x, self.packing_num) for x in backend_names))
         await self.flush()
 
-    async def _flush_service_queues(self):
-        # perform traffic splitting for requests
-        for service, queue in self.service_queues.items():
-            # if there are incoming requests and there are backends
-            if queue.qsize() and len(self.traffic[service]):
-                while queue.qsize():
-                    # choose the next backend available from persistent
-                    # information
-                    chosen_backend = next(
-                        self.fixed_packing_iterator_map[service])
-                    request = await queue.get()
-                    self.buffer_queues[chosen_backend].add(request)
+    def _select_backend(self, service):
+        # choose the next backend available from persistent information
+        return next(self.fixed_packing_iterator_map[service])
 
 
 @ray.remote
@@ -1,20 +1,19 @@
 import asyncio
 import copy
-from collections import defaultdict
-from typing import DefaultDict, List
+from collections import defaultdict, deque, Counter
+import heapq
+import itertools
+import math
+from typing import DefaultDict, Deque, List
 import pickle
+import time
 
-# Note on choosing blist instead of stdlib heapq
-# 1. pop operation should be O(1) (amortized)
-#    (helpful even for batched pop)
-# 2. There should not be significant overhead in
-#    maintaining the sorted list.
-# 3. The blist implementation is fast and uses C extensions.
-import blist
-
-import ray
+from ray.serve.exceptions import RayServeDeadlineExceeded
 from ray.serve.utils import logger
 
+# Weight of the latest call in the moving average of backend service times.
+SERVICE_TIME_SMOOTHING = 0.2
+
 
 class Query:
     def __init__(self, request_args, request_kwargs, request_context,
@@ -75,6 +74,97 @@ def _make_future_unwrapper(client_futures: List[asyncio.Future],
     return unwrap_future
 
 
+class BufferQueue:
+    """Queries waiting for a replica of one backend.
+
+    Queries are popped in order of their SLO, and in arrival order among
+    queries with the same SLO. The arrival time of the oldest query is
+    tracked as well, for the batch wait timeout.
+    """
+
+    def __init__(self):
+        # (request_slo_ms, arrival number, query)
+        self._heap = []
+        # (arrival number, arrival time) of queries, in arrival order,
+        # including popped ones that haven't reached the front yet.
+        self._arrivals = deque()
+        self._popped = set()
+        self._arrival_counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, query):
+        arrival_number = next(self._arrival_counter)
+        heapq.heappush(self._heap,
+                       (query.request_slo_ms, arrival_number, query))
+        self._arrivals.append((arrival_number, time.time()))
+
+    def pop(self):
+        _, arrival_number, query = heapq.heappop(self._heap)
+        self._popped.add(arrival_number)
+        return query
+
+    def pop_expired(self, now_ms):
+        """Pops the queries whose deadline is before `now_ms`."""
+        expired = []
+        while self._heap and self._heap[0][0] < now_ms:
+            expired.append(self.pop())
+        return expired
+
+    def oldest_arrival_time(self):
+        """Returns when the longest waiting query arrived, or None."""
+        while self._arrivals and self._arrivals[0][0] in self._popped:
+            self._popped.remove(self._arrivals.popleft()[0])
+        if not self._arrivals:
+            return None
+        return self._arrivals[0][1]
+
+
+class ReplicaQueue:
+    """FIFO of work intentions from idle replicas of one backend.
+
+    A replica can appear more than once, once for each request it asked for.
+    Removing a replica is O(1): its entries are skipped when they reach the
+    front of the queue, and it is never added again.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        # actor id -> number of entries of the replica in the queue
+        self._num_entries = Counter()
+        self._removed = set()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def is_removed(self, replica_handle):
+        return replica_handle._actor_id in self._removed
+
+    def put(self, replica_handle):
+        if self.is_removed(replica_handle):
+            return
+        actor_id = replica_handle._actor_id
+        self._queue.append(replica_handle)
+        self._num_entries[actor_id] += 1
+        self._size += 1
+
+    def get(self):
+        while True:
+            replica_handle = self._queue.popleft()
+            actor_id = replica_handle._actor_id
+            if actor_id not in self._removed:
+                self._num_entries[actor_id] -= 1
+                self._size -= 1
+                return replica_handle
+
+    def remove(self, replica_handle):
+        actor_id = replica_handle._actor_id
+        self._removed.add(actor_id)
+        self._size -= self._num_entries.pop(actor_id, 0)
+
+
 class CentralizedQueues:
     """A router that routes request to available workers.
 
@@ -98,6 +188,11 @@ class CentralizedQueues:
         # data is put into work ObjectID, and the replica processes the request
         # and store the result into result ObjectID
 
+    Routing is event driven: a new request only touches its service and the
+    backend chosen for it, and a new work intention only touches its
+    backend, so the cost of each event doesn't depend on the number of
+    services and backends.
+
     Traffic policy splits the traffic among different replicas
     probabilistically:
 
@@ -113,25 +208,24 @@ class CentralizedQueues:
 
     def __init__(self):
         # Note: Several queues are used in the router
-        # - When a request come in, it's placed inside its corresponding
-        #   service_queue.
-        # - The service_queue is dequed during flush operation, which moves
-        #   the queries to backend buffer_queue. Here we match a request
-        #   for a service to a backend given some policy.
-        # - The worker_queue is used to collect idle actor handle. These
-        #   handles are dequed during the second stage of flush operation,
-        #   which assign queries in buffer_queue to actor handle.
+        # - When a request come in, it's routed to a backend by the traffic
+        #   policy and put into the backend's buffer_queue. Only requests
+        #   for a service without traffic policy wait in its service_queue.
+        # - The worker_queue is used to collect idle actor handle. Whenever
+        #   a backend's buffer_queue or worker_queue changes, queries of the
+        #   buffer_queue are assigned to its idle replicas.
 
         # -- Queues -- #
 
-        # service_name -> request queue
-        self.service_queues: DefaultDict[asyncio.Queue[Query]] = defaultdict(
-            asyncio.Queue)
-        # backend_name -> worker request queue
-        self.worker_queues: DefaultDict[asyncio.Queue[
-            ray.actor.ActorHandle]] = defaultdict(asyncio.Queue)
-        # backend_name -> worker payload queue
-        self.buffer_queues = defaultdict(blist.sortedlist)
+        # service_name -> requests waiting for a traffic policy
+        self.service_queues: DefaultDict[str, Deque[Query]] = defaultdict(
+            deque)
+        # backend_name -> idle replicas
+        self.worker_queues: DefaultDict[str, ReplicaQueue] = defaultdict(
+            ReplicaQueue)
+        # backend_name -> queries waiting for a replica
+        self.buffer_queues: DefaultDict[str, BufferQueue] = defaultdict(
+            BufferQueue)
 
         # -- Metadata -- #
 
@@ -139,29 +233,62 @@ class CentralizedQueues:
         self.traffic = defaultdict(dict)
         # backend_name -> backend_config
         self.backend_info = dict()
+        # backend_name -> actor ids of its live replicas
+        self.replicas = defaultdict(set)
+
+        # -- Admission control -- #
 
-        # -- Synchronization -- #
+        # backend_name -> moving average of the time replicas take to
+        # process a call, in ms
+        self.service_time_ms = dict()
+        # backend_name -> number of queries rejected on arrival
+        self.num_shed = defaultdict(int)
+        # backend_name -> number of queries dropped after their deadline
+        self.num_expired = defaultdict(int)
 
-        # This lock guarantee that only one flush operation can happen at a
-        # time. Without the lock, multiple flush operation can pop from the
-        # same buffer_queue and worker_queue and create deadlock. For example,
-        # an operation holding the only query and the other flush operation
-        # holding the only idle replica. Additionally, allowing only one flush
-        # operation at a time simplifies design overhead for custom queuing and
-        # batching polcies.
-        self.flush_lock = asyncio.Lock()
+        # -- Batching -- #
+
+        # backend_name -> current batch size in adaptive batching mode
+        self.adaptive_batch_sizes = dict()
+        # backend_name -> sizes of the batches sent since the last scrape
+        self.batch_sizes = defaultdict(list)
+        # backend_name -> timer that flushes a partial batch when the wait
+        # timeout of its oldest query expires
+        self.batch_timers = dict()
 
     def is_ready(self):
         return True
 
     def _serve_metric(self):
-        return {
+        metrics = {
             "backend_{}_queue_size".format(backend_name): {
                 "value": len(queue),
                 "type": "counter",
             }
             for backend_name, queue in self.buffer_queues.items()
         }
+        for backend_name, batch_sizes in self.batch_sizes.items():
+            metrics["backend_{}_batch_size".format(backend_name)] = {
+                "value": batch_sizes,
+                "type": "list",
+            }
+        self.batch_sizes = defaultdict(list)
+        for backend_name, size in self.adaptive_batch_sizes.items():
+            metrics["backend_{}_adaptive_batch_size".format(backend_name)] = {
+                "value": size,
+                "type": "counter",
+            }
+        for backend_name, count in self.num_shed.items():
+            metrics["backend_{}_num_shed".format(backend_name)] = {
+                "value": count,
+                "type": "counter",
+            }
+        for backend_name, count in self.num_expired.items():
+            metrics["backend_{}_num_expired".format(backend_name)] = {
+                "value": count,
+                "type": "counter",
+            }
+        return metrics
 
     async def enqueue_request(self, request_in_object, *request_args,
                               **request_kwargs):
@@ -177,8 +304,8 @@ class CentralizedQueues:
         request_context = request_in_object.request_context
         query = Query(request_args, request_kwargs, request_context,
                       request_slo_ms)
-        await self.service_queues[service].put(query)
-        await self.flush()
+        self.service_queues[service].append(query)
+        self._flush_service_queue(service)
 
         # Note: a future change can be to directly return the ObjectID from
         # replica task submission
@@ -188,24 +315,18 @@ class CentralizedQueues:
     async def dequeue_request(self, backend, replica_handle):
         logger.debug(
             "Received a dequeue request for backend {}".format(backend))
-        await self.worker_queues[backend].put(replica_handle)
-        await self.flush()
+        if self.worker_queues[backend].is_removed(replica_handle):
+            # A work intention sent before the replica was removed.
+            return
+        self.replicas[backend].add(replica_handle._actor_id)
+        self.worker_queues[backend].put(replica_handle)
+        self._flush_buffer_queue(backend)
 
     async def remove_and_destory_replica(self, backend, replica_handle):
-        # We need this lock because we modify worker_queue here.
-        async with self.flush_lock:
-            old_queue = self.worker_queues[backend]
-            new_queue = asyncio.Queue()
-            target_id = replica_handle._actor_id
-
-            while not old_queue.empty():
-                replica_handle = await old_queue.get()
-                if replica_handle._actor_id != target_id:
-                    await new_queue.put(replica_handle)
-
-            self.worker_queues[backend] = new_queue
-            # TODO: consider await this with timeout, or use ray_kill
-            replica_handle.__ray_terminate__.remote()
+        self.worker_queues[backend].remove(replica_handle)
+        self.replicas[backend].discard(replica_handle._actor_id)
+        # TODO: consider await this with timeout, or use ray_kill
+        replica_handle.__ray_terminate__.remote()
 
     async def link(self, service, backend):
         logger.debug("Link %s with %s", service, backend)
@@ -221,85 +342,175 @@ class CentralizedQueues:
         logger.debug("Setting backend config for "
                      "backend {} to {}".format(backend, config_dict))
         self.backend_info[backend] = config_dict
+        if config_dict.get("adaptive_batching"):
+            self.adaptive_batch_sizes[backend] = config_dict["max_batch_size"]
+        else:
+            self.adaptive_batch_sizes.pop(backend, None)
+        self._flush_buffer_queue(backend)
 
     async def flush(self):
-        """In the default case, flush calls ._flush.
+        """Re-evaluates all services and backends.
 
-        When this class is a Ray actor, .flush can be scheduled as a remote
-        method invocation.
+        Events only need to re-evaluate the service and backends they touch,
+        this is used after changes to the traffic policy.
         """
-        async with self.flush_lock:
-            await self._flush_service_queues()
-            await self._flush_buffer_queues()
-
-    def _get_available_backends(self, service):
-        backends_in_policy = set(self.traffic[service].keys())
-        available_workers = {
-            backend
-            for backend, queues in self.worker_queues.items()
-            if queues.qsize() > 0
-        }
-        return list(backends_in_policy.intersection(available_workers))
+        for service in list(self.service_queues.keys()):
+            self._flush_service_queue(service)
+        for backend in list(self.buffer_queues.keys()):
+            self._flush_buffer_queue(backend)
+
+    def _select_backend(self, service):
+        """Chooses the backend for the next query to a service.
 
-    async def _flush_service_queues(self):
-        """Selects the backend and puts the service queue query to the buffer
         Expected Implementation:
-            The implementer is expected to access and manipulate
-            self.service_queues        : dict[str,Deque]
-            self.buffer_queues : dict[str,sortedlist]
-        For registering the implemented policies register at policy.py
-        Expected Behavior:
-            the Deque of all services in self.service_queues linked with
-            atleast one backend must be empty irrespective of whatever
-            backend policy is implemented.
+            The implementer can use self.traffic[service], which is never
+            empty when this is called, and self.buffer_queues. For
+            registering the implemented policies register at policy.py
         """
         raise NotImplementedError(
             "This method should be implemented by child class.")
 
-    # flushes the buffer queue and assigns work to workers
-    async def _flush_buffer_queues(self):
-        for service in self.traffic.keys():
-            ready_backends = self._get_available_backends(service)
-            for backend in ready_backends:
-                # no work available
-                if len(self.buffer_queues[backend]) == 0:
-                    continue
-
-                buffer_queue = self.buffer_queues[backend]
-                worker_queue = self.worker_queues[backend]
-
-                logger.debug("Assigning queries for backend {} with buffer "
-                             "queue size {} and worker queue size {}".format(
-                                 backend, len(buffer_queue),
-                                 worker_queue.qsize()))
-
-                max_batch_size = None
-                if backend in self.backend_info:
-                    max_batch_size = self.backend_info[backend][
-                        "max_batch_size"]
-
-                await self._assign_query_to_worker(buffer_queue, worker_queue,
-                                                   max_batch_size)
-
-    async def _assign_query_to_worker(self,
-                                      buffer_queue,
-                                      worker_queue,
-                                      max_batch_size=None):
-
-        while len(buffer_queue) and worker_queue.qsize():
-            worker = await worker_queue.get()
+    def _flush_service_queue(self, service):
+        """Routes the waiting queries of a service to backends."""
+        queue = self.service_queues[service]
+        if not queue or not self.traffic[service]:
+            return
+        chosen_backends = set()
+        while queue:
+            backend = self._select_backend(service)
+            logger.debug("Matching service {} to backend {}".format(
+                service, backend))
+            query = queue.popleft()
+            if not self._admit(backend, query):
+                continue
+            self.buffer_queues[backend].push(query)
+            chosen_backends.add(backend)
+        for backend in chosen_backends:
+            self._flush_buffer_queue(backend)
+
+    def _admit(self, backend, query):
+        """Rejects a query that the backend can't complete before its SLO.
+
+        The completion time is estimated from the queries ahead of it in the
+        buffer queue, the number of replicas and the measured service time
+        of the backend. Queries are admitted until the service time has been
+        measured.
+        """
+        if backend not in self.service_time_ms:
+            return True
+        config = self.backend_info.get(backend, {})
+        queries_per_call = self.adaptive_batch_sizes.get(
+            backend, config.get("max_batch_size")) or 1
+        capacity = queries_per_call * max(1, len(self.replicas[backend]))
+        num_calls = math.ceil(
+            (len(self.buffer_queues[backend]) + 1) / capacity)
+        completion_ms = (
+            time.time() * 1000 + num_calls * self.service_time_ms[backend])
+        if completion_ms <= query.request_slo_ms:
+            return True
+        self.num_shed[backend] += 1
+        query.async_future.set_exception(
+            RayServeDeadlineExceeded(
+                "Backend {} is too loaded to complete the query within its "
+                "latency objective.".format(backend)))
+        return False
+
+    def _flush_buffer_queue(self, backend):
+        """Assigns the buffered queries of a backend to its idle replicas."""
+        buffer_queue = self.buffer_queues[backend]
+        worker_queue = self.worker_queues[backend]
+        if not buffer_queue or not len(worker_queue):
+            return
+
+        # Drop the queries whose result would come too late anyway.
+        for query in buffer_queue.pop_expired(time.time() * 1000):
+            self.num_expired[backend] += 1
+            query.async_future.set_exception(
+                RayServeDeadlineExceeded(
+                    "The deadline of the query passed before a replica of "
+                    "backend {} was available.".format(backend)))
+
+        logger.debug("Assigning queries for backend {} with buffer "
+                     "queue size {} and worker queue size {}".format(
+                         backend, len(buffer_queue), len(worker_queue)))
+
+        config = self.backend_info.get(backend, {})
+        max_batch_size = config.get("max_batch_size")
+        batch_size = self.adaptive_batch_sizes.get(backend, max_batch_size)
+
+        while buffer_queue and len(worker_queue):
             if max_batch_size is None:  # No batching
-                request = buffer_queue.pop(0)
+                worker = worker_queue.get()
+                request = buffer_queue.pop()
                 future = worker._ray_serve_call.remote(request).as_future()
                 # chaining satisfies request.async_future with future result.
                 asyncio.futures._chain_future(future, request.async_future)
+                future.add_done_callback(self._make_call_tracker(backend, 1))
+                continue
+
+            if len(buffer_queue) < batch_size and config.get(
+                    "batch_wait_timeout_ms"):
+                # Hold a partial batch until it fills up or its oldest query
+                # has waited for the timeout.
+                deadline = (buffer_queue.oldest_arrival_time() +
+                            config["batch_wait_timeout_ms"] / 1000)
+                if deadline > time.time():
+                    self._schedule_flush(backend, deadline)
+                    return
+
+            worker = worker_queue.get()
+            real_batch_size = min(len(buffer_queue), batch_size)
+            requests = [buffer_queue.pop() for _ in range(real_batch_size)]
+            self.batch_sizes[backend].append(real_batch_size)
+            future = worker._ray_serve_call.remote(requests).as_future()
+            future.add_done_callback(
+                _make_future_unwrapper(
+                    client_futures=[req.async_future for req in requests],
+                    host_future=future))
+            future.add_done_callback(
+                self._make_call_tracker(backend, real_batch_size))
+
+    def _schedule_flush(self, backend, deadline):
+        if backend in self.batch_timers:
+            # The pending timer fires no later than the new deadline.
+            return
+
+        def flush():
+            del self.batch_timers[backend]
+            self._flush_buffer_queue(backend)
+
+        loop = asyncio.get_event_loop()
+        self.batch_timers[backend] = loop.call_later(
+            max(0, deadline - time.time()), flush)
+
+    def _make_call_tracker(self, backend, batch_size):
+        """Records the service time of a replica call once it's done.
+
+        In adaptive batching mode, this also adapts the batch size: it is
+        increased by one while batches take less than the batch wait timeout
+        to process, and reduced by 25% otherwise, so that queries spend at
+        most about the timeout waiting for a batch and about the same time
+        being processed.
+        """
+        start = time.time()
+
+        def track(_):
+            latency_ms = (time.time() - start) * 1000
+            if backend in self.service_time_ms:
+                self.service_time_ms[backend] += SERVICE_TIME_SMOOTHING * (
+                    latency_ms - self.service_time_ms[backend])
             else:
-                real_batch_size = min(len(buffer_queue), max_batch_size)
-                requests = [
-                    buffer_queue.pop(0) for _ in range(real_batch_size)
-                ]
-                future = worker._ray_serve_call.remote(requests).as_future()
-                future.add_done_callback(
-                    _make_future_unwrapper(
-                        client_futures=[req.async_future for req in requests],
-                        host_future=future))
+                self.service_time_ms[backend] = latency_ms
+
+            config = self.backend_info.get(backend, {})
+            if backend not in self.adaptive_batch_sizes:
+                return
+            current = self.adaptive_batch_sizes[backend]
+            if latency_ms <= config["batch_wait_timeout_ms"]:
+                if batch_size >= current:
+                    current = min(current + 1, config["max_batch_size"])
+            else:
+                current = max(1, int(current * 0.75))
+            self.adaptive_batch_sizes[backend] = current
+
+        return track
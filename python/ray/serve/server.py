@@ -7,6 +7,7 @@ import ray
 from ray.experimental.async_api import _async_init
 from ray.serve.constants import HTTP_ROUTER_CHECKER_INTERVAL_S
 from ray.serve.context import TaskContext
+from ray.serve.exceptions import RayServeDeadlineExceeded
 from ray.serve.utils import BytesEncoder
 from ray.serve.request_params import RequestMetadata
 
@@ -173,9 +174,17 @@ class HTTPProxy:
             relative_slo_ms=relative_slo_ms,
             absolute_slo_ms=absolute_slo_ms)
 
-        actual_result = await (self.serve_global_state.init_or_get_router()
-                               .enqueue_request.remote(request_in_object,
-                                                       *args))
+        try:
+            actual_result = await (
+                self.serve_global_state.init_or_get_router()
+                .enqueue_request.remote(request_in_object, *args))
+        except RayServeDeadlineExceeded:
+            await JSONResponse(
+                {
+                    "error": "latency objective of the query can't be met"
+                },
+                status_code=503)(scope, receive, send)
+            return
         result = actual_result
 
         if isinstance(result, ray.exceptions.RayTaskError):
@@ -2,7 +2,7 @@ import numpy as np
 import pytest
 
 import ray
-from ray.serve.metric import MetricMonitor
+from ray.serve.metric import MetricMonitor, MetricStore, QuantileSketch
 
 
 @pytest.fixture(scope="session")
@@ -33,20 +33,38 @@ def start_target_actor(ray_instance):
     yield Target.remote()
 
 
-def test_metric_gc(ray_instance, start_target_actor):
-    target_actor = start_target_actor
-    # this means when new scrapes are invoked, the
-    metric_monitor = MetricMonitor.remote(gc_window_seconds=0)
-    ray.get(metric_monitor.add_target.remote(target_actor))
-
-    ray.get(metric_monitor.scrape.remote())
-    df = ray.get(metric_monitor._get_dataframe.remote())
-    assert len(df) == 102
-
-    # Old metric sould be cleared. So only 1 counter + 101 list values left.
-    ray.get(metric_monitor.scrape.remote())
-    df = ray.get(metric_monitor._get_dataframe.remote())
-    assert len(df) == 102
+def test_metric_store_window_and_gc():
+    store = MetricStore(gc_window_seconds=10, bucket_seconds=1)
+    store.add_list("latency", [1.0, 2.0], now=100.5)
+    store.add_list("latency", [3.0], now=105.5)
+    store.add_counter("counter", 1, now=100.5)
+
+    assert store.window_sketch("latency", 2, now=106).count == 1
+    assert store.window_sketch("latency", 10, now=106).count == 3
+    assert store.latest_counters(now=106) == {"counter": 1}
+
+    # Buckets out of the gc window are reused instead of collected.
+    store.add_list("latency", [4.0], now=111.5)
+    assert store.window_sketch("latency", 10, now=112).count == 2
+    assert len(store.buckets["latency"]) == store.num_buckets
+    assert store.latest_counters(now=112) == {}
+
+
+def test_quantile_sketch_accuracy():
+    values = np.random.RandomState(0).lognormal(size=10000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for chunk in np.split(values, 10):
+        part = QuantileSketch(relative_accuracy=0.01)
+        part.add(chunk)
+        sketch.merge(part)
+    sketch.add([0.0, -1.0])
+    percentiles = [1, 50, 90, 99]
+    expected = np.percentile(
+        np.concatenate([values, [0.0, -1.0]]),
+        percentiles,
+        interpolation="lower")
+    assert sketch.quantiles(percentiles) == pytest.approx(expected, rel=0.02)
+    assert sketch.quantiles([0])[0] == pytest.approx(-1.0, rel=0.01)
 
 
 def test_metric_system(ray_instance, start_target_actor):
@@ -65,10 +83,11 @@ def test_metric_system(ray_instance, start_target_actor):
         metric_monitor.collect.remote(percentiles, agg_windows_seconds))
     real_counter_value = ray.get(target_actor.get_counter_value.remote())
 
+    # Percentiles are estimated within 1%.
     expected_result = {
         "counter": real_counter_value,
-        "latency_list_50th_perc_60_window": 50.0,
-        "latency_list_90th_perc_60_window": 90.0,
-        "latency_list_95th_perc_60_window": 95.0,
+        "latency_list_50th_perc_60_window": pytest.approx(50.0, rel=0.01),
+        "latency_list_90th_perc_60_window": pytest.approx(90.0, rel=0.01),
+        "latency_list_95th_perc_60_window": pytest.approx(95.0, rel=0.01),
     }
     assert result == expected_result
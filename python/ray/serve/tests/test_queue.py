@@ -1,4 +1,5 @@
 import asyncio
+import time
 
 import pytest
 import ray
@@ -6,6 +7,8 @@ import ray
 from ray.serve.policy import (
     RandomPolicyQueue, RandomPolicyQueueActor, RoundRobinPolicyQueueActor,
     PowerOfTwoPolicyQueueActor, FixedPackingPolicyQueueActor)
+from ray.serve.exceptions import RayServeDeadlineExceeded
+from ray.serve.queues import ReplicaQueue
 from ray.serve.request_params import RequestMetadata
 
 pytestmark = pytest.mark.asyncio
@@ -189,4 +192,168 @@ async def test_queue_remove_replicas(serve_instance):
     q = RandomPolicyQueue()
     await q.dequeue_request("backend", temp_actor)
     await q.remove_and_destory_replica("backend", temp_actor)
-    assert q.worker_queues["backend"].qsize() == 0
+    assert len(q.worker_queues["backend"]) == 0
+
+    # Work intentions of a removed replica don't register it again.
+    await q.dequeue_request("backend", temp_actor)
+    assert len(q.worker_queues["backend"]) == 0
+    assert len(q.replicas["backend"]) == 0
+
+
+async def test_replica_queue():
+    class FakeHandle:
+        def __init__(self, actor_id):
+            self._actor_id = actor_id
+
+    a, b, c = FakeHandle("a"), FakeHandle("b"), FakeHandle("c")
+    queue = ReplicaQueue()
+    for handle in [a, b, a, c, b]:
+        queue.put(handle)
+    assert len(queue) == 5
+    assert queue.get() is a
+
+    # Removing a replica drops all of its work intentions, and it can't
+    # come back.
+    queue.remove(b)
+    queue.put(b)
+    assert len(queue) == 2
+    assert [queue.get(), queue.get()] == [a, c]
+    assert len(queue) == 0
+
+
+class FakeBatchReplica:
+    """Replica handle whose calls finish when the test resolves them."""
+
+    def __init__(self, actor_id):
+        self._actor_id = actor_id
+        self._ray_serve_call = self
+        self.batches = []
+        self.futures = []
+
+    def remote(self, batch):
+        self.batches.append(batch)
+        self.futures.append(asyncio.get_event_loop().create_future())
+        return self
+
+    def as_future(self):
+        return self.futures[-1]
+
+    def finish(self):
+        batch = self.batches[-1]
+        self.futures[-1].set_result(["DONE"] * len(batch) if isinstance(
+            batch, list) else "DONE")
+
+
+async def test_batch_wait_timeout():
+    q = RandomPolicyQueue()
+    await q.link("svc", "backend")
+    await q.set_backend_config("backend", {
+        "max_batch_size": 3,
+        "batch_wait_timeout_ms": 100
+    })
+    replica = FakeBatchReplica("replica")
+    await q.dequeue_request("backend", replica)
+
+    # A full batch is sent right away.
+    for i in range(3):
+        asyncio.ensure_future(
+            q.enqueue_request(RequestMetadata("svc", None), i))
+    await asyncio.sleep(0.01)
+    assert len(replica.batches) == 1
+    assert len(replica.batches[0]) == 3
+    replica.finish()
+
+    # A partial batch waits for the timeout.
+    start = time.time()
+    results = [
+        asyncio.ensure_future(
+            q.enqueue_request(RequestMetadata("svc", None), i))
+        for i in range(2)
+    ]
+    await q.dequeue_request("backend", replica)
+    await asyncio.sleep(0.05)
+    assert len(replica.batches) == 1
+    while len(replica.batches) == 1:
+        await asyncio.sleep(0.01)
+    assert time.time() - start >= 0.1
+    assert len(replica.batches[1]) == 2
+    replica.finish()
+    assert await asyncio.gather(*results) == ["DONE", "DONE"]
+
+    metrics = q._serve_metric()
+    assert metrics["backend_backend_batch_size"]["value"] == [3, 2]
+
+
+async def test_adaptive_batching():
+    q = RandomPolicyQueue()
+    await q.link("svc", "backend")
+    await q.set_backend_config(
+        "backend", {
+            "max_batch_size": 8,
+            "batch_wait_timeout_ms": 10,
+            "adaptive_batching": True
+        })
+    replica = FakeBatchReplica("replica")
+    for i in range(8):
+        asyncio.ensure_future(
+            q.enqueue_request(RequestMetadata("svc", None), i))
+
+    # Batches slower than the timeout shrink the batch size.
+    await asyncio.sleep(0)
+    await q.dequeue_request("backend", replica)
+    assert len(replica.batches[-1]) == 8
+    await asyncio.sleep(0.05)
+    replica.finish()
+    await asyncio.sleep(0)
+    assert q.adaptive_batch_sizes["backend"] == 6
+
+    # Fast, full batches grow it again.
+    for i in range(6):
+        asyncio.ensure_future(
+            q.enqueue_request(RequestMetadata("svc", None), i))
+    await asyncio.sleep(0)
+    await q.dequeue_request("backend", replica)
+    assert len(replica.batches[-1]) == 6
+    replica.finish()
+    await asyncio.sleep(0)
+    assert q.adaptive_batch_sizes["backend"] == 7
+    metrics = q._serve_metric()
+    assert metrics["backend_backend_adaptive_batch_size"]["value"] == 7
+
+
+async def test_deadline_shedding():
+    q = RandomPolicyQueue()
+    await q.link("svc", "backend")
+    replica = FakeBatchReplica("replica")
+    await q.dequeue_request("backend", replica)
+
+    # Queries whose deadline passed are dropped instead of processed.
+    expired = RequestMetadata("svc", None, absolute_slo_ms=1)
+    with pytest.raises(RayServeDeadlineExceeded):
+        await q.enqueue_request(expired, 0)
+    assert q.num_expired["backend"] == 1
+    assert len(replica.batches) == 0
+
+    # Measure the service time of the backend.
+    result = asyncio.ensure_future(
+        q.enqueue_request(RequestMetadata("svc", None), 1))
+    await asyncio.sleep(0.05)
+    replica.finish()
+    assert await result == "DONE"
+    assert q.service_time_ms["backend"] >= 50
+
+    # Queries that can't be completed in time are rejected on arrival.
+    with pytest.raises(RayServeDeadlineExceeded):
+        await q.enqueue_request(
+            RequestMetadata("svc", None, relative_slo_ms=10), 2)
+    result = asyncio.ensure_future(
+        q.enqueue_request(
+            RequestMetadata("svc", None, relative_slo_ms=1000), 3))
+    await asyncio.sleep(0)
+    await q.dequeue_request("backend", replica)
+    replica.finish()
+    assert await result == "DONE"
+
+    metrics = q._serve_metric()
+    assert metrics["backend_backend_num_shed"]["value"] == 1
+    assert metrics["backend_backend_num_expired"]["value"] == 1
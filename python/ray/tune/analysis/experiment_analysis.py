@@ -7,10 +7,12 @@ try:
 except ImportError:
     pd = None
 
+from ray.tune.analysis.results_index import ResultsIndex
 from ray.tune.checkpoint_manager import Checkpoint
 from ray.tune.error import TuneError
+from ray.tune.experiment_journal import load_experiment_state
 from ray.tune.result import EXPR_PROGRESS_FILE, EXPR_PARAM_FILE,\
-    CONFIG_PREFIX, TRAINING_ITERATION
+    EXPR_RESULT_STORE_DIR, CONFIG_PREFIX, TRAINING_ITERATION
 from ray.tune.trial import Trial
 from ray.tune.trainable import TrainableUtil
 
@@ -18,7 +20,15 @@ logger = logging.getLogger(__name__)
 
 
 class Analysis:
-    """Analyze all results from a directory of experiments."""
+    """Analyze all results from a directory of experiments.
+
+    Results are read incrementally: calling fetch_trial_dataframes() again
+    only parses the rows appended to each trial's progress file since the
+    last call.
+
+    If the experiment was logged with ColumnarLogger, dataframe() reads the
+    experiment's result store instead of the files of each trial.
+    """
 
     def __init__(self, experiment_dir):
         experiment_dir = os.path.expanduser(experiment_dir)
@@ -28,23 +38,46 @@ class Analysis:
         self._experiment_dir = experiment_dir
         self._configs = {}
         self._trial_dataframes = {}
+        self._results_index = ResultsIndex()
+        self._result_store = None
 
         if not pd:
             logger.warning(
                 "pandas not installed. Run `pip install pandas` for "
                 "Analysis utilities.")
+            return
+        store_dir = os.path.join(experiment_dir, EXPR_RESULT_STORE_DIR)
+        if os.path.isdir(store_dir):
+            from ray.tune.result_store import ResultStore
+            self._result_store = ResultStore(store_dir)
+            try:
+                self.fetch_trial_dataframes()
+            except TuneError:
+                # The trials may only have logged to the result store.
+                pass
         else:
             self.fetch_trial_dataframes()
 
-    def dataframe(self, metric=None, mode=None):
+    def dataframe(self, metric=None, mode=None, columns=None, filters=None):
         """Returns a pandas.DataFrame object constructed from the trials.
 
         Args:
             metric (str): Key for trial info to order on.
                 If None, uses last result.
             mode (str): One of [min, max].
+            columns (list): If given, only these columns are read. Needs a
+                result store.
+            filters (list): If given, only results that match all of these
+                (column, op, value) tuples are considered, e.g.
+                `[("training_iteration", ">=", 10)]`. Needs a result store.
 
         """
+        if self._result_store is not None:
+            return self._store_dataframe(metric, mode, columns, filters)
+        if columns is not None or filters is not None:
+            raise ValueError(
+                "Reading only some columns or results needs a result store, "
+                "see ColumnarLogger.")
         rows = self._retrieve_rows(metric=metric, mode=mode)
         all_configs = self.get_all_configs(prefix=True)
         for path, config in all_configs.items():
@@ -82,13 +115,12 @@ class Analysis:
             return df.iloc[df[metric].idxmin()].logdir
 
     def fetch_trial_dataframes(self):
-        fail_count = 0
-        for path in self._get_trial_paths():
-            try:
-                self.trial_dataframes[path] = pd.read_csv(
-                    os.path.join(path, EXPR_PROGRESS_FILE))
-            except Exception:
-                fail_count += 1
+        paths = self._get_trial_paths()
+        fail_count = self._results_index.update(paths)
+        for path in paths:
+            df = self._results_index.dataframe(path)
+            if df is not None:
+                self.trial_dataframes[path] = df
 
         if fail_count:
             logger.debug(
@@ -104,19 +136,24 @@ class Analysis:
         """
         fail_count = 0
         for path in self._get_trial_paths():
+            if path in self._configs:
+                # The config of a trial doesn't change.
+                continue
             try:
                 with open(os.path.join(path, EXPR_PARAM_FILE)) as f:
-                    config = json.load(f)
-                    if prefix:
-                        for k in list(config):
-                            config[CONFIG_PREFIX + k] = config.pop(k)
-                    self._configs[path] = config
+                    self._configs[path] = json.load(f)
             except Exception:
                 fail_count += 1
 
         if fail_count:
             logger.warning(
                 "Couldn't read config from {} paths".format(fail_count))
+        if prefix:
+            return {
+                path: {CONFIG_PREFIX + k: v
+                       for k, v in config.items()}
+                for path, config in self._configs.items()
+            }
         return self._configs
 
     def get_trial_checkpoints_paths(self, trial, metric=TRAINING_ITERATION):
@@ -149,17 +186,34 @@ class Analysis:
         else:
             raise ValueError("trial should be a string or a Trial instance.")
 
+    def _store_dataframe(self, metric, mode, columns, filters):
+        assert mode is None or mode in ["max", "min"]
+        if columns is not None:
+            columns = list(columns) + [
+                c for c in ["logdir", metric] if c and c not in columns
+            ]
+        df = self._result_store.read(columns=columns, filters=filters)
+        if not len(df):
+            return df
+        if mode is None:
+            # The results of each trial are stored in the order they came in.
+            df = df.groupby("logdir", sort=False).tail(1)
+        else:
+            df = df[df[metric].notnull()]
+            groups = df.groupby("logdir", sort=False)[metric]
+            df = df.loc[groups.idxmax() if mode == "max" else groups.idxmin()]
+        return df.reset_index(drop=True)
+
     def _retrieve_rows(self, metric=None, mode=None):
         assert mode is None or mode in ["max", "min"]
         rows = {}
-        for path, df in self.trial_dataframes.items():
-            if mode == "max":
-                idx = df[metric].idxmax()
-            elif mode == "min":
-                idx = df[metric].idxmin()
+        for path in self.trial_dataframes:
+            if mode is None:
+                row = self._results_index.last_result(path)
             else:
-                idx = -1
-            rows[path] = df.iloc[idx].to_dict()
+                row = self._results_index.best_result(path, metric, mode)
+            if row is not None:
+                rows[path] = row
 
         return rows
 
@@ -202,9 +256,8 @@ class ExperimentAnalysis(Analysis):
             trials (list|None): List of trials that can be accessed via
                 `analysis.trials`.
         """
-        with open(experiment_checkpoint_path) as f:
-            _experiment_state = json.load(f)
-            self._experiment_state = _experiment_state
+        _experiment_state = load_experiment_state(experiment_checkpoint_path)
+        self._experiment_state = _experiment_state
 
         if "checkpoints" not in _experiment_state:
             raise TuneError("Experiment state invalid; no checkpoints found.")
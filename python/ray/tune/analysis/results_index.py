@@ -0,0 +1,135 @@
+import io
+import os
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from ray.tune.result import EXPR_PROGRESS_FILE
+
+
+class _TrialResults:
+    """Parsed rows and metric summaries of a trial's progress file."""
+
+    def __init__(self):
+        # Number of bytes of the file that have been parsed.
+        self.offset = 0
+        self.header = None
+        self.dataframe = None
+        self.last_result = None
+        # Row positions of the min and max of each numeric column.
+        self.min_pos = {}
+        self.max_pos = {}
+
+    def append(self, new_rows):
+        start = 0 if self.dataframe is None else len(self.dataframe)
+        new_rows.index = pd.RangeIndex(start, start + len(new_rows))
+        if not start:
+            self.dataframe = new_rows
+        else:
+            self.dataframe = pd.concat([self.dataframe, new_rows])
+        if not len(new_rows):
+            return
+
+        self.last_result = new_rows.iloc[-1].to_dict()
+        numeric = new_rows.select_dtypes(include="number")
+        for column in numeric.columns:
+            values = numeric[column]
+            if values.isnull().all():
+                continue
+            self._merge(self.min_pos, column, values.idxmin(),
+                        lambda new, old: new < old)
+            self._merge(self.max_pos, column, values.idxmax(),
+                        lambda new, old: new > old)
+
+    def _merge(self, positions, column, pos, better):
+        # Keeps the first best row on ties, like idxmin() and idxmax().
+        values = self.dataframe[column]
+        if column not in positions or better(values[pos],
+                                             values[positions[column]]):
+            positions[column] = pos
+
+
+class ResultsIndex:
+    """Incremental index of the progress files of trials.
+
+    Remembers how far each trial's progress.csv has been read, so that
+    update() only parses the rows appended since its last call. The last
+    result and the rows with the min and max of each numeric metric are
+    tracked per trial as the rows come in.
+    """
+
+    def __init__(self):
+        self._trials = {}
+
+    def update(self, paths):
+        """Reads the new results of the trials in paths.
+
+        Args:
+            paths (list): Log directories of the trials.
+
+        Returns:
+            Number of trials whose results couldn't be read.
+        """
+        fail_count = 0
+        for path in paths:
+            try:
+                self._update_trial(path)
+            except Exception:
+                fail_count += 1
+        return fail_count
+
+    def dataframe(self, path):
+        """Returns all results of a trial, or None if none were read."""
+        trial = self._trials.get(path)
+        return trial.dataframe if trial else None
+
+    def last_result(self, path):
+        """Returns the last result of a trial as a dict, or None."""
+        trial = self._trials.get(path)
+        if not trial or trial.last_result is None:
+            return None
+        return dict(trial.last_result)
+
+    def best_result(self, path, metric, mode):
+        """Returns the result of a trial with the best value of metric.
+
+        Args:
+            path (str): Log directory of the trial.
+            metric (str): Numeric key of the results to order on.
+            mode (str): One of [min, max].
+        """
+        trial = self._trials[path]
+        positions = trial.max_pos if mode == "max" else trial.min_pos
+        return trial.dataframe.iloc[positions[metric]].to_dict()
+
+    def _update_trial(self, path):
+        progress_file = os.path.join(path, EXPR_PROGRESS_FILE)
+        size = os.path.getsize(progress_file)
+        trial = self._trials.get(path)
+        if trial is None or size < trial.offset:
+            # A new trial, or its file was rewritten.
+            trial = _TrialResults()
+        if size == trial.offset:
+            self._trials[path] = trial
+            return
+
+        with open(progress_file, "rb") as f:
+            f.seek(trial.offset)
+            data = f.read(size - trial.offset)
+        # A partially written last line is parsed once it is complete.
+        data = data[:data.rfind(b"\n") + 1]
+        if not data:
+            return
+        offset = trial.offset + len(data)
+        header = trial.header
+        if header is None:
+            header, data = data.split(b"\n", 1)
+            header += b"\n"
+        new_rows = pd.read_csv(io.BytesIO(header + data))
+
+        trial.header = header
+        trial.offset = offset
+        trial.append(new_rows)
+        self._trials[path] = trial
@@ -0,0 +1,86 @@
+"""Benchmark of the TrialRunner experiment checkpoint for many trials.
+
+Adds the given numbers of trials to a TrialRunner, then repeatedly updates
+the results of a few of them and times runner.checkpoint(), which only
+appends the changed trials to the experiment journal. For comparison, it
+also times forced checkpoints, which write a snapshot of all trials like
+every checkpoint did before journaling. No trials are actually run.
+
+Run with:
+    python checkpoint_benchmark.py --num-trials=1000,10000
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from ray.tune import Trainable, register_trainable
+from ray.tune.trial import Trial
+from ray.tune.trial_runner import TrialRunner
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num-trials", type=str, default="1000,10000")
+parser.add_argument("--updates-per-checkpoint", type=int, default=10)
+parser.add_argument("--num-checkpoints", type=int, default=200)
+parser.add_argument("--num-snapshots", type=int, default=5)
+
+
+class NoopTrainable(Trainable):
+    def _train(self):
+        return {}
+
+
+def benchmark(num_trials, args):
+    checkpoint_dir = tempfile.mkdtemp()
+    runner = TrialRunner(
+        local_checkpoint_dir=checkpoint_dir, checkpoint_period=0)
+    trials = []
+    for i in range(num_trials):
+        trial = Trial("noop", config={"lr": 0.01, "seed": i})
+        runner.add_trial(trial)
+        trials.append(trial)
+    runner.checkpoint(force=True)
+
+    incremental_times = []
+    for i in range(args.num_checkpoints):
+        for trial in random.sample(trials, args.updates_per_checkpoint):
+            trial.last_result = {
+                "training_iteration": i,
+                "loss": 1.0 / (i + 1),
+            }
+            runner.trial_executor.try_checkpoint_metadata(trial)
+        start = time.time()
+        runner.checkpoint()
+        incremental_times.append(time.time() - start)
+
+    snapshot_times = []
+    for _ in range(args.num_snapshots):
+        start = time.time()
+        runner.checkpoint(force=True)
+        snapshot_times.append(time.time() - start)
+
+    start = time.time()
+    TrialRunner(resume="LOCAL", local_checkpoint_dir=checkpoint_dir)
+    resume_time = time.time() - start
+    shutil.rmtree(checkpoint_dir)
+    return (sum(incremental_times) / len(incremental_times),
+            max(incremental_times),
+            sum(snapshot_times) / len(snapshot_times), resume_time)
+
+
+def main(args):
+    register_trainable("noop", NoopTrainable)
+    for num_trials in [int(n) for n in args.num_trials.split(",")]:
+        incremental, incremental_max, snapshot, resume = benchmark(
+            num_trials, args)
+        print("{} trials: {:.2f}ms per checkpoint (max {:.2f}ms, including "
+              "compactions), {:.2f}ms per full snapshot, {:.2f}s to "
+              "resume".format(num_trials, incremental * 1000,
+                              incremental_max * 1000, snapshot * 1000,
+                              resume))
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
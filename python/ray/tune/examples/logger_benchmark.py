@@ -0,0 +1,75 @@
+"""Benchmark of the result loggers of many concurrent trials.
+
+Drives one UnifiedLogger per trial with the default JSON and CSV loggers at
+a target total rate of results per second, and reports the achieved rate.
+Set TUNE_RESULT_BUFFER_LENGTH (and TUNE_RESULT_BUFFER_MAX_TIME_S) to compare
+buffered logging with writing and flushing every result.
+
+Run with:
+    python logger_benchmark.py --results-per-s=10000
+    TUNE_RESULT_BUFFER_LENGTH=100 python logger_benchmark.py \\
+        --results-per-s=10000
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from ray.tune.logger import CSVLogger, JsonLogger, UnifiedLogger, \
+    RESULT_BUFFER_LENGTH
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num-trials", type=int, default=1000)
+parser.add_argument("--results-per-s", type=int, default=10000)
+parser.add_argument("--duration-s", type=float, default=10.0)
+
+
+def make_result(i):
+    return {
+        "training_iteration": i,
+        "episode_reward_mean": i * 0.5,
+        "time_total_s": time.time(),
+        "info": {
+            "loss": 1.0 / (i + 1),
+            "grad_norm": 2.0,
+        },
+        "config": {
+            "lr": 0.01,
+        },
+    }
+
+
+def main(args):
+    local_dir = tempfile.mkdtemp()
+    loggers = [
+        UnifiedLogger({},
+                      tempfile.mkdtemp(dir=local_dir),
+                      loggers=[JsonLogger, CSVLogger])
+        for _ in range(args.num_trials)
+    ]
+    interval = 1.0 / args.results_per_s
+    count = 0
+    start = time.time()
+    while time.time() - start < args.duration_s:
+        loggers[count % len(loggers)].on_result(make_result(count))
+        count += 1
+        # Paces the results to the target rate.
+        delay = start + count * interval - time.time()
+        if delay > 0:
+            time.sleep(delay)
+    log_time = time.time() - start
+    for result_logger in loggers:
+        result_logger.flush(sync_down=False)
+        result_logger.close()
+    close_time = time.time() - start - log_time
+    shutil.rmtree(local_dir)
+
+    print("{} trials, buffer length {}: {:.0f} results/s (target {}), "
+          "{:.2f}s to flush and close".format(
+              args.num_trials, RESULT_BUFFER_LENGTH, count / log_time,
+              args.results_per_s, close_time))
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
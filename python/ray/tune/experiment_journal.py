@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE_TMPL = "experiment_journal-{}-{}.jsonl"
+# The journal is compacted once it holds at least as many trial records as
+# the snapshot, but not before it holds this many. An entry without trial
+# records counts as one, since it still carries the runner state.
+MIN_RECORDS_BEFORE_COMPACTION = 100
+
+
+def load_experiment_state(checkpoint_path, cls=None):
+    """Loads an experiment checkpoint and replays its journal on top of it.
+
+    Args:
+        checkpoint_path (str): Path to the experiment_state json file.
+        cls (json.JSONDecoder): Decoder to load the checkpoint with.
+
+    Returns:
+        The experiment state, with one entry per trial in "checkpoints" and
+        the "runner_data" and "stats" of the last journal entry. "journal"
+        names the replayed journal, if any.
+    """
+    with open(checkpoint_path, "r") as f:
+        state = json.load(f, cls=cls)
+    journal = state.get("journal")
+    if not journal:
+        return state
+    journal_path = os.path.join(os.path.dirname(checkpoint_path), journal)
+    if not os.path.exists(journal_path):
+        return state
+
+    checkpoints = OrderedDict(
+        (trial_state["trial_id"], trial_state)
+        for trial_state in state["checkpoints"])
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line, cls=cls)
+            except ValueError:
+                # The last entry may have been written partially.
+                logger.warning("Ignoring invalid entry of %s.", journal_path)
+                break
+            for trial_state in entry["checkpoints"]:
+                checkpoints[trial_state["trial_id"]] = trial_state
+            state["runner_data"] = entry["runner_data"]
+            state["stats"] = entry["stats"]
+    state["checkpoints"] = list(checkpoints.values())
+    return state
+
+
+class ExperimentJournal:
+    """Append-only journal of the changes to an experiment checkpoint.
+
+    Instead of rewriting the metadata of all trials on every checkpoint,
+    only the trials that changed since the previous checkpoint are appended
+    to the journal. The journal is periodically compacted into a snapshot,
+    which has the same format as before journaling and names the journal to
+    replay on top of it (see load_experiment_state).
+
+    Every compaction starts a new journal file, so that a snapshot is never
+    combined with entries older than itself.
+
+    Args:
+        checkpoint_dir (str): Directory of the experiment checkpoint.
+        session_str (str): Identifier of the session writing the journal.
+        encoder_cls (json.JSONEncoder): Encoder to write entries with.
+        resumed_journal (str): Name of the journal of the resumed experiment
+            checkpoint, if any. It is removed by the first compaction.
+    """
+
+    def __init__(self,
+                 checkpoint_dir,
+                 session_str,
+                 encoder_cls=None,
+                 resumed_journal=None):
+        self._checkpoint_dir = checkpoint_dir
+        self._session_str = session_str
+        self._encoder_cls = encoder_cls
+        self._generation = 0
+        self._journal_path = None
+        self._resumed_journal_path = None
+        if resumed_journal:
+            self._resumed_journal_path = os.path.join(checkpoint_dir,
+                                                      resumed_journal)
+        self._file = None
+        self._num_snapshot_records = 0
+        self._num_journal_records = 0
+
+    def should_compact(self):
+        """Returns whether the next checkpoint should be a snapshot."""
+        if self._journal_path is None:
+            return True
+        return self._num_journal_records >= max(
+            self._num_snapshot_records, MIN_RECORDS_BEFORE_COMPACTION)
+
+    def append(self, checkpoints, runner_data, stats):
+        """Appends the changed trial metadata to the journal.
+
+        Args:
+            checkpoints (list): Metadata of the trials changed since the last
+                call to append() or compact().
+            runner_data (dict): State of the TrialRunner.
+            stats (dict): Experiment statistics.
+        """
+        assert self._journal_path is not None, "Compact first."
+        entry = {
+            "checkpoints": checkpoints,
+            "runner_data": runner_data,
+            "stats": stats,
+        }
+        if self._file is None:
+            self._file = open(self._journal_path, "a")
+        self._file.write(json.dumps(entry, cls=self._encoder_cls) + "\n")
+        self._file.flush()
+        self._num_journal_records += max(1, len(checkpoints))
+
+    def compact(self, checkpoint_path, checkpoints, runner_data, stats):
+        """Writes a snapshot of all trials and starts a new journal.
+
+        Args:
+            checkpoint_path (str): Path of the snapshot.
+            checkpoints (list): Metadata of all trials.
+            runner_data (dict): State of the TrialRunner.
+            stats (dict): Experiment statistics.
+        """
+        self._generation += 1
+        journal = JOURNAL_FILE_TMPL.format(self._session_str,
+                                           self._generation)
+        runner_state = {
+            "checkpoints": checkpoints,
+            "runner_data": runner_data,
+            "stats": stats,
+            "journal": journal,
+        }
+        tmp_file_name = os.path.join(self._checkpoint_dir, ".tmp_checkpoint")
+        with open(tmp_file_name, "w") as f:
+            json.dump(runner_state, f, indent=2, cls=self._encoder_cls)
+        os.rename(tmp_file_name, checkpoint_path)
+
+        # The old journals are only removed once the snapshot replaces them.
+        self.close()
+        journal_path = os.path.join(self._checkpoint_dir, journal)
+        for old_path in [self._journal_path, self._resumed_journal_path]:
+            if (old_path and old_path != journal_path
+                    and os.path.exists(old_path)):
+                os.remove(old_path)
+        self._resumed_journal_path = None
+        self._journal_path = journal_path
+        self._num_snapshot_records = len(checkpoints)
+        self._num_journal_records = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -2,6 +2,8 @@ import csv
 import json
 import logging
 import os
+import threading
+import time
 import yaml
 import numbers
 import numpy as np
@@ -11,7 +13,8 @@ from ray.util.debug import log_once
 from ray.tune.result import (NODE_IP, TRAINING_ITERATION, TIME_TOTAL_S,
                              TIMESTEPS_TOTAL, EXPR_PARAM_FILE,
                              EXPR_PARAM_PICKLE_FILE, EXPR_PROGRESS_FILE,
-                             EXPR_RESULT_FILE)
+                             EXPR_RESULT_FILE, EXPR_RESULT_STORE_DIR,
+                             CONFIG_PREFIX)
 from ray.tune.syncer import get_node_syncer
 from ray.tune.utils import flatten_dict
 
@@ -20,6 +23,13 @@ logger = logging.getLogger(__name__)
 tf = None
 VALID_SUMMARY_TYPES = [int, float, np.float32, np.float64, np.int32]
 
+# Number of results the JSON and CSV loggers may buffer before they are
+# written out, and the max time in seconds results stay buffered. By default,
+# every result is written and flushed right away.
+RESULT_BUFFER_LENGTH = int(os.environ.get("TUNE_RESULT_BUFFER_LENGTH", 1))
+RESULT_BUFFER_MAX_TIME_S = float(
+    os.environ.get("TUNE_RESULT_BUFFER_MAX_TIME_S", 10.0))
+
 
 class Logger:
     """Logging interface for ray.tune.
@@ -100,12 +110,12 @@ class JsonLogger(Logger):
     def _init(self):
         self.update_config(self.config)
         local_file = os.path.join(self.logdir, EXPR_RESULT_FILE)
-        self.local_out = open(local_file, "a")
+        self.local_out = _BufferedFile(local_file)
 
     def on_result(self, result):
         json.dump(result, self, cls=_SafeFallbackEncoder)
         self.write("\n")
-        self.local_out.flush()
+        self.local_out.end_result()
 
     def write(self, b):
         self.local_out.write(b)
@@ -145,22 +155,21 @@ class CSVLogger(Logger):
         """CSV outputted with Headers as first set of results."""
         progress_file = os.path.join(self.logdir, EXPR_PROGRESS_FILE)
         self._continuing = os.path.exists(progress_file)
-        self._file = open(progress_file, "a")
+        self._file = _BufferedFile(progress_file)
         self._csv_out = None
 
     def on_result(self, result):
-        tmp = result.copy()
-        if "config" in tmp:
-            del tmp["config"]
-        result = flatten_dict(tmp, delimiter="/")
+        result = flatten_dict(
+            {k: v
+             for k, v in result.items() if k != "config"},
+            delimiter="/")
         if self._csv_out is None:
-            self._csv_out = csv.DictWriter(self._file, result.keys())
+            self._csv_out = csv.DictWriter(
+                self._file, result.keys(), extrasaction="ignore")
             if not self._continuing:
                 self._csv_out.writeheader()
-        self._csv_out.writerow(
-            {k: v
-             for k, v in result.items() if k in self._csv_out.fieldnames})
-        self._file.flush()
+        self._csv_out.writerow(result)
+        self._file.end_result()
 
     def flush(self):
         self._file.flush()
@@ -169,6 +178,48 @@ class CSVLogger(Logger):
         self._file.close()
 
 
+class ColumnarLogger(Logger):
+    """Logs results to a columnar store shared by the whole experiment.
+
+    The results of all trials are appended to Parquet segments in the
+    result_store directory of the experiment, instead of files per trial.
+    Each result is flattened like in CSVLogger, and also has the flattened
+    config of the trial under `config/` and the `logdir` of the trial.
+    Analysis.dataframe() reads the store, if there is one. Requires pandas
+    and pyarrow.
+    """
+
+    def _init(self):
+        from ray.tune.result_store import ResultStoreWriter
+        self._writer = ResultStoreWriter.acquire(
+            os.path.join(
+                os.path.dirname(self.logdir.rstrip(os.sep)),
+                EXPR_RESULT_STORE_DIR))
+        self._closed = False
+
+    def on_result(self, result):
+        row = flatten_dict(
+            {k: v
+             for k, v in result.items() if k != "config"},
+            delimiter="/")
+        config = flatten_dict(result.get("config", {}), delimiter="/")
+        for k, v in config.items():
+            row[CONFIG_PREFIX + k] = v
+        row["logdir"] = self.logdir
+        self._writer.append(row)
+
+    def flush(self):
+        # Trials are flushed often (e.g. on every checkpoint), so results
+        # are only written once a full or old enough segment is buffered.
+        # The rest is written when the last trial releases the writer.
+        self._writer.flush_if_due()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._writer.release()
+
+
 class TBXLogger(Logger):
     """TensorBoardX Logger.
 
@@ -349,6 +400,130 @@ class UnifiedLogger(Logger):
                 "should not occur.", self.trial, worker_ip)
 
 
+class _BufferedFile:
+    """Log file that buffers results in memory.
+
+    Up to `buffer_length` results are buffered. Full buffers, and buffers
+    older than `max_time_s`, are written by a background thread shared by
+    all buffered files. flush() and close() write the buffer right away.
+
+    Arguments:
+        path (str): Path of the file, which is opened for appending.
+        buffer_length (int): Number of results to buffer. With 1, every
+            result is written and flushed by end_result().
+        max_time_s (float): Max time in seconds a result stays buffered.
+    """
+
+    def __init__(self, path, buffer_length=None, max_time_s=None):
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+        self._pending = []
+        self._num_results = 0
+        self._closed = False
+        self.buffer_length = buffer_length or RESULT_BUFFER_LENGTH
+        if self.buffer_length > 1:
+            _LogWriter.get().add(self, max_time_s or RESULT_BUFFER_MAX_TIME_S)
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+
+    def end_result(self):
+        """Marks the end of a result, written once the buffer is full."""
+        with self._lock:
+            self._num_results += 1
+            full = self._num_results >= self.buffer_length
+        if not full:
+            return
+        if self.buffer_length > 1:
+            _LogWriter.get().request_write(self)
+        else:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._closed:
+                return
+            if self._pending:
+                self._file.write("".join(self._pending))
+                self._pending = []
+            self._num_results = 0
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        if self.buffer_length > 1:
+            _LogWriter.get().remove(self)
+        with self._lock:
+            self._closed = True
+            self._file.close()
+
+
+class _LogWriter(threading.Thread):
+    """Background thread that writes the buffers of all buffered files."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = _LogWriter()
+                cls._instance.start()
+            return cls._instance
+
+    def __init__(self):
+        super(_LogWriter, self).__init__(daemon=True)
+        self._cond = threading.Condition()
+        # Buffered file -> (max time in seconds, time of last write)
+        self._files = {}
+        self._full = set()
+
+    def add(self, buffered_file, max_time_s):
+        with self._cond:
+            self._files[buffered_file] = (max_time_s, time.time())
+            self._cond.notify()
+
+    def remove(self, buffered_file):
+        with self._cond:
+            self._files.pop(buffered_file, None)
+            self._full.discard(buffered_file)
+
+    def request_write(self, buffered_file):
+        with self._cond:
+            self._full.add(buffered_file)
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                now = time.time()
+                timeout = min(
+                    (last + max_time_s - now
+                     for max_time_s, last in self._files.values()),
+                    default=None)
+                if not self._full and (timeout is None or timeout > 0):
+                    self._cond.wait(timeout)
+                now = time.time()
+                to_write = self._full | {
+                    buffered_file
+                    for buffered_file, (max_time_s,
+                                        last) in self._files.items()
+                    if now - last >= max_time_s
+                }
+                self._full = set()
+                for buffered_file in to_write:
+                    if buffered_file in self._files:
+                        self._files[buffered_file] = (
+                            self._files[buffered_file][0], now)
+            for buffered_file in to_write:
+                try:
+                    buffered_file.flush()
+                except Exception:
+                    logger.exception("Error writing buffered results.")
+
+
 class _SafeFallbackEncoder(json.JSONEncoder):
     def __init__(self, nan_str="null", **kwargs):
         super(_SafeFallbackEncoder, self).__init__(**kwargs)
@@ -342,6 +342,9 @@ class RayTrialExecutor(TrialExecutor):
         return None
 
     def get_next_available_trial(self):
+        return self.get_available_trials(max_trials=1)[0][1]
+
+    def get_available_trials(self, max_trials=None):
         shuffled_results = list(self._running.keys())
         random.shuffle(shuffled_results)
         # Note: We shuffle the results because `ray.wait` by default returns
@@ -349,7 +352,15 @@ class RayTrialExecutor(TrialExecutor):
         # trials (i.e. trials that run remotely) also get fairly reported.
         # See https://github.com/ray-project/ray/issues/4211 for details.
         start = time.time()
-        [result_id], _ = ray.wait(shuffled_results)
+        ready = []
+        if max_trials != 1:
+            # Takes all results that are ready, without blocking.
+            ready, _ = ray.wait(
+                shuffled_results,
+                num_returns=len(shuffled_results),
+                timeout=0)
+        if not ready:
+            ready, _ = ray.wait(shuffled_results)
         wait_time = time.time() - start
         if wait_time > NONTRIVIAL_WAIT_TIME_THRESHOLD_S:
             self._last_nontrivial_wait = time.time()
@@ -361,7 +372,11 @@ class RayTrialExecutor(TrialExecutor):
                     BOTTLENECK_WARN_PERIOD_S))
 
             self._last_nontrivial_wait = time.time()
-        return self._running[result_id]
+        return [(result_id, self._running[result_id])
+                for result_id in ready[:max_trials]]
+
+    def is_result_ready(self, result_id, trial):
+        return result_id in self._running
 
     def fetch_result(self, trial):
         """Fetches one result of the running trials.
@@ -90,5 +90,9 @@ EXPR_PROGRESS_FILE = "progress.csv"
 # File that stores results of the trial.
 EXPR_RESULT_FILE = "result.json"
 
+# Directory in the experiment directory that stores the results of all
+# trials of the experiment, if ColumnarLogger is used.
+EXPR_RESULT_STORE_DIR = "result_store"
+
 # Config prefix when using Analysis.
 CONFIG_PREFIX = "config/"
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+SEGMENT_SUFFIX = ".parquet"
+# Segments are put into one directory for each hour they were written in.
+PARTITION_FORMAT = "%Y-%m-%d_%H"
+# A segment is written once this many results are buffered, or the oldest
+# buffered result is this old.
+SEGMENT_ROWS = 1000
+SEGMENT_MAX_AGE_S = 60
+
+
+def _partition_name(timestamp):
+    return time.strftime(PARTITION_FORMAT, time.gmtime(timestamp))
+
+
+def _check_dependencies():
+    if pd is None or pq is None:
+        raise ImportError(
+            "The result store needs pandas and pyarrow. Run "
+            "`pip install pandas pyarrow` to use it.")
+
+
+class ResultStoreWriter:
+    """Appends the results of all trials of an experiment to a result store.
+
+    Results are buffered and written as a new Parquet segment once
+    `segment_rows` results are buffered or the oldest of them is
+    `max_age_s` old, or on flush(). Segments are never modified after they
+    are written.
+
+    The loggers of all trials of an experiment share one writer, see
+    acquire() and release().
+
+    Arguments:
+        store_dir (str): Directory of the result store.
+        segment_rows (int): Number of results to buffer per segment.
+        max_age_s (float): Maximum time to buffer a result for.
+    """
+
+    _writers = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self,
+                 store_dir,
+                 segment_rows=SEGMENT_ROWS,
+                 max_age_s=SEGMENT_MAX_AGE_S):
+        _check_dependencies()
+        self.store_dir = store_dir
+        self.segment_rows = segment_rows
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._rows = []
+        self._first_row_time = None
+        self._num_segments = 0
+        self._num_users = 0
+
+    @classmethod
+    def acquire(cls, store_dir):
+        """Returns the shared writer of a store, creating it if needed."""
+        with cls._writers_lock:
+            writer = cls._writers.get(store_dir)
+            if writer is None:
+                writer = cls._writers[store_dir] = ResultStoreWriter(
+                    store_dir)
+            writer._num_users += 1
+            return writer
+
+    def release(self):
+        """Flushes the writer once it was released by all its users."""
+        with ResultStoreWriter._writers_lock:
+            self._num_users -= 1
+            if self._num_users > 0:
+                return
+            del ResultStoreWriter._writers[self.store_dir]
+        self.flush()
+
+    def append(self, row):
+        """Buffers a result, given as a flat dict."""
+        with self._lock:
+            if not self._rows:
+                self._first_row_time = time.time()
+            self._rows.append(row)
+            due = self._segment_due()
+        if due:
+            self.flush()
+
+    def flush_if_due(self):
+        """Writes a segment if enough results are buffered or old enough."""
+        with self._lock:
+            due = self._segment_due()
+        if due:
+            self.flush()
+
+    def _segment_due(self):
+        if not self._rows:
+            return False
+        return (len(self._rows) >= self.segment_rows or
+                time.time() - self._first_row_time >= self.max_age_s)
+
+    def flush(self):
+        """Writes the buffered results as a new segment."""
+        with self._lock:
+            if not self._rows:
+                return
+            rows, self._rows = self._rows, []
+            now = time.time()
+            partition_dir = os.path.join(self.store_dir, _partition_name(now))
+            os.makedirs(partition_dir, exist_ok=True)
+            name = "{}_{}_{}".format(
+                int(now * 1000), os.getpid(), self._num_segments)
+            self._num_segments += 1
+            table = pa.Table.from_pandas(
+                _to_dataframe(rows), preserve_index=False)
+            # Readers never see a partially written segment.
+            tmp_path = os.path.join(partition_dir, "." + name)
+            pq.write_table(table, tmp_path)
+            os.rename(tmp_path,
+                      os.path.join(partition_dir, name + SEGMENT_SUFFIX))
+
+
+def _to_dataframe(rows):
+    df = pd.DataFrame(rows)
+    # Values without a Parquet type (e.g. lists) are stored as strings, like
+    # the CSV logger does.
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].map(
+            lambda v: v if v is None or isinstance(v, str) else str(v))
+    return df
+
+
+class ResultStore:
+    """Reader of the results in a result store.
+
+    Arguments:
+        store_dir (str): Directory of the result store.
+    """
+
+    def __init__(self, store_dir):
+        _check_dependencies()
+        self.store_dir = store_dir
+
+    def segments(self, since=None):
+        """Returns the paths of the segments, in the order of writing.
+
+        Arguments:
+            since (float): If given, only the segments written since this
+                unix timestamp are returned.
+        """
+        if not os.path.isdir(self.store_dir):
+            return []
+        paths = []
+        for partition in sorted(os.listdir(self.store_dir)):
+            if since is not None and partition < _partition_name(since):
+                continue
+            partition_dir = os.path.join(self.store_dir, partition)
+            if not os.path.isdir(partition_dir):
+                continue
+            names = [
+                name for name in os.listdir(partition_dir)
+                if name.endswith(SEGMENT_SUFFIX)
+            ]
+            for name in sorted(names, key=lambda n: int(n.split("_")[0])):
+                if since is None or int(name.split("_")[0]) >= since * 1000:
+                    paths.append(os.path.join(partition_dir, name))
+        return paths
+
+    def read(self, columns=None, filters=None, since=None):
+        """Reads results into a pandas.DataFrame.
+
+        Only the given columns and the row groups that may match the filters
+        are read from each segment.
+
+        Arguments:
+            columns (list): Columns to read, or None for all of them.
+            filters (list): Conjunction of (column, op, value) tuples, with
+                op one of [==, !=, <, >, <=, >=, in, not in].
+            since (float): If given, only reads the segments written since
+                this unix timestamp.
+        """
+        dataframes = []
+        for segment in self.segments(since):
+            names = set(pq.read_schema(segment).names)
+            if filters and any(f[0] not in names for f in filters):
+                # None of the rows can match.
+                continue
+            segment_columns = None
+            if columns is not None:
+                segment_columns = [c for c in columns if c in names]
+            table = pq.read_table(
+                segment, columns=segment_columns, filters=filters or None)
+            dataframes.append(table.to_pandas())
+        if not dataframes:
+            return pd.DataFrame(columns=columns or [])
+        return pd.concat(dataframes, ignore_index=True, sort=False)
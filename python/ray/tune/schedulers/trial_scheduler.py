@@ -29,6 +29,31 @@ class TrialScheduler:
 
         raise NotImplementedError
 
+    def on_trial_results(self, trial_runner, trials_and_results):
+        """Called with the results of several trials at once.
+
+        The trial runner calls this instead of on_trial_result if the
+        scheduler overrides it, with all results that were ready in one
+        step of the event loop. Decisions are only acted on after this
+        returns.
+
+        Args:
+            trials_and_results (list): (trial, result) tuples.
+
+        Returns:
+            List with a decision for each of the results, in the same order.
+        """
+        return [
+            self.on_trial_result(trial_runner, trial, result)
+            for trial, result in trials_and_results
+        ]
+
+    def handles_batched_results(self):
+        """Returns whether this scheduler overrides on_trial_results."""
+
+        return (type(self).on_trial_results is
+                not TrialScheduler.on_trial_results)
+
     def on_trial_complete(self, trial_runner, trial, result):
         """Notification for the completion of trial.
 
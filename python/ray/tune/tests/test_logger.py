@@ -1,9 +1,11 @@
 from collections import namedtuple
+import os
 import unittest
 import tempfile
 import shutil
+import time
 
-from ray.tune.logger import JsonLogger, CSVLogger, TBXLogger
+from ray.tune.logger import JsonLogger, CSVLogger, TBXLogger, _BufferedFile
 
 Trial = namedtuple("MockTrial", ["evaluated_params", "trial_id"])
 
@@ -54,6 +56,45 @@ class LoggerSuite(unittest.TestCase):
         logger.on_result(result(2, 4, score=[1, 2, 3]))
         logger.close()
 
+    def testBufferedFile(self):
+        path = os.path.join(self.test_dir, "buffered.txt")
+
+        def read():
+            with open(path) as f:
+                return f.read()
+
+        out = _BufferedFile(path, buffer_length=3, max_time_s=60)
+        out.write("a\n")
+        out.end_result()
+        out.write("b\n")
+        out.end_result()
+        self.assertEqual(read(), "")
+        out.flush()
+        self.assertEqual(read(), "a\nb\n")
+        # A full buffer is written by the background thread.
+        for _ in range(3):
+            out.write("c\n")
+            out.end_result()
+        for _ in range(50):
+            if read() == "a\nb\nc\nc\nc\n":
+                break
+            time.sleep(0.1)
+        self.assertEqual(read(), "a\nb\nc\nc\nc\n")
+        out.write("d\n")
+        out.end_result()
+        out.close()
+        self.assertEqual(read(), "a\nb\nc\nc\nc\nd\n")
+
+    def testBufferedFileMaxTime(self):
+        path = os.path.join(self.test_dir, "buffered.txt")
+        out = _BufferedFile(path, buffer_length=100, max_time_s=0.1)
+        out.write("a\n")
+        out.end_result()
+        time.sleep(1.0)
+        with open(path) as f:
+            self.assertEqual(f.read(), "a\n")
+        out.close()
+
 
 if __name__ == "__main__":
     import pytest
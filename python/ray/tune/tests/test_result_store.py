@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ray.tune import Analysis
+from ray.tune.logger import ColumnarLogger
+from ray.tune.result import EXPR_RESULT_STORE_DIR
+from ray.tune.result_store import ResultStore
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.experiment_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.experiment_dir, ignore_errors=True)
+
+    def log_trials(self, scores):
+        loggers = []
+        for i, trial_scores in enumerate(scores):
+            logdir = os.path.join(self.experiment_dir, "trial_{}".format(i))
+            os.makedirs(logdir)
+            config = {"id": i, "nested": {"lr": 0.1 * i}}
+            loggers.append(ColumnarLogger(config, logdir))
+        for iteration in range(len(scores[0])):
+            for i, result_logger in enumerate(loggers):
+                result_logger.on_result({
+                    "training_iteration": iteration + 1,
+                    "score": scores[i][iteration],
+                    "info": {
+                        "hist": [1, 2]
+                    },
+                    "config": result_logger.config,
+                })
+        for result_logger in loggers:
+            result_logger.close()
+
+    def testRead(self):
+        self.log_trials([[5, 0, 3], [4, 8, 1]])
+        store = ResultStore(
+            os.path.join(self.experiment_dir, EXPR_RESULT_STORE_DIR))
+        self.assertEqual(len(store.segments()), 1)
+        df = store.read()
+        self.assertEqual(len(df), 6)
+        self.assertEqual(df["info/hist"][0], "[1, 2]")
+        self.assertEqual(list(df["config/nested/lr"][:2]), [0.0, 0.1])
+
+        df = store.read(
+            columns=["score", "missing"],
+            filters=[("training_iteration", ">", 1)])
+        self.assertEqual(list(df.columns), ["score"])
+        self.assertEqual(sorted(df["score"]), [0, 1, 3, 8])
+        self.assertEqual(len(store.read(filters=[("missing", "==", 1)])), 0)
+
+    def testFlushBounded(self):
+        loggers = []
+        for i in range(20):
+            logdir = os.path.join(self.experiment_dir, "trial_{}".format(i))
+            os.makedirs(logdir)
+            loggers.append(ColumnarLogger({"id": i}, logdir))
+        for iteration in range(10):
+            for result_logger in loggers:
+                result_logger.on_result({"training_iteration": iteration})
+                # E.g. a trial checkpoint.
+                result_logger.flush()
+        store = ResultStore(
+            os.path.join(self.experiment_dir, EXPR_RESULT_STORE_DIR))
+        self.assertEqual(len(store.segments()), 0)
+        for result_logger in loggers:
+            result_logger.close()
+        self.assertEqual(len(store.segments()), 1)
+        self.assertEqual(len(store.read()), 200)
+
+    def testAnalysis(self):
+        self.log_trials([[5, 0, 3], [4, 8, 1]])
+        analysis = Analysis(self.experiment_dir)
+
+        df = analysis.dataframe()
+        self.assertEqual(list(df["score"]), [3, 1])
+        self.assertEqual(list(df["config/id"]), [0, 1])
+
+        df = analysis.dataframe(metric="score", mode="max")
+        self.assertEqual(list(df["score"]), [5, 8])
+        self.assertEqual(
+            analysis.get_best_logdir("score", mode="min"),
+            os.path.join(self.experiment_dir, "trial_0"))
+
+        df = analysis.dataframe(
+            metric="score",
+            mode="max",
+            columns=["score"],
+            filters=[("training_iteration", "!=", 2)])
+        self.assertEqual(sorted(df.columns), ["logdir", "score"])
+        self.assertEqual(list(df["score"]), [5, 4])
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ray.tune.analysis.results_index import ResultsIndex
+from ray.tune.result import EXPR_PROGRESS_FILE
+
+
+class ResultsIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.trial_dir = tempfile.mkdtemp()
+        self.progress_file = os.path.join(self.trial_dir, EXPR_PROGRESS_FILE)
+
+    def tearDown(self):
+        shutil.rmtree(self.trial_dir, ignore_errors=True)
+
+    def write(self, text, mode="a"):
+        with open(self.progress_file, mode) as f:
+            f.write(text)
+
+    def testIncrementalRows(self):
+        index = ResultsIndex()
+        self.write("training_iteration,score\n1,5.0\n2,3.0\n", mode="w")
+        self.assertEqual(index.update([self.trial_dir]), 0)
+        self.assertEqual(len(index.dataframe(self.trial_dir)), 2)
+        self.assertEqual(index.last_result(self.trial_dir)["score"], 3.0)
+
+        # A partially written row is only read once it is complete.
+        self.write("3,9.0\n4,")
+        index.update([self.trial_dir])
+        df = index.dataframe(self.trial_dir)
+        self.assertEqual(list(df["score"]), [5.0, 3.0, 9.0])
+        self.write("1.0\n")
+        index.update([self.trial_dir])
+        df = index.dataframe(self.trial_dir)
+        self.assertEqual(list(df["training_iteration"]), [1, 2, 3, 4])
+        self.assertEqual(list(df.index), [0, 1, 2, 3])
+
+        best = index.best_result(self.trial_dir, "score", "max")
+        self.assertEqual(best["training_iteration"], 3)
+        best = index.best_result(self.trial_dir, "score", "min")
+        self.assertEqual(best["training_iteration"], 4)
+        self.assertEqual(index.last_result(self.trial_dir)["score"], 1.0)
+
+    def testRewrittenFile(self):
+        index = ResultsIndex()
+        self.write("score\n1\n2\n3\n", mode="w")
+        index.update([self.trial_dir])
+        self.write("score\n7\n", mode="w")
+        index.update([self.trial_dir])
+        self.assertEqual(list(index.dataframe(self.trial_dir)["score"]), [7])
+
+    def testMissingFile(self):
+        index = ResultsIndex()
+        missing = os.path.join(self.trial_dir, "missing")
+        self.assertEqual(index.update([missing]), 1)
+        self.assertIsNone(index.dataframe(missing))
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
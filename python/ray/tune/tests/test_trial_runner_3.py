@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import sys
@@ -10,6 +11,7 @@ from ray.rllib import _register_all
 from ray.tune import TuneError
 from ray.tune.schedulers import TrialScheduler, FIFOScheduler
 from ray.tune.experiment import Experiment
+from ray.tune.experiment_journal import MIN_RECORDS_BEFORE_COMPACTION
 from ray.tune.trial import Trial
 from ray.tune.trial_runner import TrialRunner
 from ray.tune.resources import Resources, json_to_resources, resources_to_json
@@ -185,6 +187,32 @@ class TrialRunnerTest3(unittest.TestCase):
         runner.step()
         self.assertEqual(len(searcher.final_results), 0)
 
+    def testBatchedResults(self):
+        class _BatchScheduler(FIFOScheduler):
+            def __init__(self):
+                self.batch_sizes = []
+
+            def on_trial_results(self, trial_runner, trials_and_results):
+                self.batch_sizes.append(len(trials_and_results))
+                return [TrialScheduler.CONTINUE] * len(trials_and_results)
+
+        ray.init(num_cpus=4)
+        scheduler = _BatchScheduler()
+        runner = TrialRunner(scheduler=scheduler, max_results_per_step=None)
+        kwargs = {"stopping_criterion": {"training_iteration": 3}}
+        trials = [Trial("__fake", **kwargs) for _ in range(4)]
+        for t in trials:
+            runner.add_trial(t)
+        while not runner.is_finished():
+            runner.step()
+        for t in trials:
+            self.assertEqual(t.status, Trial.TERMINATED)
+            self.assertEqual(t.last_result["training_iteration"], 3)
+        # The last result of each trial stops it without a scheduler call.
+        self.assertEqual(sum(scheduler.batch_sizes), 8)
+        self.assertTrue(any(size > 1 for size in scheduler.batch_sizes))
+        self.assertIn("Event loop:", runner.debug_string())
+
     def testSearchAlgStalled(self):
         """Checks that runner and searcher state is maintained when stalled."""
         ray.init(num_cpus=4, num_gpus=2)
@@ -441,6 +469,67 @@ class TrialRunnerTest3(unittest.TestCase):
         self.assertEquals(count_checkpoints(tmpdir), 2)
         shutil.rmtree(tmpdir)
 
+    def testCheckpointJournal(self):
+        ray.init()
+        tmpdir = tempfile.mkdtemp()
+        runner = TrialRunner(local_checkpoint_dir=tmpdir, checkpoint_period=0)
+        for i in range(3):
+            runner.add_trial(Trial("__fake", trial_id=str(i)))
+        runner.checkpoint()
+        with open(runner.checkpoint_file) as f:
+            snapshot = f.read()
+        journal = json.loads(snapshot)["journal"]
+
+        trial = runner.get_trial("1")
+        trial.last_result = {"training_iteration": 3}
+        runner.trial_executor.try_checkpoint_metadata(trial)
+        runner.checkpoint()
+        runner.checkpoint()
+        with open(runner.checkpoint_file) as f:
+            self.assertEqual(f.read(), snapshot)
+        with open(os.path.join(tmpdir, journal)) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([len(e["checkpoints"]) for e in entries], [1, 0])
+
+        runner2 = TrialRunner(resume="LOCAL", local_checkpoint_dir=tmpdir)
+        self.assertEqual(len(runner2.get_trials()), 3)
+        self.assertEqual(
+            runner2.get_trial("1").last_result, {"training_iteration": 3})
+
+        runner.checkpoint(force=True)
+        self.assertFalse(os.path.exists(os.path.join(tmpdir, journal)))
+        trial.last_result = {"training_iteration": 4}
+        runner.trial_executor.try_checkpoint_metadata(trial)
+        runner.checkpoint()
+        with open(runner.checkpoint_file) as f:
+            journal = json.load(f)["journal"]
+        self.assertTrue(os.path.exists(os.path.join(tmpdir, journal)))
+
+        runner3 = TrialRunner(resume="LOCAL", local_checkpoint_dir=tmpdir)
+        self.assertEqual(
+            runner3.get_trial("1").last_result, {"training_iteration": 4})
+        # The first snapshot of the resumed experiment replaces the journal.
+        runner3.checkpoint()
+        self.assertFalse(os.path.exists(os.path.join(tmpdir, journal)))
+        shutil.rmtree(tmpdir)
+
+    def testCheckpointJournalBounded(self):
+        ray.init()
+        tmpdir = tempfile.mkdtemp()
+        runner = TrialRunner(local_checkpoint_dir=tmpdir, checkpoint_period=0)
+        runner.add_trial(Trial("__fake"))
+        # Checkpoints without any changed trial still compact the journal.
+        for _ in range(3 * MIN_RECORDS_BEFORE_COMPACTION):
+            runner.checkpoint()
+        with open(runner.checkpoint_file) as f:
+            journal = json.load(f)["journal"]
+        num_entries = 0
+        if os.path.exists(os.path.join(tmpdir, journal)):
+            with open(os.path.join(tmpdir, journal)) as f:
+                num_entries = len(f.readlines())
+        self.assertLess(num_entries, MIN_RECORDS_BEFORE_COMPACTION)
+        shutil.rmtree(tmpdir)
+
     def testUserCheckpoint(self):
         ray.init(num_cpus=3)
         tmpdir = tempfile.mkdtemp()
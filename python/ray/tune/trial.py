@@ -369,6 +369,10 @@ class Trial:
         if checkpoint.storage == Checkpoint.MEMORY:
             self.checkpoint_manager.on_checkpoint(checkpoint)
             return
+        if self.result_logger:
+            # Buffered results are written, so that they match the
+            # checkpoint.
+            self.result_logger.flush(sync_down=False)
         if self.sync_on_checkpoint:
             try:
                 # Wait for any other syncs to finish. We need to sync again
@@ -23,6 +23,7 @@ class TrialExecutor:
         """
         self._queue_trials = queue_trials
         self._cached_trial_state = {}
+        self._updated_trial_ids = set()
 
     def set_status(self, trial, status):
         """Sets status and checkpoints metadata if needed.
@@ -57,6 +58,7 @@ class TrialExecutor:
         try:
             logger.debug("Trial %s: Saving trial metadata.", trial)
             self._cached_trial_state[trial.trial_id] = trial.__getstate__()
+            self._updated_trial_ids.add(trial.trial_id)
         except Exception:
             logger.exception("Trial %s: Error checkpointing trial metadata.",
                              trial)
@@ -65,6 +67,20 @@ class TrialExecutor:
         """Returns a copy of mapping of the trial ID to pickled metadata."""
         return self._cached_trial_state.copy()
 
+    def pop_updated_checkpoints(self):
+        """Returns the metadata checkpointed since the last call.
+
+        Returns:
+            Mapping of the trial ID to pickled metadata, only for the trials
+            whose metadata was checkpointed since the last call.
+        """
+        updated = {
+            trial_id: self._cached_trial_state[trial_id]
+            for trial_id in self._updated_trial_ids
+        }
+        self._updated_trial_ids = set()
+        return updated
+
     def has_resources(self, resources):
         """Returns whether this runner has at least the specified resources."""
         raise NotImplementedError("Subclasses of TrialExecutor must provide "
@@ -110,6 +126,9 @@ class TrialExecutor:
         try:
             self.save(trial, Checkpoint.MEMORY)
             self.stop_trial(trial, stop_logger=False)
+            if trial.result_logger:
+                # Paused trials may not report results for a long time.
+                trial.result_logger.flush(sync_down=False)
             self.set_status(trial, Trial.PAUSED)
         except Exception:
             logger.exception("Error pausing runner.")
@@ -182,6 +201,32 @@ class TrialExecutor:
         """
         raise NotImplementedError
 
+    def get_available_trials(self, max_trials=None):
+        """Blocking call that waits until at least one result is ready.
+
+        Args:
+            max_trials (int): Maximum number of trials to return. If None,
+                returns all trials whose results are ready.
+
+        Returns:
+            List of (result_id, Trial) pairs of the results that are ready
+                for intermediate processing.
+        """
+        return [(None, self.get_next_available_trial())]
+
+    def is_result_ready(self, result_id, trial):
+        """Returns whether a result from get_available_trials() is current.
+
+        A result is dropped if its trial was stopped, paused or restarted
+        after get_available_trials() returned it. Fetching the trial's
+        result would then wait for a new training run instead.
+
+        Args:
+            result_id: Id of the result returned by get_available_trials().
+            trial (Trial): Trial of the result.
+        """
+        return trial.status == Trial.RUNNING
+
     def get_next_failed_trial(self):
         """Non-blocking call that detects and returns one failed trial.
 
@@ -1,4 +1,6 @@
 import click
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 import json
 import logging
@@ -9,6 +11,8 @@ import types
 
 import ray.cloudpickle as cloudpickle
 from ray.tune import TuneError
+from ray.tune.experiment_journal import (ExperimentJournal,
+                                         load_experiment_state)
 from ray.tune.stopper import NoopStopper
 from ray.tune.progress_reporter import trial_progress_str
 from ray.tune.ray_trial_executor import RayTrialExecutor
@@ -104,7 +108,8 @@ class TrialRunner:
                  server_port=TuneServer.DEFAULT_PORT,
                  verbose=True,
                  checkpoint_period=10,
-                 trial_executor=None):
+                 trial_executor=None,
+                 max_results_per_step=1):
         """Initializes a new TrialRunner.
 
         Args:
@@ -127,6 +132,9 @@ class TrialRunner:
             checkpoint_period (int): Trial runner checkpoint periodicity in
                 seconds. Defaults to 10.
             trial_executor (TrialExecutor): Defaults to RayTrialExecutor.
+            max_results_per_step (int|None): Maximum number of ready trial
+                results processed in one step(). None processes all results
+                that are ready. Defaults to 1.
         """
         self._search_alg = search_alg or BasicVariantGenerator()
         self._scheduler_alg = scheduler or FIFOScheduler()
@@ -139,6 +147,10 @@ class TrialRunner:
         self._total_time = 0
         self._iteration = 0
         self._verbose = verbose
+        self._max_results_per_step = max_results_per_step
+        # Seconds spent in each phase of step(), for debug_string().
+        self._phase_times = defaultdict(float)
+        self._num_results = 0
 
         self._server = None
         self._server_port = server_port
@@ -158,6 +170,7 @@ class TrialRunner:
                                         remote_checkpoint_dir, sync_to_cloud)
         self._stopper = stopper or NoopStopper()
         self._resumed = False
+        self._resumed_journal = None
 
         if self._validate_resume(resume_type=resume):
             try:
@@ -176,10 +189,16 @@ class TrialRunner:
         self._session_str = datetime.fromtimestamp(
             self._start_time).strftime("%Y-%m-%d_%H-%M-%S")
         self.checkpoint_file = None
+        self._journal = None
         if self._local_checkpoint_dir:
             self.checkpoint_file = os.path.join(
                 self._local_checkpoint_dir,
                 TrialRunner.CKPT_FILE_TMPL.format(self._session_str))
+            self._journal = ExperimentJournal(
+                self._local_checkpoint_dir,
+                self._session_str,
+                encoder_cls=_TuneFunctionEncoder,
+                resumed_journal=self._resumed_journal)
 
     @property
     def scheduler_alg(self):
@@ -244,11 +263,14 @@ class TrialRunner:
     def checkpoint(self, force=False):
         """Saves execution state to `self._local_checkpoint_dir`.
 
-        Overwrites the current session checkpoint, which starts when self
-        is instantiated. Throttle depends on self._checkpoint_period.
+        Appends the trials whose metadata changed since the last checkpoint
+        to the journal of the current session, which starts when self is
+        instantiated. Once the journal grows as large as the full state, the
+        current session checkpoint is overwritten with a snapshot and a new
+        journal is started. Throttle depends on self._checkpoint_period.
 
         Args:
-            force (bool): Forces a checkpoint despite checkpoint_period.
+            force (bool): Forces a snapshot despite checkpoint_period.
         """
         if not self._local_checkpoint_dir:
             return
@@ -257,21 +279,23 @@ class TrialRunner:
                 not force):
             return
         self._last_checkpoint_time = now
-        runner_state = {
-            "checkpoints": list(
-                self.trial_executor.get_checkpoints().values()),
-            "runner_data": self.__getstate__(),
-            "stats": {
-                "start_time": self._start_time,
-                "timestamp": self._last_checkpoint_time
-            }
+        # Trials checkpointed since the last call, which are all that needs
+        # to be appended to the journal.
+        updated_checkpoints = self.trial_executor.pop_updated_checkpoints()
+        runner_data = self.__getstate__()
+        stats = {
+            "start_time": self._start_time,
+            "timestamp": self._last_checkpoint_time
         }
-        tmp_file_name = os.path.join(self._local_checkpoint_dir,
-                                     ".tmp_checkpoint")
-        with open(tmp_file_name, "w") as f:
-            json.dump(runner_state, f, indent=2, cls=_TuneFunctionEncoder)
+        if force or self._journal.should_compact():
+            self._journal.compact(
+                self.checkpoint_file,
+                list(self.trial_executor.get_checkpoints().values()),
+                runner_data, stats)
+        else:
+            self._journal.append(
+                list(updated_checkpoints.values()), runner_data, stats)
 
-        os.rename(tmp_file_name, self.checkpoint_file)
         if force:
             self._syncer.sync_up()
         else:
@@ -285,9 +309,9 @@ class TrialRunner:
         all ongoing trials.
         """
         newest_ckpt_path = _find_newest_ckpt(self._local_checkpoint_dir)
-        with open(newest_ckpt_path, "r") as f:
-            runner_state = json.load(f, cls=_TuneFunctionDecoder)
-            self.checkpoint_file = newest_ckpt_path
+        runner_state = load_experiment_state(
+            newest_ckpt_path, cls=_TuneFunctionDecoder)
+        self.checkpoint_file = newest_ckpt_path
 
         logger.warning("".join([
             "Attempting to resume experiment from {}. ".format(
@@ -306,6 +330,8 @@ class TrialRunner:
         for trial in sorted(
                 trials, key=lambda t: t.last_update_time, reverse=True):
             self.add_trial(trial)
+        # Replaced by the first snapshot of this session.
+        self._resumed_journal = runner_state.get("journal")
 
     def is_finished(self):
         """Returns whether all trials have finished running."""
@@ -325,11 +351,12 @@ class TrialRunner:
         """
         if self.is_finished():
             raise TuneError("Called step when all trials finished?")
-        with warn_if_slow("on_step_begin"):
+        with self._timed("on_step_begin"), warn_if_slow("on_step_begin"):
             self.trial_executor.on_step_begin(self)
-        next_trial = self._get_next_trial()  # blocking
+        with self._timed("choose_trial"):
+            next_trial = self._get_next_trial()  # blocking
         if next_trial is not None:
-            with warn_if_slow("start_trial"):
+            with self._timed("start_trial"), warn_if_slow("start_trial"):
                 self.trial_executor.start_trial(next_trial)
         elif self.trial_executor.get_running_trials():
             self._process_events()  # blocking
@@ -339,21 +366,31 @@ class TrialRunner:
         self._stop_experiment_if_needed()
 
         try:
-            with warn_if_slow("experiment_checkpoint"):
+            with self._timed("checkpoint"), warn_if_slow(
+                    "experiment_checkpoint"):
                 self.checkpoint()
         except Exception:
             logger.exception("Trial Runner checkpointing failed.")
         self._iteration += 1
 
         if self._server:
-            with warn_if_slow("server"):
+            with self._timed("server"), warn_if_slow("server"):
                 self._process_requests()
 
             if self.is_finished():
                 self._server.shutdown()
-        with warn_if_slow("on_step_end"):
+        with self._timed("on_step_end"), warn_if_slow("on_step_end"):
             self.trial_executor.on_step_end(self)
 
+    @contextmanager
+    def _timed(self, phase):
+        """Adds the time spent in the block to the phase of step()."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._phase_times[phase] += time.time() - start
+
     def get_trial(self, tid):
         trial = [t for t in self._trials if t.trial_id == tid]
         return trial[0] if trial else None
@@ -383,9 +420,20 @@ class TrialRunner:
         messages = [
             self._scheduler_alg.debug_string(),
             self.trial_executor.debug_string(),
+            self._event_loop_string(),
             trial_progress_str(self.get_trials()),
         ]
-        return delim.join(messages)
+        return delim.join(m for m in messages if m)
+
+    def _event_loop_string(self):
+        if not self._phase_times:
+            return ""
+        phases = ", ".join(
+            "{} {:.2f}".format(phase, seconds)
+            for phase, seconds in sorted(
+                self._phase_times.items(), key=lambda x: -x[1]))
+        return ("Event loop: {} steps, {} results. Seconds per phase: "
+                "{}".format(self._iteration, self._num_results, phases))
 
     def has_resources(self, resources):
         """Returns whether this runner has at least the specified resources."""
@@ -420,28 +468,45 @@ class TrialRunner:
             logger.info(error_msg)
             with warn_if_slow("process_failed_trial"):
                 self._process_trial_failure(failed_trial, error_msg=error_msg)
-        else:
-            # TODO(ujvl): Consider combining get_next_available_trial and
-            #  fetch_result functionality so that we don't timeout on fetch.
-            trial = self.trial_executor.get_next_available_trial()  # blocking
-            if trial.is_restoring:
-                with warn_if_slow("process_trial_restore"):
-                    self._process_trial_restore(trial)
-            elif trial.is_saving:
-                with warn_if_slow("process_trial_save") as profile:
-                    self._process_trial_save(trial)
-                if profile.too_slow and trial.sync_on_checkpoint:
-                    # TODO(ujvl): Suggest using DurableTrainable once
-                    #  API has converged.
-                    logger.warning(
-                        "Consider turning off forced head-worker trial "
-                        "checkpoint syncs by setting sync_on_checkpoint=False"
-                        ". Note that this may result in faulty trial "
-                        "restoration if a failure occurs while the checkpoint "
-                        "is being synced from the worker to the head node.")
-            else:
-                with warn_if_slow("process_trial"):
-                    self._process_trial(trial)
+            return
+
+        # TODO(ujvl): Consider combining get_available_trials and
+        #  fetch_result functionality so that we don't timeout on fetch.
+        with self._timed("wait"):
+            ready = self.trial_executor.get_available_trials(
+                max_trials=self._max_results_per_step)  # blocking
+        self._num_results += len(ready)
+        batch = []
+        with self._timed("process"):
+            for result_id, trial in ready:
+                if not self.trial_executor.is_result_ready(result_id, trial):
+                    # Stopped, paused or restarted while processing an
+                    # earlier trial.
+                    continue
+                if trial.is_restoring:
+                    with warn_if_slow("process_trial_restore"):
+                        self._process_trial_restore(trial)
+                elif trial.is_saving:
+                    with warn_if_slow("process_trial_save") as profile:
+                        self._process_trial_save(trial)
+                    if profile.too_slow and trial.sync_on_checkpoint:
+                        # TODO(ujvl): Suggest using DurableTrainable once
+                        #  API has converged.
+                        logger.warning(
+                            "Consider turning off forced head-worker trial "
+                            "checkpoint syncs by setting "
+                            "sync_on_checkpoint=False. Note that this may "
+                            "result in faulty trial restoration if a failure "
+                            "occurs while the checkpoint is being synced "
+                            "from the worker to the head node.")
+                elif self._scheduler_alg.handles_batched_results():
+                    batch.append(trial)
+                else:
+                    with warn_if_slow("process_trial"):
+                        self._process_trial(trial)
+            if batch:
+                with warn_if_slow("process_trial_results"):
+                    self._process_trial_results(batch)
 
     def _process_trial(self, trial):
         """Processes a trial result.
@@ -456,63 +521,135 @@ class TrialRunner:
             trial (Trial): Trial with a result ready to be processed.
         """
         try:
-            result = self.trial_executor.fetch_result(trial)
-
-            is_duplicate = RESULT_DUPLICATE in result
-            # TrialScheduler and SearchAlgorithm still receive a
-            # notification because there may be special handling for
-            # the `on_trial_complete` hook.
-            if is_duplicate:
-                logger.debug("Trial finished without logging 'done'.")
-                result = trial.last_result
-                result.update(done=True)
-
-            self._total_time += result.get(TIME_THIS_ITER_S, 0)
-
-            flat_result = flatten_dict(result)
-            if self._stopper(trial.trial_id,
-                             result) or trial.should_stop(flat_result):
-                # Hook into scheduler
-                self._scheduler_alg.on_trial_complete(self, trial, flat_result)
-                self._search_alg.on_trial_complete(
-                    trial.trial_id, result=flat_result)
+            result, flat_result, is_duplicate = self._fetch_trial_result(
+                trial)
+            if self._should_stop_trial(trial, result, flat_result):
                 decision = TrialScheduler.STOP
             else:
                 with warn_if_slow("scheduler.on_trial_result"):
                     decision = self._scheduler_alg.on_trial_result(
                         self, trial, flat_result)
-                with warn_if_slow("search_alg.on_trial_result"):
-                    self._search_alg.on_trial_result(trial.trial_id,
-                                                     flat_result)
-                if decision == TrialScheduler.STOP:
-                    with warn_if_slow("search_alg.on_trial_complete"):
-                        self._search_alg.on_trial_complete(
-                            trial.trial_id,
-                            result=flat_result,
-                            early_terminated=True)
-
-            if not is_duplicate:
-                trial.update_last_result(
-                    result, terminate=(decision == TrialScheduler.STOP))
-
-            # Checkpoints to disk. This should be checked even if
-            # the scheduler decision is STOP or PAUSE. Note that
-            # PAUSE only checkpoints to memory and does not update
-            # the global checkpoint state.
-            self._checkpoint_trial_if_needed(
-                trial, force=result.get(SHOULD_CHECKPOINT, False))
-
-            if trial.is_saving:
-                # Cache decision to execute on after the save is processed.
-                # This prevents changing the trial's state or kicking off
-                # another training step prematurely.
-                self._cached_trial_decisions[trial.trial_id] = decision
-            else:
-                self._execute_action(trial, decision)
+                self._notify_search_alg(trial, flat_result, decision)
+            self._apply_decision(trial, result, is_duplicate, decision)
         except Exception:
             logger.exception("Trial %s: Error processing event.", trial)
             self._process_trial_failure(trial, traceback.format_exc())
 
+    def _process_trial_results(self, trials):
+        """Processes the results of several trials.
+
+        Like `_process_trial`, but makes the scheduling decisions for all
+        trials that are not stopped with a single call to
+        `TrialScheduler.on_trial_results`.
+
+        Args:
+            trials (list): Trials with a result ready to be processed.
+        """
+        pending = []
+        for trial in trials:
+            try:
+                result, flat_result, is_duplicate = self._fetch_trial_result(
+                    trial)
+                if self._should_stop_trial(trial, result, flat_result):
+                    self._apply_decision(trial, result, is_duplicate,
+                                         TrialScheduler.STOP)
+                else:
+                    pending.append((trial, result, flat_result, is_duplicate))
+            except Exception:
+                logger.exception("Trial %s: Error processing event.", trial)
+                self._process_trial_failure(trial, traceback.format_exc())
+        if not pending:
+            return
+
+        try:
+            with warn_if_slow("scheduler.on_trial_results"):
+                decisions = self._scheduler_alg.on_trial_results(
+                    self, [(trial, flat_result)
+                           for trial, _, flat_result, _ in pending])
+        except Exception:
+            logger.exception("Error processing trial results.")
+            error_msg = traceback.format_exc()
+            for trial, _, _, _ in pending:
+                self._process_trial_failure(trial, error_msg)
+            return
+
+        for (trial, result, flat_result, is_duplicate), decision in zip(
+                pending, decisions):
+            try:
+                self._notify_search_alg(trial, flat_result, decision)
+                self._apply_decision(trial, result, is_duplicate, decision)
+            except Exception:
+                logger.exception("Trial %s: Error processing event.", trial)
+                self._process_trial_failure(trial, traceback.format_exc())
+
+    def _fetch_trial_result(self, trial):
+        """Fetches the next result of a trial.
+
+        Returns:
+            result (dict): The result.
+            flat_result (dict): The flattened result.
+            is_duplicate (bool): Whether the trial finished without
+                reporting a new result, in which case result is its last
+                result marked as done.
+        """
+        result = self.trial_executor.fetch_result(trial)
+
+        is_duplicate = RESULT_DUPLICATE in result
+        # TrialScheduler and SearchAlgorithm still receive a
+        # notification because there may be special handling for
+        # the `on_trial_complete` hook.
+        if is_duplicate:
+            logger.debug("Trial finished without logging 'done'.")
+            result = trial.last_result
+            result.update(done=True)
+
+        self._total_time += result.get(TIME_THIS_ITER_S, 0)
+        return result, flatten_dict(result), is_duplicate
+
+    def _should_stop_trial(self, trial, result, flat_result):
+        """Checks the stopping conditions of a trial.
+
+        Notifies the scheduler and search algorithm of the completion of the
+        trial if it should stop.
+        """
+        if self._stopper(trial.trial_id,
+                         result) or trial.should_stop(flat_result):
+            # Hook into scheduler
+            self._scheduler_alg.on_trial_complete(self, trial, flat_result)
+            self._search_alg.on_trial_complete(
+                trial.trial_id, result=flat_result)
+            return True
+        return False
+
+    def _notify_search_alg(self, trial, flat_result, decision):
+        with warn_if_slow("search_alg.on_trial_result"):
+            self._search_alg.on_trial_result(trial.trial_id, flat_result)
+        if decision == TrialScheduler.STOP:
+            with warn_if_slow("search_alg.on_trial_complete"):
+                self._search_alg.on_trial_complete(
+                    trial.trial_id, result=flat_result, early_terminated=True)
+
+    def _apply_decision(self, trial, result, is_duplicate, decision):
+        """Records a trial result and acts on the scheduling decision."""
+        if not is_duplicate:
+            trial.update_last_result(
+                result, terminate=(decision == TrialScheduler.STOP))
+
+        # Checkpoints to disk. This should be checked even if
+        # the scheduler decision is STOP or PAUSE. Note that
+        # PAUSE only checkpoints to memory and does not update
+        # the global checkpoint state.
+        self._checkpoint_trial_if_needed(
+            trial, force=result.get(SHOULD_CHECKPOINT, False))
+
+        if trial.is_saving:
+            # Cache decision to execute on after the save is processed.
+            # This prevents changing the trial's state or kicking off
+            # another training step prematurely.
+            self._cached_trial_decisions[trial.trial_id] = decision
+        else:
+            self._execute_action(trial, decision)
+
     def _process_trial_save(self, trial):
         """Processes a trial save.
 
@@ -743,6 +880,10 @@ class TrialRunner:
                 "_scheduler_alg",
                 "trial_executor",
                 "_syncer",
+                "_journal",
+                "_resumed_journal",
+                "_phase_times",
+                "_max_results_per_step",
         ]:
             del state[k]
         state["launch_web_server"] = bool(self._server)
@@ -99,7 +99,8 @@ def run(run_or_experiment,
         raise_on_failed_trial=True,
         return_trials=False,
         ray_auto_init=True,
-        sync_function=None):
+        sync_function=None,
+        max_results_per_step=None):
     """Executes training.
 
     Args:
@@ -213,6 +214,10 @@ def run(run_or_experiment,
             if Ray is not initialized. Defaults to True.
         sync_function: Deprecated. See `sync_to_cloud` and
             `sync_to_driver`.
+        max_results_per_step (int|None): Maximum number of ready trial
+            results processed in one step of the event loop, which also
+            checkpoints the experiment and updates the trial queue. None
+            processes all results that are ready. Defaults to None.
 
     Returns:
         List of Trial objects.
@@ -287,7 +292,8 @@ def run(run_or_experiment,
         launch_web_server=with_server,
         server_port=server_port,
         verbose=bool(verbose > 1),
-        trial_executor=trial_executor)
+        trial_executor=trial_executor,
+        max_results_per_step=max_results_per_step)
 
     for exp in experiments:
         runner.add_experiment(exp)
@@ -17,6 +17,8 @@ from ray.rllib.policy.sample_batch import DEFAULT_POLICY_ID
 from ray.rllib.utils.annotations import override
 from ray.rllib.utils.memory import ray_get_and_free
 from ray.rllib.utils import FilterManager
+from ray.rllib.utils.noise_table import create_shared_noise, \
+    LazyNoiseTable, SharedNoiseTable
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,12 @@ DEFAULT_CONFIG = with_common_config({
     "sgd_stepsize": 0.01,  # sgd step-size
     "observation_filter": "MeanStdFilter",
     "noise_size": 250000000,
+    # regenerate the noise in each worker instead of sharing one table per
+    # node through the object store
+    "lazy_noise_table": False,
+    # number of 4MB noise blocks each worker caches with lazy_noise_table.
+    # Reads of uncached blocks regenerate them, see LazyNoiseTable.
+    "lazy_noise_table_cache_blocks": 64,
     "eval_prob": 0.03,  # probability of evaluating the parameter rewards
     "report_length": 10,  # how many of the last rewards we average over
     "offset": 0,
@@ -43,28 +51,12 @@ DEFAULT_CONFIG = with_common_config({
 # yapf: enable
 
 
-@ray.remote
-def create_shared_noise(count):
-    """Create a large array of noise to be shared by all workers."""
-    seed = 123
-    noise = np.random.RandomState(seed).randn(count).astype(np.float32)
-    return noise
-
-
-class SharedNoiseTable:
-    def __init__(self, noise):
-        self.noise = noise
-        assert self.noise.dtype == np.float32
-
-    def get(self, i, dim):
-        return self.noise[i:i + dim]
-
-    def sample_index(self, dim):
-        return np.random.randint(0, len(self.noise) - dim + 1)
-
-    def get_delta(self, dim):
-        idx = self.sample_index(dim)
-        return idx, self.get(idx, dim)
+def _make_noise_table(config, noise):
+    if config["lazy_noise_table"]:
+        return LazyNoiseTable(
+            config["noise_size"],
+            max_cached_blocks=config["lazy_noise_table_cache_blocks"])
+    return SharedNoiseTable(noise)
 
 
 @ray.remote
@@ -72,7 +64,7 @@ class Worker:
     def __init__(self, config, env_creator, noise, min_task_runtime=0.2):
         self.min_task_runtime = min_task_runtime
         self.config = config
-        self.noise = SharedNoiseTable(noise)
+        self.noise = _make_noise_table(config, noise)
 
         self.env = env_creator(config["env_config"])
         from ray.rllib import models
@@ -91,10 +83,11 @@ class Worker:
         for k in self.filters:
             self.filters[k].sync(new_filters[k])
 
-    def get_filters(self, flush_after=False):
+    def get_filters(self, flush_after=False, deltas=False):
         return_filters = {}
         for k, f in self.filters.items():
-            return_filters[k] = f.as_serializable()
+            return_filters[k] = f.as_delta() if deltas else \
+                f.as_serializable()
             if flush_after:
                 f.clear_buffer()
         return return_filters
@@ -183,9 +176,13 @@ class ARSTrainer(Trainer):
         self.report_length = config["report_length"]
 
         # Create the shared noise table.
-        logger.info("Creating shared noise table.")
-        noise_id = create_shared_noise.remote(config["noise_size"])
-        self.noise = SharedNoiseTable(ray.get(noise_id))
+        if config["lazy_noise_table"]:
+            noise_id = None
+            self.noise = _make_noise_table(config, None)
+        else:
+            logger.info("Creating shared noise table.")
+            noise_id = create_shared_noise.remote(config["noise_size"])
+            self.noise = _make_noise_table(config, ray.get(noise_id))
 
         # Create the actors.
         logger.info("Creating actors.")
@@ -253,10 +250,10 @@ class ARSTrainer(Trainer):
         noisy_returns = noisy_returns[idx, :]
 
         # Compute and take a step.
-        g, count = utils.batched_weighted_sum(
+        g, count = self.noise.weighted_sum(
             noisy_returns[:, 0] - noisy_returns[:, 1],
-            (self.noise.get(index, self.policy.num_params)
-             for index in noise_idx),
+            noise_idx,
+            self.policy.num_params,
             batch_size=min(500, noisy_returns[:, 0].size))
         g /= noise_idx.size
         # scale the returns by their standard deviation
@@ -16,6 +16,8 @@ from ray.rllib.policy.sample_batch import DEFAULT_POLICY_ID
 from ray.rllib.utils.annotations import override
 from ray.rllib.utils.memory import ray_get_and_free
 from ray.rllib.utils import FilterManager
+from ray.rllib.utils.noise_table import create_shared_noise, \
+    LazyNoiseTable, SharedNoiseTable
 
 logger = logging.getLogger(__name__)
 
@@ -37,30 +39,45 @@ DEFAULT_CONFIG = with_common_config({
     "stepsize": 0.01,
     "observation_filter": "MeanStdFilter",
     "noise_size": 250000000,
+    "lazy_noise_table": False,
+    "lazy_noise_table_cache_blocks": 64,
+    "decentralized_update": False,
     "report_length": 10,
 })
 # __sphinx_doc_end__
 # yapf: enable
 
 
-@ray.remote
-def create_shared_noise(count):
-    """Create a large array of noise to be shared by all workers."""
-    seed = 123
-    noise = np.random.RandomState(seed).randn(count).astype(np.float32)
-    return noise
-
-
-class SharedNoiseTable:
-    def __init__(self, noise):
-        self.noise = noise
-        assert self.noise.dtype == np.float32
-
-    def get(self, i, dim):
-        return self.noise[i:i + dim]
-
-    def sample_index(self, dim):
-        return np.random.randint(0, len(self.noise) - dim + 1)
+def _make_noise_table(config, noise):
+    if config["lazy_noise_table"]:
+        return LazyNoiseTable(
+            config["noise_size"],
+            max_cached_blocks=config["lazy_noise_table_cache_blocks"])
+    return SharedNoiseTable(noise)
+
+
+def _apply_update(policy, optimizer, noise, theta, weights, noise_indices,
+                  count, l2_coeff):
+    """Takes an optimizer step with the ES gradient estimate.
+
+    Returns:
+        theta (np.ndarray): The new policy weights.
+        info (dict): Statistics of the update.
+    """
+    g, num_summed = noise.weighted_sum(
+        weights, noise_indices, policy.num_params, batch_size=500)
+    g /= count
+    assert (g.shape == (policy.num_params, ) and g.dtype == np.float32
+            and num_summed == len(noise_indices))
+    # The optimizer reads the current weights from the policy.
+    policy.set_weights(theta)
+    theta, update_ratio = optimizer.update(-g + l2_coeff * theta)
+    policy.set_weights(theta)
+    return theta, {
+        "weights_norm": np.square(theta).sum(),
+        "grad_norm": np.square(g).sum(),
+        "update_ratio": update_ratio,
+    }
 
 
 @ray.remote
@@ -74,7 +91,7 @@ class Worker:
         self.min_task_runtime = min_task_runtime
         self.config = config
         self.policy_params = policy_params
-        self.noise = SharedNoiseTable(noise)
+        self.noise = _make_noise_table(config, noise)
 
         self.env = env_creator(config["env_config"])
         from ray.rllib import models
@@ -86,6 +103,24 @@ class Worker:
             self.sess, self.env.action_space, self.env.observation_space,
             self.preprocessor, config["observation_filter"], config["model"],
             **policy_params)
+        if config["decentralized_update"]:
+            # Each worker keeps its own copy of the weights and updates it
+            # with the same steps as all the other workers.
+            self.theta = self.policy.get_weights()
+            self.optimizer = optimizers.Adam(self.policy, config["stepsize"])
+
+    def get_weights(self):
+        return self.theta
+
+    def set_weights(self, theta):
+        self.theta = theta
+
+    def apply_update(self, weights, noise_indices, count):
+        """Replays the update of a population from its noise indices."""
+        self.theta, info = _apply_update(
+            self.policy, self.optimizer, self.noise, self.theta, weights,
+            noise_indices, count, self.config["l2_coeff"])
+        return info
 
     @property
     def filters(self):
@@ -95,10 +130,11 @@ class Worker:
         for k in self.filters:
             self.filters[k].sync(new_filters[k])
 
-    def get_filters(self, flush_after=False):
+    def get_filters(self, flush_after=False, deltas=False):
         return_filters = {}
         for k, f in self.filters.items():
-            return_filters[k] = f.as_serializable()
+            return_filters[k] = f.as_delta() if deltas else \
+                f.as_serializable()
             if flush_after:
                 f.clear_buffer()
         return return_filters
@@ -112,6 +148,9 @@ class Worker:
         return rollout_rewards, rollout_length
 
     def do_rollouts(self, params, timestep_limit=None):
+        if params is None:
+            # With decentralized updates, the workers keep the weights.
+            params = self.theta
         # Set the network weights.
         self.policy.set_weights(params)
 
@@ -188,9 +227,13 @@ class ESTrainer(Trainer):
         self.report_length = config["report_length"]
 
         # Create the shared noise table.
-        logger.info("Creating shared noise table.")
-        noise_id = create_shared_noise.remote(config["noise_size"])
-        self.noise = SharedNoiseTable(ray.get(noise_id))
+        if config["lazy_noise_table"]:
+            noise_id = None
+            self.noise = _make_noise_table(config, None)
+        else:
+            logger.info("Creating shared noise table.")
+            noise_id = create_shared_noise.remote(config["noise_size"])
+            self.noise = _make_noise_table(config, ray.get(noise_id))
 
         # Create the actors.
         logger.info("Creating actors.")
@@ -198,6 +241,12 @@ class ESTrainer(Trainer):
             Worker.remote(config, policy_params, env_creator, noise_id)
             for _ in range(config["num_workers"])
         ]
+        if config["decentralized_update"]:
+            # The only time the weights are sent to the workers, after this
+            # they only get the noise indices and returns of each update.
+            self._set_worker_weights(self.policy.get_weights())
+        # Whether the workers have newer weights than the local policy.
+        self._local_weights_stale = False
 
         self.episodes_so_far = 0
         self.reward_list = []
@@ -207,11 +256,13 @@ class ESTrainer(Trainer):
     def _train(self):
         config = self.config
 
-        theta = self.policy.get_weights()
-        assert theta.dtype == np.float32
-
-        # Put the current policy weights in the object store.
-        theta_id = ray.put(theta)
+        if config["decentralized_update"]:
+            theta_id = None
+        else:
+            theta = self.policy.get_weights()
+            assert theta.dtype == np.float32
+            # Put the current policy weights in the object store.
+            theta_id = ray.put(theta)
         # Use the actors to do rollouts, note that we pass in the ID of the
         # policy weights.
         results, num_episodes, num_timesteps = self._collect_results(
@@ -252,19 +303,26 @@ class ESTrainer(Trainer):
             raise NotImplementedError(config["return_proc_mode"])
 
         # Compute and take a step.
-        g, count = utils.batched_weighted_sum(
-            proc_noisy_returns[:, 0] - proc_noisy_returns[:, 1],
-            (self.noise.get(index, self.policy.num_params)
-             for index in noise_indices),
-            batch_size=500)
-        g /= noisy_returns.size
-        assert (g.shape == (self.policy.num_params, ) and g.dtype == np.float32
-                and count == len(noise_indices))
-        # Compute the new weights theta.
-        theta, update_ratio = self.optimizer.update(-g +
-                                                    config["l2_coeff"] * theta)
-        # Set the new weights in the local copy of the policy.
-        self.policy.set_weights(theta)
+        weights = proc_noisy_returns[:, 0] - proc_noisy_returns[:, 1]
+        if config["decentralized_update"]:
+            # Every worker takes the same step, and the local policy is only
+            # updated when it is needed.
+            weights_id = ray.put(weights)
+            noise_indices_id = ray.put(noise_indices)
+            update_ids = [
+                worker.apply_update.remote(weights_id, noise_indices_id,
+                                           noisy_returns.size)
+                for worker in self._workers
+            ]
+            # Actor tasks run in order, so the next rollouts of each worker
+            # already see its update. All updates are waited on so that a
+            # failed one is not missed, and the stats of the first are kept.
+            update_info = ray_get_and_free(update_ids)[0]
+            self._local_weights_stale = True
+        else:
+            _, update_info = _apply_update(
+                self.policy, self.optimizer, self.noise, theta, weights,
+                noise_indices, noisy_returns.size, config["l2_coeff"])
         # Store the rewards
         if len(all_eval_returns) > 0:
             self.reward_list.append(np.mean(eval_returns))
@@ -274,13 +332,10 @@ class ESTrainer(Trainer):
             DEFAULT_POLICY_ID: self.policy.get_filter()
         }, self._workers)
 
-        info = {
-            "weights_norm": np.square(theta).sum(),
-            "grad_norm": np.square(g).sum(),
-            "update_ratio": update_ratio,
-            "episodes_this_iter": noisy_lengths.size,
-            "episodes_so_far": self.episodes_so_far,
-        }
+        info = dict(
+            update_info,
+            episodes_this_iter=noisy_lengths.size,
+            episodes_so_far=self.episodes_so_far)
 
         reward_mean = np.mean(self.reward_list[-self.report_length:])
         result = dict(
@@ -293,6 +348,7 @@ class ESTrainer(Trainer):
 
     @override(Trainer)
     def compute_action(self, observation):
+        self._sync_local_weights()
         return self.policy.compute(observation, update=False)[0]
 
     @override(Trainer)
@@ -323,7 +379,19 @@ class ESTrainer(Trainer):
 
         return results, num_episodes, num_timesteps
 
+    def _sync_local_weights(self):
+        if self._local_weights_stale:
+            self.policy.set_weights(
+                ray.get(self._workers[0].get_weights.remote()))
+            self._local_weights_stale = False
+
+    def _set_worker_weights(self, theta):
+        theta_id = ray.put(theta)
+        ray.get([worker.set_weights.remote(theta_id)
+                 for worker in self._workers])
+
     def __getstate__(self):
+        self._sync_local_weights()
         return {
             "weights": self.policy.get_weights(),
             "filter": self.policy.get_filter(),
@@ -334,6 +402,9 @@ class ESTrainer(Trainer):
         self.episodes_so_far = state["episodes_so_far"]
         self.policy.set_weights(state["weights"])
         self.policy.set_filter(state["filter"])
+        if self.config["decentralized_update"]:
+            self._set_worker_weights(state["weights"])
+            self._local_weights_stale = False
         FilterManager.synchronize({
             DEFAULT_POLICY_ID: self.policy.get_filter()
         }, self._workers)
@@ -0,0 +1,69 @@
+import numpy as np
+import unittest
+
+import ray
+from ray.rllib.agents.es import ESTrainer
+from ray.rllib.agents.es.es import _apply_update
+
+
+class TestES(unittest.TestCase):
+    """Tests the decentralized updates of ESTrainer."""
+
+    def setUp(self):
+        ray.init(num_cpus=3)
+
+    def tearDown(self):
+        ray.shutdown()
+
+    def _make_trainer(self):
+        return ESTrainer(
+            env="CartPole-v0",
+            config={
+                "num_workers": 2,
+                "decentralized_update": True,
+                "lazy_noise_table": True,
+                "noise_size": 10000000,
+                "episodes_per_batch": 10,
+                "train_batch_size": 100,
+            })
+
+    def _worker_weights(self, trainer):
+        return ray.get(
+            [worker.get_weights.remote() for worker in trainer._workers])
+
+    def test_decentralized_update_matches_centralized(self):
+        trainer = self._make_trainer()
+        theta = trainer.policy.get_weights()
+        num_params = trainer.policy.num_params
+        weights = np.random.uniform(-1, 1, 20).astype(np.float32)
+        noise_indices = np.array(
+            [trainer.noise.sample_index(num_params) for _ in range(20)])
+        ray.get([
+            worker.apply_update.remote(weights, noise_indices, 40)
+            for worker in trainer._workers
+        ])
+        # The same step, taken centrally by the driver.
+        expected, _ = _apply_update(trainer.policy, trainer.optimizer,
+                                    trainer.noise, theta, weights,
+                                    noise_indices, 40,
+                                    trainer.config["l2_coeff"])
+        for worker_theta in self._worker_weights(trainer):
+            self.assertTrue(np.allclose(worker_theta, expected))
+        trainer.stop()
+
+    def test_decentralized_update_train(self):
+        trainer = self._make_trainer()
+        for _ in range(2):
+            trainer.train()
+        worker_thetas = self._worker_weights(trainer)
+        self.assertTrue(np.array_equal(worker_thetas[0], worker_thetas[1]))
+        trainer.compute_action(np.zeros(4))
+        self.assertTrue(
+            np.array_equal(trainer.policy.get_weights(), worker_thetas[0]))
+        trainer.stop()
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
@@ -13,7 +13,12 @@ APEX_QMIX_DEFAULT_CONFIG = merge_dicts(
             {
                 "max_weight_sync_delay": 400,
                 "num_replay_buffer_shards": 4,
-                "batch_replay": True,  # required for RNN. Disables prio.
+                "batch_replay": True,  # required for RNN
+                # Replay sequences of this many steps instead of whole
+                # sample batches, of which the first replay_burn_in steps
+                # overlap with the previous sequence.
+                "replay_sequence_length": None,
+                "replay_burn_in": 0,
                 "debug": False
             }),
         "num_gpus": 0,
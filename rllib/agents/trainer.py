@@ -46,6 +46,14 @@ COMMON_CONFIG = {
     # model inference batching, which can improve performance for inference
     # bottlenecked workloads.
     "num_envs_per_worker": 1,
+    # If using num_envs_per_worker > 1, whether the envs write their
+    # observations into preallocated batch arrays, which are then used as the
+    # observation batches of policy evaluation without stacking them again.
+    # This cuts the per-step overhead of sampling for cheap envs with fixed
+    # shape observations, when no preprocessing or filtering is needed. The
+    # arrays are reused once the sampler built the batches of their steps, so
+    # callbacks that keep observations of an episode must copy them.
+    "vector_env_obs_buffer": False,
     # Default sample batch size (unroll length). Batches of this size are
     # collected from rollout workers until train_batch_size is met. When using
     # multiple envs per worker, this is multiplied by num_envs_per_worker.
@@ -260,6 +268,19 @@ COMMON_CONFIG = {
     # but optimal value could be obtained by measuring your environment
     # step / reset and model inference perf.
     "remote_env_batch_wait_ms": 0,
+    # If using remote_worker_envs, how many of the envs each remote actor
+    # runs. They are stepped together with one remote call per actor, which
+    # cuts the per-task overhead for cheap envs.
+    "num_envs_per_remote_actor": 1,
+    # If using num_envs_per_worker > 1, whether to run those envs in local
+    # subprocesses of the worker, which step them in parallel. Unlike
+    # remote_worker_envs, this does not need a Ray actor per env, and fixed
+    # shape observations are passed through shared memory.
+    "subprocess_worker_envs": False,
+    # If using subprocess_worker_envs, how many envs to wait for before
+    # computing actions for those that are ready, while the others keep
+    # stepping. None waits for all the envs.
+    "subprocess_env_min_ready": None,
     # Minimum time per train iteration (frequency of metrics reporting).
     "min_iter_time_s": 0,
     # Minimum env steps to optimize for per train call. This value does
@@ -303,7 +324,9 @@ COMMON_CONFIG = {
     # === Offline Datasets ===
     # Specify how to generate experiences:
     #  - "sampler": generate experiences via online simulation (default)
-    #  - a local directory or file glob expression (e.g., "/tmp/*.json")
+    #  - a local directory or file glob expression (e.g., "/tmp/*.json").
+    #    Files with the ".columnar" extension written with
+    #    output_format="columnar" are read with memory mapping.
     #  - a list of individual file paths/URIs (e.g., ["/tmp/1.json",
     #    "s3://bucket/2.json"])
     #  - a dict with string keys and sampling probabilities as values (e.g.,
@@ -326,12 +349,22 @@ COMMON_CONFIG = {
     # of this number of batches. Use this if the input data is not in random
     # enough order. Input is delayed until the shuffle buffer is filled.
     "shuffle_buffer_size": 0,
+    # If positive, input files are read and decoded ahead of time by this
+    # many background threads (see rllib.offline.PrefetchInput). The order
+    # of files is then determined by the "seed" setting.
+    "input_prefetch_workers": 0,
     # Specify where experiences should be saved:
     #  - None: don't save any experiences
     #  - "logdir" to save to the agent log dir
     #  - a path/URI to save to a custom output directory (e.g., "s3://bucket/")
     #  - a function that returns a rllib.offline.OutputWriter
     "output": None,
+    # Format of the saved experiences:
+    #  - "json": one JSON record per batch (JsonWriter)
+    #  - "columnar": binary column blocks that can be memory mapped when
+    #    reading them back (ColumnarWriter). Only supports local paths and
+    #    ignores output_compress_columns.
+    "output_format": "json",
     # What sample batch columns to LZ4 compress in the output data.
     "output_compress_columns": ["obs", "new_obs"],
     # Max output file size before rolling over to a new file.
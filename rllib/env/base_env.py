@@ -77,14 +77,28 @@ class BaseEnv:
                     make_env=None,
                     num_envs=1,
                     remote_envs=False,
-                    remote_env_batch_wait_ms=0):
+                    remote_env_batch_wait_ms=0,
+                    num_envs_per_remote_actor=1,
+                    vector_env_obs_buffer=False,
+                    subprocess_envs=False,
+                    subprocess_env_min_ready=None):
         """Wraps any env type as needed to expose the async interface."""
 
         from ray.rllib.env.remote_vector_env import RemoteVectorEnv
+        from ray.rllib.env.subprocess_vector_env import SubprocVectorEnv, \
+            _SubprocVectorEnvToBaseEnv
         if remote_envs and num_envs == 1:
             raise ValueError(
                 "Remote envs only make sense to use if num_envs > 1 "
                 "(i.e. vectorization is enabled).")
+        if remote_envs and subprocess_envs:
+            raise ValueError(
+                "Only one of remote envs and subprocess envs can be used.")
+        if subprocess_envs and isinstance(
+                env, (BaseEnv, VectorEnv, MultiAgentEnv, ExternalEnv)):
+            raise ValueError(
+                "Subprocess envs are only supported for gym envs, "
+                "got {}.".format(env))
 
         if not isinstance(env, BaseEnv):
             if isinstance(env, MultiAgentEnv):
@@ -93,7 +107,8 @@ class BaseEnv:
                         make_env,
                         num_envs,
                         multiagent=True,
-                        remote_env_batch_wait_ms=remote_env_batch_wait_ms)
+                        remote_env_batch_wait_ms=remote_env_batch_wait_ms,
+                        num_envs_per_actor=num_envs_per_remote_actor)
                 else:
                     env = _MultiAgentEnvToBaseEnv(
                         make_env=make_env,
@@ -118,14 +133,24 @@ class BaseEnv:
                         make_env,
                         num_envs,
                         multiagent=False,
-                        remote_env_batch_wait_ms=remote_env_batch_wait_ms)
+                        remote_env_batch_wait_ms=remote_env_batch_wait_ms,
+                        num_envs_per_actor=num_envs_per_remote_actor)
+                elif subprocess_envs:
+                    env = _SubprocVectorEnvToBaseEnv(
+                        SubprocVectorEnv(
+                            make_env,
+                            num_envs,
+                            action_space=env.action_space,
+                            observation_space=env.observation_space),
+                        min_ready=subprocess_env_min_ready)
                 else:
                     env = VectorEnv.wrap(
                         make_env=make_env,
                         existing_envs=[env],
                         num_envs=num_envs,
                         action_space=env.action_space,
-                        observation_space=env.observation_space)
+                        observation_space=env.observation_space,
+                        obs_buffer=vector_env_obs_buffer)
                     env = _VectorEnvToBaseEnv(env)
         assert isinstance(env, BaseEnv), env
         return env
@@ -119,6 +119,34 @@ class ExternalEnv(threading.Thread):
         episode = self._get(episode_id)
         return episode.wait_for_action(observation)
 
+    @PublicAPI
+    def get_actions(self, observations):
+        """Record observations of several episodes and get their actions.
+
+        All observations are recorded before waiting for any action, so that
+        they are evaluated together in a single policy forward pass.
+
+        Arguments:
+            observations (dict): Current environment observation keyed by
+                the episode id returned from start_episode().
+
+        Returns:
+            actions (dict): Actions from the env action space keyed by
+                episode id.
+        """
+        episodes = {
+            episode_id: self._get(episode_id)
+            for episode_id in observations
+        }
+        # The samplers only poll once all observations are recorded.
+        with self._results_avail_condition:
+            for episode_id, episode in episodes.items():
+                episode.set_observation(observations[episode_id])
+        return {
+            episode_id: episode.wait_action()
+            for episode_id, episode in episodes.items()
+        }
+
     @PublicAPI
     def log_action(self, episode_id, observation, action):
         """Record an observation and (off-policy) action taken.
@@ -132,6 +160,29 @@ class ExternalEnv(threading.Thread):
         episode = self._get(episode_id)
         episode.log_action(observation, action)
 
+    @PublicAPI
+    def log_actions(self, observations, actions):
+        """Record observations and (off-policy) actions of several episodes.
+
+        Like get_actions(), all of them are recorded before waiting for the
+        samplers to process any.
+
+        Arguments:
+            observations (dict): Current environment observation keyed by
+                the episode id returned from start_episode().
+            actions (dict): Action for each observation keyed by episode id.
+        """
+        episodes = {
+            episode_id: self._get(episode_id)
+            for episode_id in observations
+        }
+        with self._results_avail_condition:
+            for episode_id, episode in episodes.items():
+                episode.set_action(observations[episode_id],
+                                   actions[episode_id])
+        for episode in episodes.values():
+            episode.wait_action()
+
     @PublicAPI
     def log_returns(self, episode_id, reward, info=None):
         """Record returns from the environment.
@@ -210,6 +261,10 @@ class _ExternalEnvEpisode:
         return self.data_queue.get_nowait()
 
     def log_action(self, observation, action):
+        self.set_action(observation, action)
+        self.wait_action()
+
+    def set_action(self, observation, action):
         if self.multiagent:
             self.new_observation_dict = observation
             self.new_action_dict = action
@@ -217,14 +272,19 @@ class _ExternalEnvEpisode:
             self.new_observation = observation
             self.new_action = action
         self._send()
-        self.action_queue.get(True, timeout=60.0)
 
     def wait_for_action(self, observation):
+        self.set_observation(observation)
+        return self.wait_action()
+
+    def set_observation(self, observation):
         if self.multiagent:
             self.new_observation_dict = observation
         else:
             self.new_observation = observation
         self._send()
+
+    def wait_action(self):
         return self.action_queue.get(True, timeout=60.0)
 
     def done(self, observation):
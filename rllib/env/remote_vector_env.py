@@ -13,32 +13,67 @@ class RemoteVectorEnv(BaseEnv):
     This provides dynamic batching of inference as observations are returned
     from the remote simulator actors. Both single and multi-agent child envs
     are supported, and envs can be stepped synchronously or async.
+
+    Each remote actor runs `num_envs_per_actor` of the envs. They are stepped
+    together with a single remote call per actor, which is issued once all of
+    the actor's envs got their actions (or were reset), so that cheap envs
+    don't pay the overhead of one task per env and step.
     """
 
-    def __init__(self, make_env, num_envs, multiagent,
-                 remote_env_batch_wait_ms):
+    def __init__(self,
+                 make_env,
+                 num_envs,
+                 multiagent,
+                 remote_env_batch_wait_ms,
+                 num_envs_per_actor=1):
         self.make_local_env = make_env
         self.num_envs = num_envs
         self.multiagent = multiagent
         self.poll_timeout = remote_env_batch_wait_ms / 1000
+        self.num_envs_per_actor = num_envs_per_actor
 
         self.actors = None  # lazy init
         self.pending = None  # lazy init
+        # env_id -> index of the actor running it
+        self.actor_index = {}
+        # Per actor: actions and resets to send with its next call, and the
+        # ids of its envs that were returned by poll() and still wait for
+        # an action or reset.
+        self.next_actions = None
+        self.next_resets = None
+        self.awaiting = None
 
     def poll(self):
         if self.actors is None:
 
-            def make_remote_env(i):
-                logger.info("Launching env {} in remote actor".format(i))
-                if self.multiagent:
-                    return _RemoteMultiAgentEnv.remote(self.make_local_env, i)
-                else:
-                    return _RemoteSingleAgentEnv.remote(self.make_local_env, i)
-
-            self.actors = [make_remote_env(i) for i in range(self.num_envs)]
+            def make_remote_env(env_ids):
+                logger.info(
+                    "Launching envs {} in remote actor".format(env_ids))
+                return _RemoteEnvGroup.remote(self.make_local_env, env_ids,
+                                              self.multiagent)
+
+            self.actors = []
+            for start in range(0, self.num_envs, self.num_envs_per_actor):
+                env_ids = list(
+                    range(start,
+                          min(start + self.num_envs_per_actor, self.num_envs)))
+                for env_id in env_ids:
+                    self.actor_index[env_id] = len(self.actors)
+                self.actors.append(make_remote_env(env_ids))
+            self.next_actions = [{} for _ in self.actors]
+            self.next_resets = [[] for _ in self.actors]
+            self.awaiting = [set() for _ in self.actors]
 
         if self.pending is None:
-            self.pending = {a.reset.remote(): a for a in self.actors}
+            self.pending = {}
+            for env_id in range(self.num_envs):
+                self.next_resets[self.actor_index[env_id]].append(env_id)
+
+        # Envs that were not given an action (e.g., no agent acted) are left
+        # out, as if they were pending.
+        for i in range(len(self.actors)):
+            self.awaiting[i].clear()
+            self._send(i)
 
         # each keyed by env_id in [0, num_remote_envs)
         obs, rewards, dones, infos = {}, {}, {}, {}
@@ -54,28 +89,29 @@ class RemoteVectorEnv(BaseEnv):
         # Get and return observations for each of the ready envs
         env_ids = set()
         for obj_id in ready:
-            actor = self.pending.pop(obj_id)
-            env_id = self.actors.index(actor)
-            env_ids.add(env_id)
-            ob, rew, done, info = ray_get_and_free(obj_id)
-            obs[env_id] = ob
-            rewards[env_id] = rew
-            dones[env_id] = done
-            infos[env_id] = info
-
-        logger.debug("Got obs batch for actors {}".format(env_ids))
+            actor_index = self.pending.pop(obj_id)
+            for env_id, (ob, rew, done,
+                         info) in ray_get_and_free(obj_id).items():
+                env_ids.add(env_id)
+                self.awaiting[actor_index].add(env_id)
+                obs[env_id] = ob
+                rewards[env_id] = rew
+                dones[env_id] = done
+                infos[env_id] = info
+
+        logger.debug("Got obs batch for envs {}".format(env_ids))
         return obs, rewards, dones, infos, {}
 
     def send_actions(self, action_dict):
         for env_id, actions in action_dict.items():
-            actor = self.actors[env_id]
-            obj_id = actor.step.remote(actions)
-            self.pending[obj_id] = actor
+            actor_index = self.actor_index[env_id]
+            self.next_actions[actor_index][env_id] = actions
+            self._env_handled(actor_index, env_id)
 
     def try_reset(self, env_id):
-        actor = self.actors[env_id]
-        obj_id = actor.reset.remote()
-        self.pending[obj_id] = actor
+        actor_index = self.actor_index[env_id]
+        self.next_resets[actor_index].append(env_id)
+        self._env_handled(actor_index, env_id)
         return ASYNC_RESET_RETURN
 
     def stop(self):
@@ -83,13 +119,54 @@ class RemoteVectorEnv(BaseEnv):
             for actor in self.actors:
                 actor.__ray_terminate__.remote()
 
+    def _env_handled(self, actor_index, env_id):
+        awaiting = self.awaiting[actor_index]
+        awaiting.discard(env_id)
+        if not awaiting:
+            self._send(actor_index)
+
+    def _send(self, actor_index):
+        actions = self.next_actions[actor_index]
+        resets = self.next_resets[actor_index]
+        if not actions and not resets:
+            return
+        obj_id = self.actors[actor_index].step.remote(actions, resets)
+        self.pending[obj_id] = actor_index
+        self.next_actions[actor_index] = {}
+        self.next_resets[actor_index] = []
+
 
 @ray.remote(num_cpus=0)
-class _RemoteMultiAgentEnv:
-    """Wrapper class for making a multi-agent env a remote actor."""
+class _RemoteEnvGroup:
+    """Remote actor running a group of envs of a RemoteVectorEnv."""
+
+    def __init__(self, make_env, env_ids, multiagent):
+        if multiagent:
+            wrapper_cls = _MultiAgentEnvWrapper
+        else:
+            wrapper_cls = _SingleAgentEnvWrapper
+        self.envs = {i: wrapper_cls(make_env(i)) for i in env_ids}
 
-    def __init__(self, make_env, i):
-        self.env = make_env(i)
+    def step(self, action_dicts, reset_env_ids):
+        """Steps and resets envs of the group.
+
+        Returns:
+            dict mapping env_id to the (obs, rew, done, info) of the env,
+            each keyed by agent_id.
+        """
+        results = {}
+        for env_id in reset_env_ids:
+            results[env_id] = self.envs[env_id].reset()
+        for env_id, action_dict in action_dicts.items():
+            results[env_id] = self.envs[env_id].step(action_dict)
+        return results
+
+
+class _MultiAgentEnvWrapper:
+    """Wrapper class for running a multi-agent env in a remote actor."""
+
+    def __init__(self, env):
+        self.env = env
 
     def reset(self):
         obs = self.env.reset()
@@ -103,12 +180,11 @@ class _RemoteMultiAgentEnv:
         return self.env.step(action_dict)
 
 
-@ray.remote(num_cpus=0)
-class _RemoteSingleAgentEnv:
-    """Wrapper class for making a gym env a remote actor."""
+class _SingleAgentEnvWrapper:
+    """Wrapper class for running a gym env in a remote actor."""
 
-    def __init__(self, make_env, i):
-        self.env = make_env(i)
+    def __init__(self, env):
+        self.env = env
 
     def reset(self):
         obs = {_DUMMY_AGENT_ID: self.env.reset()}
@@ -0,0 +1,289 @@
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+import traceback
+
+import numpy as np
+
+from ray.rllib.env.base_env import BaseEnv, _DUMMY_AGENT_ID, \
+    ASYNC_RESET_RETURN, _with_dummy_agent_id
+from ray.rllib.env.vector_env import VectorEnv
+from ray.rllib.utils.annotations import override, PublicAPI
+
+logger = logging.getLogger(__name__)
+
+
+@PublicAPI
+class SubprocVectorEnv(VectorEnv):
+    """Vector env that steps its envs in parallel in local subprocesses.
+
+    Each env runs in its own process and is driven through a pipe. If the
+    observation space has a fixed shape (e.g., Box), the env processes write
+    their observations into a shared memory array of shape
+    [num_envs, *obs_shape] instead of sending them through the pipe.
+
+    Besides the synchronous VectorEnv API, envs can be stepped and reset
+    asynchronously with step_async() and reset_async(), and the results of
+    the first ready envs be collected with wait().
+
+    Arguments:
+        make_env (func): Factory that produces a new gym env given the env
+            index. It's called in the subprocesses, so it must be picklable
+            unless the "fork" start method is used.
+        num_envs (int): Number of envs (and processes) to run.
+        action_space (gym.Space): Action space of the envs.
+        observation_space (gym.Space): Observation space of the envs.
+        start_method (str|None): The multiprocessing start method, or None
+            for the platform default.
+    """
+
+    def __init__(self,
+                 make_env,
+                 num_envs,
+                 action_space,
+                 observation_space,
+                 start_method=None):
+        self.num_envs = num_envs
+        self.action_space = action_space
+        self.observation_space = observation_space
+        ctx = multiprocessing.get_context(start_method)
+
+        shape = getattr(observation_space, "shape", None)
+        if shape is not None:
+            shape = (num_envs, ) + tuple(shape)
+            dtype = np.dtype(observation_space.dtype)
+            shared_array = ctx.RawArray("b",
+                                        int(np.prod(shape)) * dtype.itemsize)
+            self.shared_obs = np.frombuffer(
+                shared_array, dtype=dtype).reshape(shape)
+        else:
+            dtype = None
+            shared_array = None
+            self.shared_obs = None
+
+        self.conns = []
+        self.processes = []
+        for i in range(num_envs):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_env_process,
+                args=(make_env, i, child_conn, shared_array, shape, dtype),
+                daemon=True)
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+        # conn -> env index, of the envs with a command in flight
+        self.pending = {}
+        self.closed = False
+
+    @override(VectorEnv)
+    def vector_reset(self):
+        for i in range(self.num_envs):
+            self.reset_async(i)
+        return self._collect(self.wait())[0]
+
+    @override(VectorEnv)
+    def reset_at(self, index):
+        self.reset_async(index)
+        obs, _, _, _ = self.wait(env_ids=[index])[index]
+        return obs
+
+    @override(VectorEnv)
+    def vector_step(self, actions):
+        self.step_async(dict(enumerate(actions)))
+        return self._collect(self.wait())
+
+    @override(VectorEnv)
+    def get_unwrapped(self):
+        return []
+
+    @PublicAPI
+    def reset_async(self, env_id):
+        """Starts resetting the given env."""
+        self._send(env_id, "reset", None)
+
+    @PublicAPI
+    def step_async(self, actions):
+        """Starts stepping the given envs.
+
+        Arguments:
+            actions (dict): Actions keyed by env index.
+        """
+        for env_id, action in actions.items():
+            self._send(env_id, "step", action)
+
+    @PublicAPI
+    def wait(self, min_ready=None, env_ids=None):
+        """Waits for envs to finish their step or reset.
+
+        Arguments:
+            min_ready (int|None): Return once at least this many envs are
+                ready (or no more are in flight). Envs that are ready by then
+                are returned as well. None waits for all the envs in flight.
+            env_ids (list|None): Only wait for these envs.
+
+        Returns:
+            dict mapping env index to (obs, reward, done, info) of the env.
+                For resets, the reward is 0 and done is False.
+        """
+        if env_ids is None:
+            conns = list(self.pending)
+        else:
+            conns = [self.conns[i] for i in env_ids]
+        if min_ready is None:
+            min_ready = len(conns)
+        min_ready = min(min_ready, len(conns))
+
+        results = {}
+        while conns and (len(results) < min_ready or not results):
+            for conn in wait(conns):
+                conns.remove(conn)
+                env_id = self.pending.pop(conn)
+                status, result = conn.recv()
+                if status == "error":
+                    raise RuntimeError(
+                        "Env {} failed in its subprocess:\n{}".format(
+                            env_id, result))
+                results[env_id] = result
+
+        env_ids = sorted(results)
+        if self.shared_obs is not None:
+            # One copy for all obs, since the shared rows are overwritten by
+            # the next step of their env.
+            obs_batch = self.shared_obs[env_ids]
+            for env_id, obs in zip(env_ids, obs_batch):
+                _, rew, done, info = results[env_id]
+                results[env_id] = (obs, rew, done, info)
+        for env_id in env_ids:
+            _, rew, _, info = results[env_id]
+            if not np.isscalar(rew) or not np.isreal(rew) or \
+                    not np.isfinite(rew):
+                raise ValueError(
+                    "Reward should be finite scalar, got {} ({})".format(
+                        rew, type(rew)))
+            if type(info) is not dict:
+                raise ValueError("Info should be a dict, got {} ({})".format(
+                    info, type(info)))
+        return {env_id: results[env_id] for env_id in env_ids}
+
+    @PublicAPI
+    def close(self):
+        """Stops the env processes."""
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self.pending:
+            conn.recv()
+        for conn in self.conns:
+            conn.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+    def _send(self, env_id, cmd, data):
+        conn = self.conns[env_id]
+        if conn in self.pending:
+            raise ValueError(
+                "Env {} is still busy with its last step or reset.".format(
+                    env_id))
+        conn.send((cmd, data))
+        self.pending[conn] = env_id
+
+    def _collect(self, results):
+        obs_batch, rew_batch, done_batch, info_batch = [], [], [], []
+        for env_id in range(self.num_envs):
+            obs, rew, done, info = results[env_id]
+            obs_batch.append(obs)
+            rew_batch.append(rew)
+            done_batch.append(done)
+            info_batch.append(info)
+        if self.shared_obs is not None and self.shared_obs.ndim > 1:
+            # The obs are the rows of a copy of the shared obs of all envs,
+            # in env order.
+            obs_batch = obs_batch[0].base
+        return obs_batch, rew_batch, done_batch, info_batch
+
+
+def _env_process(make_env, env_id, conn, shared_array, shape, dtype):
+    """Runs the env of a SubprocVectorEnv, driven by commands on a pipe."""
+
+    if shared_array is not None:
+        shared_obs = np.frombuffer(shared_array, dtype=dtype).reshape(shape)
+    env = None
+    try:
+        env = make_env(env_id)
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                obs, rew, done, info = env.step(data)
+            elif cmd == "reset":
+                obs, rew, done, info = env.reset(), 0, False, {}
+            elif cmd == "close":
+                break
+            else:
+                raise ValueError("Unknown command {}".format(cmd))
+            if shared_array is not None:
+                shared_obs[env_id] = obs
+                obs = None
+            conn.send(("ok", (obs, rew, done, info)))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        if env is not None and hasattr(env, "close"):
+            env.close()
+        conn.close()
+
+
+class _SubprocVectorEnvToBaseEnv(BaseEnv):
+    """Internal adapter of SubprocVectorEnv to BaseEnv.
+
+    Unlike _VectorEnvToBaseEnv, envs are stepped asynchronously: poll()
+    returns once `min_ready` envs finished their step or reset, so that
+    inference for them overlaps with the other envs still stepping.
+    """
+
+    def __init__(self, vector_env, min_ready=None):
+        self.vector_env = vector_env
+        self.action_space = vector_env.action_space
+        self.observation_space = vector_env.observation_space
+        self.num_envs = vector_env.num_envs
+        self.min_ready = min_ready
+        self.started = False
+
+    @override(BaseEnv)
+    def poll(self):
+        if not self.started:
+            for env_id in range(self.num_envs):
+                self.vector_env.reset_async(env_id)
+            self.started = True
+        obs, rewards, dones, infos = {}, {}, {}, {}
+        for env_id, (ob, rew, done,
+                     info) in self.vector_env.wait(self.min_ready).items():
+            obs[env_id] = ob
+            rewards[env_id] = rew
+            dones[env_id] = done
+            infos[env_id] = info
+        return _with_dummy_agent_id(obs), \
+            _with_dummy_agent_id(rewards), \
+            _with_dummy_agent_id(dones, "__all__"), \
+            _with_dummy_agent_id(infos), {}
+
+    @override(BaseEnv)
+    def send_actions(self, action_dict):
+        self.vector_env.step_async({
+            env_id: actions[_DUMMY_AGENT_ID]
+            for env_id, actions in action_dict.items()
+        })
+
+    @override(BaseEnv)
+    def try_reset(self, env_id):
+        self.vector_env.reset_async(env_id)
+        return ASYNC_RESET_RETURN
+
+    @override(BaseEnv)
+    def get_unwrapped(self):
+        return self.vector_env.get_unwrapped()
+
+    @override(BaseEnv)
+    def stop(self):
+        self.vector_env.close()
@@ -1,4 +1,5 @@
 import logging
+
 import numpy as np
 
 from ray.rllib.utils.annotations import override, PublicAPI
@@ -23,9 +24,10 @@ class VectorEnv:
              existing_envs=None,
              num_envs=1,
              action_space=None,
-             observation_space=None):
+             observation_space=None,
+             obs_buffer=False):
         return _VectorizedGymEnv(make_env, existing_envs or [], num_envs,
-                                 action_space, observation_space)
+                                 action_space, observation_space, obs_buffer)
 
     @PublicAPI
     def vector_reset(self):
@@ -74,6 +76,12 @@ class _VectorizedGymEnv(VectorEnv):
             defined if the number of existing envs is less than num_envs.
         existing_envs (list): List of existing gym envs.
         num_envs (int): Desired num gym envs to keep total.
+        obs_buffer (bool): Whether to write the observations of all envs
+            into a preallocated array of shape [num_envs, *obs_shape], which
+            is returned as the observation vector. The sampler then uses that
+            array as the observation batch of policy evaluation without
+            stacking the observations again. Only used for observation
+            spaces with a fixed shape (e.g., Box).
     """
 
     def __init__(self,
@@ -81,7 +89,8 @@ class _VectorizedGymEnv(VectorEnv):
                  existing_envs,
                  num_envs,
                  action_space=None,
-                 observation_space=None):
+                 observation_space=None,
+                 obs_buffer=False):
         self.make_env = make_env
         self.envs = existing_envs
         self.num_envs = num_envs
@@ -90,10 +99,23 @@ class _VectorizedGymEnv(VectorEnv):
         self.action_space = action_space or self.envs[0].action_space
         self.observation_space = observation_space or \
             self.envs[0].observation_space
+        if obs_buffer and getattr(self.observation_space, "shape",
+                                  None) is not None:
+            self.obs_buffers = _ObsBufferPool(self.num_envs,
+                                              self.observation_space)
+        else:
+            if obs_buffer:
+                logger.warning(
+                    "Not using an obs buffer for observation space {}, which "
+                    "has no fixed shape.".format(self.observation_space))
+            self.obs_buffers = None
 
     @override(VectorEnv)
     def vector_reset(self):
-        return [e.reset() for e in self.envs]
+        obs_batch = [e.reset() for e in self.envs]
+        if self.obs_buffers is not None:
+            return self.obs_buffers.write(obs_batch)
+        return obs_batch
 
     @override(VectorEnv)
     def reset_at(self, index):
@@ -115,8 +137,58 @@ class _VectorizedGymEnv(VectorEnv):
             rew_batch.append(r)
             done_batch.append(done)
             info_batch.append(info)
+        if self.obs_buffers is not None:
+            obs_batch = self.obs_buffers.write(obs_batch)
         return obs_batch, rew_batch, done_batch, info_batch
 
     @override(VectorEnv)
     def get_unwrapped(self):
         return self.envs
+
+
+class _ObsBufferPool:
+    """Pool of preallocated observation batch arrays of a vector env.
+
+    The observations of a batch are views into its array, which are kept
+    e.g. by sample batch builders until the batch is built. Every write is
+    numbered, and an array is only reused once its user released the writes
+    up to it (see release()), so an array is never overwritten while its
+    observations are still in use. Until then, new arrays are allocated.
+    """
+
+    def __init__(self, num_envs, observation_space, max_arrays=64):
+        self.shape = (num_envs, ) + tuple(observation_space.shape)
+        self.dtype = observation_space.dtype
+        self.max_arrays = max_arrays
+        self.arrays = []
+        # Number of the last write into each of the arrays.
+        self.write_ids = []
+        self.num_writes = 0
+        self.released_before = 0
+
+    def write(self, obs_batch):
+        """Copies the given observations into a free array and returns it.
+
+        The write is numbered `num_writes - 1` afterwards.
+        """
+        array = self._get_free_array()
+        for i, obs in enumerate(obs_batch):
+            array[i] = obs
+        return array
+
+    def release(self, write_id):
+        """Allows reusing the arrays of all writes before the given one."""
+        self.released_before = max(self.released_before, write_id)
+
+    def _get_free_array(self):
+        write_id = self.num_writes
+        self.num_writes += 1
+        for i in range(len(self.arrays)):
+            if self.write_ids[i] < self.released_before:
+                self.write_ids[i] = write_id
+                return self.arrays[i]
+        array = np.empty(self.shape, dtype=self.dtype)
+        if len(self.arrays) < self.max_arrays:
+            self.arrays.append(array)
+            self.write_ids.append(write_id)
+        return array
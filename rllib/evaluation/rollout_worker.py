@@ -143,6 +143,10 @@ class RolloutWorker(EvaluatorInterface, ParallelIteratorWorker):
                  output_creator=lambda ioctx: NoopOutput(),
                  remote_worker_envs=False,
                  remote_env_batch_wait_ms=0,
+                 num_envs_per_remote_actor=1,
+                 vector_env_obs_buffer=False,
+                 subprocess_worker_envs=False,
+                 subprocess_env_min_ready=None,
                  soft_horizon=False,
                  no_done_at_end=False,
                  seed=None,
@@ -231,6 +235,16 @@ class RolloutWorker(EvaluatorInterface, ParallelIteratorWorker):
                 least one env is ready) is a reasonable default, but optimal
                 value could be obtained by measuring your environment
                 step / reset and model inference perf.
+            num_envs_per_remote_actor (int): If using remote_worker_envs,
+                how many envs each remote actor runs and steps together.
+            vector_env_obs_buffer (bool): Whether auto-vectorized envs write
+                their observations into preallocated batch arrays, which are
+                used by policy evaluation without stacking them again.
+            subprocess_worker_envs (bool): If True, the envs are run in
+                local subprocesses and stepped in parallel.
+            subprocess_env_min_ready (int|None): If using
+                subprocess_worker_envs, how many envs to wait for before
+                computing actions for the ready ones. None waits for all.
             soft_horizon (bool): Calculate rewards but don't reset the
                 environment when the horizon is hit.
             no_done_at_end (bool): Ignore the done=True at the end of the
@@ -395,7 +409,11 @@ class RolloutWorker(EvaluatorInterface, ParallelIteratorWorker):
             make_env=make_env,
             num_envs=num_envs,
             remote_envs=remote_worker_envs,
-            remote_env_batch_wait_ms=remote_env_batch_wait_ms)
+            remote_env_batch_wait_ms=remote_env_batch_wait_ms,
+            num_envs_per_remote_actor=num_envs_per_remote_actor,
+            vector_env_obs_buffer=vector_env_obs_buffer,
+            subprocess_envs=subprocess_worker_envs,
+            subprocess_env_min_ready=subprocess_env_min_ready)
         self.num_envs = num_envs
 
         if self.batch_mode == "truncate_episodes":
@@ -732,18 +750,21 @@ class RolloutWorker(EvaluatorInterface, ParallelIteratorWorker):
             self.filters[k].sync(new_filters[k])
 
     @DeveloperAPI
-    def get_filters(self, flush_after=False):
+    def get_filters(self, flush_after=False, deltas=False):
         """Returns a snapshot of filters.
 
         Args:
             flush_after (bool): Clears the filter buffer state.
+            deltas (bool): Whether to only return the accumulated buffer
+                state of each filter, see Filter.as_delta().
 
         Returns:
             return_filters (dict): Dict for serializable filters
         """
         return_filters = {}
         for k, f in self.filters.items():
-            return_filters[k] = f.as_serializable()
+            return_filters[k] = f.as_delta() if deltas else \
+                f.as_serializable()
             if flush_after:
                 f.clear_buffer()
         return return_filters
@@ -294,6 +294,11 @@ def _env_runner(base_env, extra_batch_callback, policies, policy_mapping_fn,
 
     active_episodes = defaultdict(new_episode)
 
+    # Obs buffer pool of the env (see `vector_env_obs_buffer`), and the
+    # oldest write into it referenced by each batch builder.
+    obs_buffers = _get_obs_buffers(base_env)
+    pending_write_ids = {}
+
     while True:
         perf_stats.iters += 1
         t0 = time.time()
@@ -314,6 +319,9 @@ def _env_runner(base_env, extra_batch_callback, policies, policy_mapping_fn,
             unfiltered_obs, rewards, dones, infos, off_policy_actions, horizon,
             preprocessors, obs_filters, unroll_length, pack, callbacks,
             soft_horizon, no_done_at_end)
+        if obs_buffers is not None:
+            _release_obs_buffers(obs_buffers, active_episodes,
+                                 pending_write_ids)
         perf_stats.processing_time += time.time() - t1
         for o in outputs:
             yield o
@@ -527,6 +535,7 @@ def _do_policy_eval(tf_sess, to_eval, policies, active_episodes):
 
     for policy_id, eval_data in to_eval.items():
         rnn_in = [t.rnn_state for t in eval_data]
+        obs_batch = _get_obs_batch(eval_data)
         policy = _get_or_raise(policies, policy_id)
         if builder and (policy.compute_actions.__code__ is
                         TFPolicy.compute_actions.__code__):
@@ -537,7 +546,7 @@ def _do_policy_eval(tf_sess, to_eval, policies, active_episodes):
             # the return tuple.
             pending_fetches[policy_id] = policy._build_compute_actions(
                 builder,
-                obs_batch=[t.obs for t in eval_data],
+                obs_batch=obs_batch,
                 state_batches=rnn_in_cols,
                 prev_action_batch=[t.prev_action for t in eval_data],
                 prev_reward_batch=[t.prev_reward for t in eval_data],
@@ -549,7 +558,7 @@ def _do_policy_eval(tf_sess, to_eval, policies, active_episodes):
                 for i in range(len(rnn_in[0]))
             ]
             eval_results[policy_id] = policy.compute_actions(
-                [t.obs for t in eval_data],
+                obs_batch,
                 state_batches=rnn_in_cols,
                 prev_action_batch=[t.prev_action for t in eval_data],
                 prev_reward_batch=[t.prev_reward for t in eval_data],
@@ -567,6 +576,54 @@ def _do_policy_eval(tf_sess, to_eval, policies, active_episodes):
     return eval_results
 
 
+def _get_obs_batch(eval_data):
+    """Returns the observations to evaluate as a batch.
+
+    If they are all the rows of a preallocated obs batch array of a vector
+    env (see `vector_env_obs_buffer`), in env order, that array is returned
+    as is instead of stacking them again.
+    """
+    first = eval_data[0].obs
+    buf = getattr(first, "base", None)
+    if (isinstance(buf, np.ndarray) and len(buf) == len(eval_data)
+            and buf.shape[1:] == first.shape
+            and first.__array_interface__["data"][0] ==
+            buf.__array_interface__["data"][0]):
+        for i, t in enumerate(eval_data):
+            if t.env_id != i or t.obs.base is not buf:
+                break
+        else:
+            return buf
+    return [t.obs for t in eval_data]
+
+
+def _get_obs_buffers(base_env):
+    """Returns the obs buffer pool of the env's vector env, if any."""
+    return getattr(getattr(base_env, "vector_env", None), "obs_buffers", None)
+
+
+def _release_obs_buffers(obs_buffers, active_episodes, pending_write_ids):
+    """Lets the obs buffer pool reuse the arrays no longer referenced.
+
+    The observations of the last write are referenced by the episodes and
+    the policy evaluation of this step. Older ones are only referenced by
+    the rows of batch builders with pending data, whose first row refers to
+    the write before the one it was added at.
+    """
+    write_id = obs_buffers.num_writes - 1
+    oldest = write_id
+    still_pending = {}
+    for episode in active_episodes.values():
+        builder = episode.batch_builder
+        if builder.has_pending_data():
+            still_pending[builder] = pending_write_ids.get(
+                builder, write_id - 1)
+            oldest = min(oldest, still_pending[builder])
+    pending_write_ids.clear()
+    pending_write_ids.update(still_pending)
+    obs_buffers.release(oldest)
+
+
 def _process_policy_eval_results(to_eval, eval_results, active_episodes,
                                  active_envs, off_policy_actions, policies,
                                  clip_actions):
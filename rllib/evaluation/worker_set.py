@@ -5,7 +5,8 @@ from ray.rllib.utils.annotations import DeveloperAPI
 from ray.rllib.evaluation.rollout_worker import RolloutWorker, \
     _validate_multiagent_config
 from ray.rllib.offline import NoopOutput, JsonReader, MixedInput, JsonWriter, \
-    ShuffledInput
+    ShuffledInput, ColumnarReader, ColumnarWriter, PrefetchInput, \
+    is_columnar_input
 from ray.rllib.utils import merge_dicts, try_import_tf
 from ray.rllib.utils.memory import ray_get_and_free
 
@@ -190,13 +191,22 @@ class WorkerSet:
                     "shuffle_buffer_size"]))
         else:
             input_creator = (lambda ioctx: ShuffledInput(
-                JsonReader(config["input"], ioctx), config[
+                _file_input_reader(config, ioctx), config[
                     "shuffle_buffer_size"]))
 
+        if config["output_format"] not in ["json", "columnar"]:
+            raise ValueError("Unknown output_format: {}".format(
+                config["output_format"]))
         if isinstance(config["output"], FunctionType):
             output_creator = config["output"]
         elif config["output"] is None:
             output_creator = (lambda ioctx: NoopOutput())
+        elif config["output_format"] == "columnar":
+            output_creator = (lambda ioctx: ColumnarWriter(
+                ioctx.log_dir
+                if config["output"] == "logdir" else config["output"],
+                ioctx,
+                max_file_size=config["output_max_file_size"]))
         elif config["output"] == "logdir":
             output_creator = (lambda ioctx: JsonWriter(
                 ioctx.log_dir,
@@ -255,8 +265,26 @@ class WorkerSet:
             output_creator=output_creator,
             remote_worker_envs=config["remote_worker_envs"],
             remote_env_batch_wait_ms=config["remote_env_batch_wait_ms"],
+            num_envs_per_remote_actor=config["num_envs_per_remote_actor"],
+            vector_env_obs_buffer=config["vector_env_obs_buffer"],
+            subprocess_worker_envs=config["subprocess_worker_envs"],
+            subprocess_env_min_ready=config["subprocess_env_min_ready"],
             soft_horizon=config["soft_horizon"],
             no_done_at_end=config["no_done_at_end"],
             seed=(config["seed"] + worker_index)
             if config["seed"] is not None else None,
             _fake_sampler=config.get("_fake_sampler", False))
+
+
+def _file_input_reader(config, ioctx):
+    if is_columnar_input(config["input"]):
+        reader = ColumnarReader(config["input"], ioctx)
+    else:
+        reader = JsonReader(config["input"], ioctx)
+    if config["input_prefetch_workers"]:
+        reader = PrefetchInput(
+            reader,
+            num_workers=config["input_prefetch_workers"],
+            seed=(config["seed"] + ioctx.worker_index)
+            if config["seed"] is not None else None)
+    return reader
@@ -0,0 +1,78 @@
+"""Benchmark of ESTrainer iteration time with centralized and decentralized
+updates, for increasing numbers of workers.
+
+With centralized updates, the driver reconstructs the perturbation of every
+rollout from the noise table and sends the new weights to all workers,
+which is O(population x params) work on a single core each iteration. With
+"decentralized_update", the workers only receive the noise indices and the
+returns of the population and all take the same step locally.
+
+The workers run on a local cluster of several raylets, and a large model
+makes the cost of the update visible next to the (cheap) CartPole rollouts.
+
+Run with:
+    python es_update_benchmark.py --num-workers=32,64,128,256,512
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import ray
+from ray.cluster_utils import Cluster
+from ray.rllib.agents.es import ESTrainer
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num-workers", type=str, default="32,64,128,256,512")
+parser.add_argument("--num-nodes", type=int, default=4)
+parser.add_argument("--hidden-size", type=int, default=256)
+parser.add_argument("--episodes-per-worker", type=int, default=4)
+parser.add_argument("--num-iters", type=int, default=5)
+
+
+def benchmark(num_workers, decentralized, args):
+    trainer = ESTrainer(
+        env="CartPole-v0",
+        config={
+            "num_workers": num_workers,
+            "decentralized_update": decentralized,
+            "lazy_noise_table": True,
+            "episodes_per_batch": num_workers * args.episodes_per_worker,
+            "train_batch_size": 1,
+            "model": {
+                "fcnet_hiddens": [args.hidden_size, args.hidden_size],
+            },
+        })
+    # The first iteration also waits for all the workers to start.
+    trainer.train()
+    times = []
+    for _ in range(args.num_iters):
+        start = time.time()
+        trainer.train()
+        times.append(time.time() - start)
+    trainer.stop()
+    return np.mean(times)
+
+
+def main(args):
+    all_num_workers = [int(n) for n in args.num_workers.split(",")]
+    cluster = Cluster()
+    cpus_per_node = -(-max(all_num_workers) // args.num_nodes)
+    for _ in range(args.num_nodes):
+        cluster.add_node(num_cpus=cpus_per_node)
+    ray.init(address=cluster.address)
+
+    for num_workers in all_num_workers:
+        for decentralized in [False, True]:
+            iter_time = benchmark(num_workers, decentralized, args)
+            print("{} workers, {} updates: {:.2f}s per iteration".format(
+                num_workers, "decentralized"
+                if decentralized else "centralized", iter_time))
+
+    ray.shutdown()
+    cluster.shutdown()
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
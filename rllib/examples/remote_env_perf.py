@@ -0,0 +1,95 @@
+"""Benchmark of RemoteVectorEnv stepping throughput.
+
+Steps a vector of cheap envs running in remote actors, for several numbers
+of envs per actor, and reports env steps per second. With one env per actor
+the per-task overhead dominates; packing envs into fewer actors amortizes
+it over the envs stepped by each remote call.
+
+Run with:
+    python remote_env_perf.py --num-envs=16
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import ray
+from ray.rllib.env.base_env import _DUMMY_AGENT_ID
+from ray.rllib.env.remote_vector_env import RemoteVectorEnv
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num-envs", type=int, default=16)
+parser.add_argument("--envs-per-actor", type=str, default="1,2,4,8,16")
+parser.add_argument("--step-time-ms", type=float, default=0.0)
+parser.add_argument("--batch-wait-ms", type=float, default=0.0)
+
+
+class CheapEnv:
+    """Env with a small observation and an optional fixed step time."""
+
+    def __init__(self, step_time_s):
+        self.step_time_s = step_time_s
+        self.obs = np.zeros(4, dtype=np.float32)
+        self.t = 0
+
+    def reset(self):
+        self.t = 0
+        return self.obs
+
+    def step(self, action):
+        if self.step_time_s:
+            time.sleep(self.step_time_s)
+        self.t += 1
+        return self.obs, 1.0, self.t >= 100, {}
+
+
+def step_envs(env, num_steps):
+    steps = 0
+    while steps < num_steps:
+        obs, _, dones, _, _ = env.poll()
+        actions = {}
+        for env_id in obs:
+            if dones[env_id]["__all__"]:
+                env.try_reset(env_id)
+            else:
+                actions[env_id] = {_DUMMY_AGENT_ID: 0}
+        env.send_actions(actions)
+        steps += len(actions)
+    return steps
+
+
+def timeit(name, env, num_steps=1000):
+    # warmup
+    start = time.time()
+    while time.time() - start < 1:
+        step_envs(env, num_steps)
+    # real run
+    stats = []
+    for _ in range(4):
+        start = time.time()
+        count = 0
+        while time.time() - start < 2:
+            count += step_envs(env, num_steps)
+        stats.append(count / (time.time() - start))
+    print(name, "env steps per second", round(np.mean(stats), 2), "+-",
+          round(np.std(stats), 2))
+
+
+def main(args):
+    ray.init()
+    step_time_s = args.step_time_ms / 1000
+    for envs_per_actor in [int(n) for n in args.envs_per_actor.split(",")]:
+        env = RemoteVectorEnv(
+            lambda _: CheapEnv(step_time_s),
+            args.num_envs,
+            multiagent=False,
+            remote_env_batch_wait_ms=args.batch_wait_ms,
+            num_envs_per_actor=envs_per_actor)
+        timeit("{} envs, {} per actor,".format(args.num_envs, envs_per_actor),
+               env)
+        env.stop()
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
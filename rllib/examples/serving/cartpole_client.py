@@ -17,6 +17,10 @@ parser.add_argument(
     "--off-policy",
     action="store_true",
     help="Whether to take random instead of on-policy actions.")
+parser.add_argument(
+    "--local-inference",
+    action="store_true",
+    help="Whether to compute actions with a local copy of the policy.")
 parser.add_argument(
     "--stop-at-reward",
     type=int,
@@ -26,7 +30,9 @@ parser.add_argument(
 if __name__ == "__main__":
     args = parser.parse_args()
     env = gym.make("CartPole-v0")
-    client = PolicyClient("http://localhost:9900")
+    client = PolicyClient(
+        "http://localhost:9900",
+        inference_mode="local" if args.local_inference else "remote")
 
     eid = client.start_episode(training_enabled=not args.no_train)
     obs = env.reset()
@@ -0,0 +1,114 @@
+"""Load generator for PolicyServer / PolicyClient.
+
+Runs a PolicyServer with a trivial policy, which is evaluated on the
+observations of all episodes that are ready at once, like the RLlib
+samplers do. Many concurrent client processes then query it for actions
+and the total number of actions per second is reported, along with the
+mean number of observations per policy forward pass.
+
+Run with:
+    python policy_server_benchmark.py --num-clients=32
+    python policy_server_benchmark.py --num-clients=32 \\
+        --episodes-per-client=16 --batched
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+
+from gym import spaces
+import numpy as np
+
+from ray.rllib.env.base_env import _ExternalEnvToBaseEnv
+from ray.rllib.env.external_env import ExternalEnv
+from ray.rllib.utils.policy_client import PolicyClient
+from ray.rllib.utils.policy_server import PolicyServer
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", type=int, default=9911)
+parser.add_argument("--num-clients", type=int, default=32)
+parser.add_argument(
+    "--episodes-per-client",
+    type=int,
+    default=1,
+    help="Number of concurrent episodes run by each client.")
+parser.add_argument(
+    "--batched",
+    action="store_true",
+    help="Ask for the actions of all episodes of a client with a single "
+    "get_actions() request.")
+parser.add_argument("--duration-s", type=float, default=10.0)
+
+
+class BenchServing(ExternalEnv):
+    def __init__(self, port):
+        ExternalEnv.__init__(
+            self,
+            spaces.Discrete(2),
+            spaces.Box(low=-10, high=10, shape=(4, ), dtype=np.float32),
+            max_concurrent=100000)
+        self.port = port
+
+    def run(self):
+        PolicyServer(self, "localhost", self.port).serve_forever()
+
+
+def serve(port, batch_sizes):
+    """Answers the ready episodes with a constant action, like a sampler."""
+
+    env = _ExternalEnvToBaseEnv(BenchServing(port))
+    while True:
+        obs, _, dones, _, _ = env.poll()
+        actions = {}
+        for eid, agent_obs in obs.items():
+            if not dones[eid]["__all__"]:
+                actions[eid] = {k: 0 for k in agent_obs}
+        batch_sizes.append(len(actions))
+        env.send_actions(actions)
+
+
+def run_client(port, num_episodes, batched, duration_s, counts):
+    client = PolicyClient("http://localhost:{}".format(port))
+    obs = np.zeros(4, dtype=np.float32)
+    episode_ids = [client.start_episode() for _ in range(num_episodes)]
+    count = 0
+    start = time.time()
+    while time.time() - start < duration_s:
+        if batched:
+            client.get_actions({eid: obs for eid in episode_ids})
+        else:
+            for eid in episode_ids:
+                client.get_action(eid, obs)
+        count += num_episodes
+    counts.put(count / (time.time() - start))
+
+
+def main(args):
+    batch_sizes = []
+    threading.Thread(
+        target=serve, args=(args.port, batch_sizes), daemon=True).start()
+    time.sleep(1)
+
+    counts = multiprocessing.Queue()
+    clients = [
+        multiprocessing.Process(
+            target=run_client,
+            args=(args.port, args.episodes_per_client, args.batched,
+                  args.duration_s, counts)) for _ in range(args.num_clients)
+    ]
+    for client in clients:
+        client.start()
+    actions_per_s = sum(counts.get() for _ in clients)
+    for client in clients:
+        client.join()
+
+    print("{} clients, {} episodes each, {}: {:.0f} actions/s, {:.1f} "
+          "observations per forward pass".format(
+              args.num_clients, args.episodes_per_client, "batched"
+              if args.batched else "one request per action", actions_per_s,
+              np.mean(batch_sizes)))
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
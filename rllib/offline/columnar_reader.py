@@ -0,0 +1,197 @@
+import collections
+import glob
+import json
+import logging
+import mmap
+import numpy as np
+import os
+import random
+import six
+from six.moves.urllib.parse import urlparse
+
+from ray import cloudpickle as pickle
+from ray.rllib.offline.columnar_writer import COLUMNAR_EXTENSION, \
+    RECORD_HEADER, RECORD_MAGIC
+from ray.rllib.offline.input_reader import InputReader
+from ray.rllib.offline.io_context import IOContext
+from ray.rllib.policy.sample_batch import MultiAgentBatch, SampleBatch, \
+    DEFAULT_POLICY_ID
+from ray.rllib.utils.annotations import override, PublicAPI
+
+logger = logging.getLogger(__name__)
+
+
+@PublicAPI
+class ColumnarReader(InputReader):
+    """Reader object that loads experiences from files of ColumnarWriter.
+
+    Files are memory mapped, and the columns of each batch are numpy views
+    into the mapping, so reading a batch involves no parsing or copying.
+    The mapping is copy-on-write: the arrays can be modified in memory
+    without changing the files.
+
+    The input files will be read from in an random order."""
+
+    @PublicAPI
+    def __init__(self, inputs, ioctx=None):
+        """Initialize a ColumnarReader.
+
+        Arguments:
+            inputs (str|list): either a glob expression for files, e.g.,
+                "/tmp/**/*.columnar", or a list of single local file paths.
+            ioctx (IOContext): current IO context object.
+        """
+
+        self.ioctx = ioctx or IOContext()
+        if isinstance(inputs, six.string_types):
+            inputs = os.path.abspath(os.path.expanduser(inputs))
+            if os.path.isdir(inputs):
+                inputs = os.path.join(inputs, "*" + COLUMNAR_EXTENSION)
+                logger.warning(
+                    "Treating input directory as glob pattern: {}".format(
+                        inputs))
+            self.files = glob.glob(inputs)
+        elif type(inputs) is list:
+            self.files = inputs
+        else:
+            raise ValueError(
+                "type of inputs must be list or str, not {}".format(inputs))
+        for path in self.files:
+            if urlparse(path).scheme:
+                raise ValueError(
+                    "ColumnarReader can only read local files, not {}".format(
+                        path))
+        if self.files:
+            logger.info("Found {} input files.".format(len(self.files)))
+        else:
+            raise ValueError("No files found matching {}".format(inputs))
+        self.cur_file = None
+        self.cur_records = collections.deque()
+
+    @override(InputReader)
+    def next(self):
+        tries = 0
+        while not self.cur_records and tries < 100:
+            tries += 1
+            self._open_next_file()
+        if not self.cur_records:
+            raise ValueError(
+                "Failed to read valid experience batch from files: {}".format(
+                    self.files))
+        index, data_start, _ = self.cur_records.popleft()
+        batch = _decode_record(self.cur_file, index, data_start)
+        return self._postprocess_if_needed(batch)
+
+    def _postprocess_if_needed(self, batch):
+        if not self.ioctx.config.get("postprocess_inputs"):
+            return batch
+
+        if isinstance(batch, SampleBatch):
+            out = []
+            for sub_batch in batch.split_by_episode():
+                out.append(self.ioctx.worker.policy_map[DEFAULT_POLICY_ID]
+                           .postprocess_trajectory(sub_batch))
+            return SampleBatch.concat_samples(out)
+        else:
+            raise NotImplementedError(
+                "Postprocessing of multi-agent data not implemented yet.")
+
+    def _iter_file(self, path):
+        """Yields (batch, size in bytes) for each record of a file, in order.
+
+        Used by PrefetchInput to read whole files in background threads.
+        """
+        buf = _map_file(path)
+        if buf is None:
+            return
+        for index, data_start, data_len in _read_records(buf, path):
+            yield _decode_record(buf, index, data_start), data_len
+
+    def _open_next_file(self):
+        path = random.choice(self.files)
+        # The previous mapping is closed once no batch references it.
+        self.cur_file = _map_file(path)
+        self.cur_records = collections.deque()
+        if self.cur_file is not None:
+            self.cur_records.extend(_read_records(self.cur_file, path))
+
+
+@PublicAPI
+def is_columnar_input(inputs):
+    """Returns whether `inputs` refers to files written by ColumnarWriter.
+
+    Arguments:
+        inputs (str|list): Glob expression, directory or list of files, as
+            accepted by JsonReader and ColumnarReader.
+    """
+    if isinstance(inputs, list):
+        return bool(inputs) and all(
+            p.endswith(COLUMNAR_EXTENSION) for p in inputs)
+    path = os.path.abspath(os.path.expanduser(inputs))
+    if os.path.isdir(path):
+        return bool(glob.glob(os.path.join(path, "*" + COLUMNAR_EXTENSION)))
+    return path.endswith(COLUMNAR_EXTENSION)
+
+
+def _map_file(path):
+    """Memory maps a file copy-on-write, or returns None if it is empty."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            logger.debug("Ignoring empty file {}".format(path))
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def _read_records(buf, path):
+    """Returns (index, data offset, data length) of each complete record."""
+    records = []
+    offset = 0
+    while offset < len(buf):
+        if offset + RECORD_HEADER.size > len(buf):
+            logger.warning("Ignoring truncated record in {}".format(path))
+            break
+        magic, index_len, data_len = RECORD_HEADER.unpack_from(buf, offset)
+        if magic != RECORD_MAGIC:
+            logger.warning("Ignoring corrupt data at offset {} in {}".format(
+                offset, path))
+            break
+        data_start = offset + RECORD_HEADER.size + index_len
+        if data_start + data_len > len(buf):
+            logger.warning("Ignoring truncated record in {}".format(path))
+            break
+        index = buf[offset + RECORD_HEADER.size:data_start].rstrip(b"\0")
+        records.append((json.loads(index.decode("utf-8")), data_start,
+                        data_len))
+        offset = data_start + data_len
+    return records
+
+
+def _decode_columns(buf, columns, data_start):
+    data = {}
+    for k, col in columns.items():
+        start = data_start + col["offset"]
+        if col.get("pickled"):
+            data[k] = pickle.loads(buf[start:start + col["length"]])
+        else:
+            shape = tuple(col["shape"])
+            data[k] = np.frombuffer(
+                buf,
+                dtype=np.dtype(col["dtype"]),
+                count=int(np.prod(shape)),
+                offset=start).reshape(shape)
+    return data
+
+
+def _decode_record(buf, index, data_start):
+    if index["type"] == "SampleBatch":
+        return SampleBatch(_decode_columns(buf, index["columns"], data_start))
+    elif index["type"] == "MultiAgentBatch":
+        policy_batches = {}
+        for policy_id, policy_batch in index["policy_batches"].items():
+            policy_batches[policy_id] = SampleBatch(
+                _decode_columns(buf, policy_batch["columns"], data_start))
+        return MultiAgentBatch(policy_batches, index["count"])
+    else:
+        raise ValueError(
+            "Type field must be one of ['SampleBatch', 'MultiAgentBatch']",
+            index["type"])
@@ -0,0 +1,162 @@
+from datetime import datetime
+import json
+import logging
+import numpy as np
+import os
+import struct
+from six.moves.urllib.parse import urlparse
+import time
+
+from ray import cloudpickle as pickle
+from ray.rllib.policy.sample_batch import MultiAgentBatch
+from ray.rllib.offline.io_context import IOContext
+from ray.rllib.offline.output_writer import OutputWriter
+from ray.rllib.utils.annotations import override, PublicAPI
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_EXTENSION = ".columnar"
+
+# Every record (one written batch) starts with this header, followed by the
+# JSON index of the record and then the column data, see `_encode_record`.
+# Fields: magic, length of the JSON index, length of the column data.
+RECORD_HEADER = struct.Struct("<4sIQ")
+RECORD_MAGIC = b"RLCB"
+
+# Column blocks start at file offsets that are a multiple of this, so they
+# can be viewed in place as arrays of any dtype.
+ALIGNMENT = 64
+
+
+@PublicAPI
+class ColumnarWriter(OutputWriter):
+    """Writer object that saves experiences as columnar binary files.
+
+    Each written batch becomes one record: a small JSON index describing its
+    columns followed by the raw, aligned bytes of every column array. Files
+    can be read back with ColumnarReader by memory mapping them, so batches
+    are sliced out of the file without any parsing or copying.
+
+    Columns that are not numeric arrays (e.g. infos) are pickled. Unlike
+    JsonWriter, columns are not compressed, and only local paths are
+    supported."""
+
+    @PublicAPI
+    def __init__(self, path, ioctx=None, max_file_size=64 * 1024 * 1024):
+        """Initialize a ColumnarWriter.
+
+        Arguments:
+            path (str): a path of the output directory to save files in.
+            ioctx (IOContext): current IO context object.
+            max_file_size (int): max size of single files before rolling over.
+        """
+
+        self.ioctx = ioctx or IOContext()
+        self.max_file_size = max_file_size
+        if urlparse(path).scheme:
+            raise ValueError(
+                "ColumnarWriter can only write to local paths, not {}".format(
+                    path))
+        path = os.path.abspath(os.path.expanduser(path))
+        # Try to create local dirs if they don't exist
+        try:
+            os.makedirs(path)
+        except OSError:
+            pass  # already exists
+        assert os.path.exists(path), "Failed to create {}".format(path)
+        self.path = path
+        self.file_index = 0
+        self.bytes_written = 0
+        self.cur_file = None
+
+    @override(OutputWriter)
+    def write(self, sample_batch):
+        start = time.time()
+        f = self._get_file()
+        size = 0
+        for chunk in _encode_record(sample_batch, f.tell()):
+            f.write(chunk)
+            size += len(chunk)
+        f.flush()
+        self.bytes_written += size
+        logger.debug("Wrote {} bytes to {} in {}s".format(
+            size, f,
+            time.time() - start))
+
+    def _get_file(self):
+        if not self.cur_file or self.bytes_written >= self.max_file_size:
+            if self.cur_file:
+                self.cur_file.close()
+            timestr = datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
+            path = os.path.join(
+                self.path, "output-{}_worker-{}_{}{}".format(
+                    timestr, self.ioctx.worker_index, self.file_index,
+                    COLUMNAR_EXTENSION))
+            self.cur_file = open(path, "wb")
+            self.file_index += 1
+            self.bytes_written = 0
+            logger.info("Writing to new output file {}".format(self.cur_file))
+        return self.cur_file
+
+
+def _padding(offset):
+    return b"\0" * (-offset % ALIGNMENT)
+
+
+def _encode_columns(batch, blocks, data_len):
+    columns = {}
+    for k, v in batch.data.items():
+        v = np.asarray(v)
+        if v.dtype.kind in "biufc":
+            data = np.ascontiguousarray(v).reshape(-1).view(np.uint8)
+            columns[k] = {
+                "offset": data_len,
+                "dtype": v.dtype.str,
+                "shape": list(v.shape),
+            }
+        else:
+            data = pickle.dumps(v)
+            columns[k] = {
+                "offset": data_len,
+                "length": len(data),
+                "pickled": True,
+            }
+        blocks.append(data)
+        data_len += len(data)
+        blocks.append(_padding(data_len))
+        data_len += len(blocks[-1])
+    return columns, data_len
+
+
+def _encode_record(batch, offset):
+    """Returns the chunks of bytes making up the record for a batch.
+
+    Arguments:
+        batch (SampleBatch|MultiAgentBatch): Batch to encode.
+        offset (int): File offset the record will be written at, used to
+            align the column data.
+    """
+    blocks = []
+    if isinstance(batch, MultiAgentBatch):
+        index = {"type": "MultiAgentBatch", "count": batch.count}
+        data_len = 0
+        policy_batches = {}
+        for policy_id, sub_batch in batch.policy_batches.items():
+            columns, data_len = _encode_columns(sub_batch, blocks, data_len)
+            policy_batches[policy_id] = {
+                "count": sub_batch.count,
+                "columns": columns,
+            }
+        index["policy_batches"] = policy_batches
+    else:
+        columns, data_len = _encode_columns(batch, blocks, 0)
+        index = {
+            "type": "SampleBatch",
+            "count": batch.count,
+            "columns": columns
+        }
+    index = json.dumps(index).encode("utf-8")
+    # Pad the index so that the column data starts aligned.
+    index += _padding(offset + RECORD_HEADER.size + len(index))
+    header = RECORD_HEADER.pack(RECORD_MAGIC, len(index), data_len)
+    return [header, index] + blocks
@@ -122,8 +122,25 @@ class JsonReader(InputReader):
                 self.files))
         return line
 
+    def _iter_file(self, path):
+        """Yields (batch, size in bytes) for each record of a file, in order.
+
+        Used by PrefetchInput to read whole files in background threads.
+        """
+        f = self._open_file(path)
+        try:
+            for line in f:
+                batch = self._try_parse(line)
+                if batch:
+                    yield batch, len(line)
+        finally:
+            if hasattr(f, "close"):  # legacy smart_open impls
+                f.close()
+
     def _next_file(self):
-        path = random.choice(self.files)
+        return self._open_file(random.choice(self.files))
+
+    def _open_file(self, path):
         if urlparse(path).scheme:
             if smart_open is None:
                 raise ValueError(
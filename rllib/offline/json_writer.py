@@ -96,7 +96,7 @@ class JsonWriter(OutputWriter):
 
 def _to_jsonable(v, compress):
     if compress and compression_supported():
-        return str(pack(v))
+        return pack(v, binary=False)
     elif isinstance(v, np.ndarray):
         return v.tolist()
     return v
@@ -1,7 +1,10 @@
 import numpy as np
 
+from ray.rllib.offline.columnar_reader import ColumnarReader, \
+    is_columnar_input
 from ray.rllib.offline.input_reader import InputReader
 from ray.rllib.offline.json_reader import JsonReader
+from ray.rllib.offline.prefetch_input import PrefetchInput
 from ray.rllib.utils.annotations import override, DeveloperAPI
 
 
@@ -22,7 +25,8 @@ class MixedInput(InputReader):
         """Initialize a MixedInput.
 
         Arguments:
-            dist (dict): dict mapping JSONReader paths or "sampler" to
+            dist (dict): dict mapping JSONReader / ColumnarReader paths or
+                "sampler" to
                 probabilities. The probabilities must sum to 1.0.
             ioctx (IOContext): current IO context object.
         """
@@ -30,11 +34,23 @@ class MixedInput(InputReader):
             raise ValueError("Values must sum to 1.0: {}".format(dist))
         self.choices = []
         self.p = []
-        for k, v in dist.items():
+        seed = ioctx.config.get("seed")
+        for i, (k, v) in enumerate(dist.items()):
             if k == "sampler":
                 self.choices.append(ioctx.default_sampler_input())
             else:
-                self.choices.append(JsonReader(k))
+                if is_columnar_input(k):
+                    reader = ColumnarReader(k)
+                else:
+                    reader = JsonReader(k)
+                if ioctx.config.get("input_prefetch_workers"):
+                    # Distinct for every worker and every choice.
+                    reader = PrefetchInput(
+                        reader,
+                        num_workers=ioctx.config["input_prefetch_workers"],
+                        seed=((seed + ioctx.worker_index) * len(dist) + i)
+                        if seed is not None else None)
+                self.choices.append(reader)
             self.p.append(v)
 
     @override(InputReader)
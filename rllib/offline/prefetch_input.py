@@ -0,0 +1,146 @@
+import logging
+import random
+import threading
+import time
+
+from six.moves import queue
+
+from ray.rllib.offline.input_reader import InputReader
+from ray.rllib.utils.annotations import override, DeveloperAPI
+
+logger = logging.getLogger(__name__)
+
+# Put in a file's queue after its last batch.
+_FILE_DONE = object()
+
+
+class _FileTask:
+    def __init__(self, path, maxsize):
+        self.path = path
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.num_batches = 0
+
+
+@DeveloperAPI
+class PrefetchInput(InputReader):
+    """Reads and decodes input files ahead of time in background threads.
+
+    Wraps a JsonReader or ColumnarReader. Each of `num_workers` threads reads
+    one whole file at a time into a bounded queue, so that opening files
+    (e.g. S3 round trips) and parsing them overlaps with training. Each batch
+    is taken from a random one of the files currently being read, so the
+    output interleaves up to `num_workers` files. Both the file order and
+    this choice come from a seeded RNG, which makes the order of the output
+    deterministic for a given seed.
+
+    Threads are used rather than processes, so that decoded batches don't
+    need to be serialized once more to get back to the caller.
+
+    Examples:
+        >>> reader = ShuffledInput(
+        ...     PrefetchInput(JsonReader("/tmp/*.json"), seed=1), n=10)
+    """
+
+    @DeveloperAPI
+    def __init__(self, child, num_workers=4, queue_size=64, seed=None):
+        """Initialize a PrefetchInput.
+
+        Arguments:
+            child (JsonReader|ColumnarReader): reader whose files to read.
+            num_workers (int): number of files to read in parallel.
+            queue_size (int): max number of decoded batches to buffer.
+            seed (int): seed for the file order and their interleaving.
+        """
+        self.child = child
+        self.num_workers = num_workers
+        self.file_queue_size = max(1, queue_size // num_workers)
+        self.rng = random.Random(seed)
+        self.file_order = []
+        # Files being read, each by its own thread.
+        self.pending = []
+        self.tasks = queue.Queue()
+        self.threads = []
+        self.empty_files = set()
+        self.start_time = None
+        self.num_batches = 0
+        self.num_bytes = 0
+        self.num_files = 0
+
+    @override(InputReader)
+    def next(self):
+        if not self.threads:
+            self._start()
+        while True:
+            while len(self.pending) < self.num_workers:
+                self._read_next_file()
+            task = self.rng.choice(self.pending)
+            item = task.queue.get()
+            if item is _FILE_DONE:
+                self.pending.remove(task)
+                self.num_files += 1
+                if task.num_batches == 0:
+                    self._check_not_all_empty(task.path)
+                continue
+            if isinstance(item, Exception):
+                raise item
+            batch, size = item
+            task.num_batches += 1
+            self.empty_files.clear()
+            self.num_batches += 1
+            self.num_bytes += size
+            return self.child._postprocess_if_needed(batch)
+
+    @DeveloperAPI
+    def stats(self):
+        """Returns throughput stats of the reader.
+
+        Returns:
+            dict with batches and bytes read per second since the first call
+            to next(), the number of decoded batches waiting in the queue and
+            the number of files read so far.
+        """
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+        return {
+            "batches_per_s": self.num_batches / elapsed if elapsed else 0.0,
+            "bytes_per_s": self.num_bytes / elapsed if elapsed else 0.0,
+            "queue_depth": sum(task.queue.qsize() for task in self.pending),
+            "files_read": self.num_files,
+        }
+
+    def _start(self):
+        self.start_time = time.time()
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._run, name="PrefetchInput-{}".format(i))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _read_next_file(self):
+        if not self.file_order:
+            self.file_order = list(self.child.files)
+            self.rng.shuffle(self.file_order)
+        task = _FileTask(self.file_order.pop(), self.file_queue_size)
+        self.pending.append(task)
+        self.tasks.put(task)
+
+    def _check_not_all_empty(self, path):
+        logger.debug("Ignoring empty file {}".format(path))
+        self.empty_files.add(path)
+        if len(self.empty_files) >= len(set(self.child.files)):
+            raise ValueError(
+                "Failed to read valid experience batch from files: {}".format(
+                    self.child.files))
+
+    def _run(self):
+        # There are never more pending files than threads, so every file
+        # that next() may block on is being read by some thread.
+        while True:
+            task = self.tasks.get()
+            try:
+                for item in self.child._iter_file(task.path):
+                    task.queue.put(item)
+            except Exception as e:
+                logger.exception("Error reading {}".format(task.path))
+                task.queue.put(e)
+            task.queue.put(_FILE_DONE)
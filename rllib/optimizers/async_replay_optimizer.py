@@ -17,7 +17,8 @@ from ray.rllib.evaluation.metrics import get_learner_stats
 from ray.rllib.policy.sample_batch import SampleBatch, DEFAULT_POLICY_ID, \
     MultiAgentBatch
 from ray.rllib.optimizers.policy_optimizer import PolicyOptimizer
-from ray.rllib.optimizers.replay_buffer import PrioritizedReplayBuffer
+from ray.rllib.optimizers.replay_buffer import PrioritizedReplayBuffer, \
+    SequenceReplayBuffer
 from ray.rllib.utils.annotations import override
 from ray.rllib.utils.actors import TaskPool, create_colocated
 from ray.rllib.utils.memory import ray_get_and_free
@@ -39,8 +40,8 @@ class AsyncReplayOptimizer(PolicyOptimizer):
 
     This has two modes of operation:
         - normal replay: replays independent samples.
-        - batch replay: simplified mode where entire sample batches are
-            replayed. This supports RNNs, but not prioritization.
+        - batch replay: replays sequences cut from the sample batches (or
+            entire sample batches). This supports RNNs.
 
     This optimizer requires that rollout workers return an additional
     "td_error" array in the info return of compute_gradients(). This error
@@ -59,7 +60,11 @@ class AsyncReplayOptimizer(PolicyOptimizer):
                  num_replay_buffer_shards=1,
                  max_weight_sync_delay=400,
                  debug=False,
-                 batch_replay=False):
+                 batch_replay=False,
+                 columnar_replay=False,
+                 replay_frame_stack=None,
+                 replay_sequence_length=None,
+                 replay_burn_in=0):
         """Initialize an async replay optimizer.
 
         Arguments:
@@ -78,8 +83,18 @@ class AsyncReplayOptimizer(PolicyOptimizer):
             max_weight_sync_delay (int): update the weights of a rollout worker
                 after collecting this number of timesteps from it
             debug (bool): return extra debug stats
-            batch_replay (bool): replay entire sequential batches of
-                experiences instead of sampling steps individually
+            batch_replay (bool): replay sequences of experiences instead of
+                sampling steps individually
+            columnar_replay (bool): store replay data in preallocated
+                per-column arrays (see ReplayBuffer)
+            replay_frame_stack (int): if set, observations are stacks of this
+                many frames and each frame is stored only once in replay
+            replay_sequence_length (int): in batch replay mode, length of the
+                replayed sequences. Entire sample batches are replayed if
+                not set.
+            replay_burn_in (int): in batch replay mode, number of steps at
+                the start of each sequence used to warm up the RNN state.
+                Consecutive sequences overlap by this many steps.
         """
         PolicyOptimizer.__init__(self, workers)
 
@@ -93,11 +108,7 @@ class AsyncReplayOptimizer(PolicyOptimizer):
         self.learner = LearnerThread(self.workers.local_worker())
         self.learner.start()
 
-        if self.batch_replay:
-            replay_cls = BatchReplayActor
-        else:
-            replay_cls = ReplayActor
-        self.replay_actors = create_colocated(replay_cls, [
+        replay_args = [
             num_replay_buffer_shards,
             learning_starts,
             buffer_size,
@@ -105,7 +116,18 @@ class AsyncReplayOptimizer(PolicyOptimizer):
             prioritized_replay_alpha,
             prioritized_replay_beta,
             prioritized_replay_eps,
-        ], num_replay_buffer_shards)
+            columnar_replay,
+            replay_frame_stack,
+        ]
+        if self.batch_replay:
+            replay_cls = BatchReplayActor
+            replay_args += [
+                sample_batch_size, replay_sequence_length, replay_burn_in
+            ]
+        else:
+            replay_cls = ReplayActor
+        self.replay_actors = create_colocated(replay_cls, replay_args,
+                                              num_replay_buffer_shards)
 
         # Stats
         self.timers = {
@@ -289,9 +311,16 @@ class ReplayActor:
     Ray actors are single-threaded, so for scalability multiple replay actors
     may be created to increase parallelism."""
 
-    def __init__(self, num_shards, learning_starts, buffer_size,
-                 train_batch_size, prioritized_replay_alpha,
-                 prioritized_replay_beta, prioritized_replay_eps):
+    def __init__(self,
+                 num_shards,
+                 learning_starts,
+                 buffer_size,
+                 train_batch_size,
+                 prioritized_replay_alpha,
+                 prioritized_replay_beta,
+                 prioritized_replay_eps,
+                 columnar_replay=False,
+                 replay_frame_stack=None):
         self.replay_starts = learning_starts // num_shards
         self.buffer_size = buffer_size // num_shards
         self.train_batch_size = train_batch_size
@@ -300,7 +329,10 @@ class ReplayActor:
 
         def new_buffer():
             return PrioritizedReplayBuffer(
-                self.buffer_size, alpha=prioritized_replay_alpha)
+                self.buffer_size,
+                alpha=prioritized_replay_alpha,
+                columnar=columnar_replay,
+                frame_stack=replay_frame_stack)
 
         self.replay_buffers = collections.defaultdict(new_buffer)
 
@@ -319,10 +351,8 @@ class ReplayActor:
             batch = MultiAgentBatch({DEFAULT_POLICY_ID: batch}, batch.count)
         with self.add_batch_timer:
             for policy_id, s in batch.policy_batches.items():
-                for row in s.rows():
-                    self.replay_buffers[policy_id].add(
-                        row["obs"], row["actions"], row["rewards"],
-                        row["new_obs"], row["dones"], row["weights"])
+                self.replay_buffers[policy_id].add_batch(
+                    s, weights=s["weights"])
         self.num_added += batch.count
 
     def replay(self):
@@ -374,20 +404,52 @@ class ReplayActor:
 class BatchReplayActor:
     """The batch replay version of the replay actor.
 
-    This allows for RNN models, but ignores prioritization params.
+    This allows for RNN models. Batches are cut into sequences (or kept
+    whole if replay_sequence_length is not set) that are replayed with
+    prioritization, see SequenceReplayBuffer. Sequence priorities are only
+    updated if the policy returns a per-step "td_error".
     """
 
-    def __init__(self, num_shards, learning_starts, buffer_size,
-                 train_batch_size, prioritized_replay_alpha,
-                 prioritized_replay_beta, prioritized_replay_eps):
+    def __init__(self,
+                 num_shards,
+                 learning_starts,
+                 buffer_size,
+                 train_batch_size,
+                 prioritized_replay_alpha,
+                 prioritized_replay_beta,
+                 prioritized_replay_eps,
+                 columnar_replay=False,
+                 replay_frame_stack=None,
+                 sample_batch_size=50,
+                 replay_sequence_length=None,
+                 replay_burn_in=0):
         self.replay_starts = learning_starts // num_shards
         self.buffer_size = buffer_size // num_shards
         self.train_batch_size = train_batch_size
-        self.buffer = []
+        self.prioritized_replay_beta = prioritized_replay_beta
+        self.prioritized_replay_eps = prioritized_replay_eps
+        if replay_sequence_length:
+            self.num_sequences = max(
+                1, train_batch_size // replay_sequence_length)
+            steps_per_sequence = replay_sequence_length - replay_burn_in
+        else:
+            self.num_sequences = 1
+            steps_per_sequence = sample_batch_size
+
+        def new_buffer():
+            return SequenceReplayBuffer(
+                max(1, self.buffer_size // steps_per_sequence),
+                alpha=prioritized_replay_alpha,
+                sequence_length=replay_sequence_length,
+                burn_in=replay_burn_in)
+
+        self.replay_buffers = collections.defaultdict(new_buffer)
 
         # Metrics
+        self.add_batch_timer = TimerStat()
+        self.replay_timer = TimerStat()
+        self.update_priorities_timer = TimerStat()
         self.num_added = 0
-        self.cur_size = 0
 
     def get_host(self):
         return os.uname()[1]
@@ -396,25 +458,44 @@ class BatchReplayActor:
         # Handle everything as if multiagent
         if isinstance(batch, SampleBatch):
             batch = MultiAgentBatch({DEFAULT_POLICY_ID: batch}, batch.count)
-        self.buffer.append(batch)
-        self.cur_size += batch.count
+        with self.add_batch_timer:
+            for policy_id, s in batch.policy_batches.items():
+                self.replay_buffers[policy_id].add_batch(s)
         self.num_added += batch.count
-        while self.cur_size > self.buffer_size:
-            self.cur_size -= self.buffer.pop(0).count
 
     def replay(self):
         if self.num_added < self.replay_starts:
             return None
-        return random.choice(self.buffer)
+
+        with self.replay_timer:
+            samples = {
+                policy_id: replay_buffer.sample(
+                    self.num_sequences, beta=self.prioritized_replay_beta)
+                for policy_id, replay_buffer in self.replay_buffers.items()
+            }
+            return MultiAgentBatch(samples,
+                                   max(s.count for s in samples.values()))
 
     def update_priorities(self, prio_dict):
-        pass
+        with self.update_priorities_timer:
+            for policy_id, (batch_indexes, td_errors) in prio_dict.items():
+                if batch_indexes is None or td_errors is None:
+                    continue
+                self.replay_buffers[policy_id].update_priorities(
+                    batch_indexes, td_errors, self.prioritized_replay_eps)
 
     def stats(self, debug=False):
         stat = {
-            "cur_size": self.cur_size,
+            "add_batch_time_ms": round(1000 * self.add_batch_timer.mean, 3),
+            "replay_time_ms": round(1000 * self.replay_timer.mean, 3),
+            "update_priorities_time_ms": round(
+                1000 * self.update_priorities_timer.mean, 3),
             "num_added": self.num_added,
         }
+        for policy_id, replay_buffer in self.replay_buffers.items():
+            stat.update({
+                "policy_{}".format(policy_id): replay_buffer.stats(debug=debug)
+            })
         return stat
 
 
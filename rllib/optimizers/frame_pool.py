@@ -0,0 +1,166 @@
+import numpy as np
+
+from ray.rllib.utils.annotations import DeveloperAPI
+
+# Number of trailing rows of each batch whose frames are remembered, so that
+# the next batch (typically the continuation of the same rollout) can reuse
+# them instead of storing them again.
+NUM_CARRIED_ROWS = 16
+
+
+@DeveloperAPI
+class FramePool:
+    """Stores frame-stacked observations as individual frames, each once.
+
+    Observations produced by e.g. `atari_wrappers.FrameStack` are stacks of
+    the last k frames along the last axis, so consecutive obs (and the
+    obs / new_obs of a transition) share k - 1 frames. This pool keeps every
+    distinct frame once in a circular array and represents each stacked
+    observation by the k frame serial numbers it is made of.
+
+    Frames are deduplicated by content (a cheap checksum, confirmed by an
+    exact comparison), so the encoding is exact regardless of episode
+    boundaries, n-step new_obs or the order rows arrive in.
+
+    Frame serial numbers increase monotonically. The owner of the pool must
+    pass the oldest serial it still references to `encode`, so that the
+    pool can grow instead of overwriting frames that are still in use.
+    """
+
+    def __init__(self, num_frames, initial_capacity):
+        """Initialize a frame pool.
+
+        Arguments:
+            num_frames (int): Number of frames k stacked along the last axis
+                of each observation.
+            initial_capacity (int): Number of frames to allocate space for
+                on the first insert.
+        """
+        self.num_frames = num_frames
+        self._capacity = max(initial_capacity, 2 * num_frames)
+        self._frames = None
+        self._next_serial = 0
+        self._obs_shape = None
+        # Checksum -> [(serial, frame bytes)] for the frames of the last rows
+        # added.
+        self._carried = {}
+
+    def __len__(self):
+        return min(self._next_serial, self._capacity)
+
+    @property
+    def nbytes(self):
+        if self._frames is None:
+            return 0
+        return self._frames.nbytes * len(self) // self._capacity
+
+    @property
+    def allocated_nbytes(self):
+        if self._frames is None:
+            return 0
+        return self._frames.nbytes
+
+    @property
+    def next_serial(self):
+        return self._next_serial
+
+    def encode(self, obs, new_obs, oldest_live_serial):
+        """Adds the frames of a batch of observations to the pool.
+
+        Arguments:
+            obs (np.ndarray): Stacked observations of shape [N, ..., k * c].
+            new_obs (np.ndarray): Stacked next observations, same shape.
+            oldest_live_serial (int): Smallest frame serial still referenced
+                by the caller, excluding rows this batch replaces.
+
+        Returns:
+            Tuple of two int64 arrays of shape [N, k] holding the frame
+            serials of each row of `obs` and `new_obs`.
+        """
+        count = len(obs)
+        obs = self._split(obs)
+        # Contiguous [2, N, k, P, c] copy of all frames, obs rows first.
+        frames = np.empty(
+            (2, count, self.num_frames, obs.shape[1], obs.shape[3]),
+            dtype=obs.dtype)
+        np.copyto(frames[0], obs.transpose(0, 2, 1, 3))
+        np.copyto(frames[1], self._split(new_obs).transpose(0, 2, 1, 3))
+        frames = frames.reshape((-1, ) + frames.shape[3:])
+
+        known = {fp: list(v) for fp, v in self._carried.items()}
+        serials = np.empty(len(frames), dtype=np.int64)
+        new_frames = []
+        for i, fp in enumerate(_checksums(frames).tolist()):
+            data = frames[i].tobytes()
+            for serial, other in known.get(fp, ()):
+                if data == other:
+                    serials[i] = serial
+                    break
+            else:
+                serials[i] = self._next_serial + len(new_frames)
+                new_frames.append(i)
+                known.setdefault(fp, []).append((serials[i], data))
+
+        serials = serials.reshape((2, count, self.num_frames))
+        oldest = min(oldest_live_serial, serials.min())
+        self._write(frames[new_frames], oldest)
+        self._carry(known, serials[:, -NUM_CARRIED_ROWS:])
+        return serials[0], serials[1]
+
+    def decode(self, serials):
+        """Returns the stacked observations for an [N, k] serials array."""
+        frames = self._frames[serials % self._capacity]
+        # [N, k, P, c] -> [N, P, k, c] -> [N, ..., k * c]
+        frames = np.moveaxis(frames, 1, 2)
+        return frames.reshape((len(serials), ) + self._obs_shape)
+
+    def _split(self, stacks):
+        """Views [N, ..., k * c] stacks as [N, P, k, c] without copying."""
+        stacks = np.asarray(stacks)
+        assert stacks.shape[-1] % self.num_frames == 0, \
+            ("Last obs dimension must be a multiple of the number of "
+             "stacked frames", stacks.shape, self.num_frames)
+        self._obs_shape = stacks.shape[1:]
+        return stacks.reshape((len(stacks), -1, self.num_frames,
+                               stacks.shape[-1] // self.num_frames))
+
+    def _carry(self, known, serials):
+        keep = set(serials.flatten().tolist())
+        self._carried = {}
+        for fp, entries in known.items():
+            entries = [(serial, data) for serial, data in entries
+                       if serial in keep]
+            if entries:
+                self._carried[fp] = entries
+
+    def _write(self, new_frames, oldest_live_serial):
+        if len(new_frames) == 0:
+            return
+        if self._frames is None:
+            self._frames = np.empty(
+                (self._capacity, ) + new_frames.shape[1:],
+                dtype=new_frames.dtype)
+        needed = self._next_serial + len(new_frames) - oldest_live_serial
+        if needed > self._capacity:
+            self._grow(
+                max(needed, self._capacity * 3 // 2), oldest_live_serial)
+        serials = np.arange(self._next_serial,
+                            self._next_serial + len(new_frames))
+        self._frames[serials % self._capacity] = new_frames
+        self._next_serial += len(new_frames)
+
+    def _grow(self, capacity, oldest_live_serial):
+        frames = np.empty(
+            (capacity, ) + self._frames.shape[1:], dtype=self._frames.dtype)
+        live = np.arange(oldest_live_serial, self._next_serial)
+        frames[live % capacity] = self._frames[live % self._capacity]
+        self._frames = frames
+        self._capacity = capacity
+
+
+def _checksums(frames):
+    """Cheap per-frame checksum; equal frames always have equal checksums."""
+    data = frames.reshape(len(frames), -1).view(np.uint8)
+    if data.shape[1] % 8 == 0:
+        data = data.view(np.uint64)
+    return data.sum(axis=1, dtype=np.uint64)
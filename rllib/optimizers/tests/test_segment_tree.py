@@ -95,9 +95,56 @@ def test_max_interval_tree():
     assert np.isclose(tree.min(3, 4), 3.0)
 
 
+def test_batched_set():
+    tree = SumSegmentTree(8)
+    min_tree = MinSegmentTree(8)
+    idxes = np.array([1, 6, 3, 6])
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+
+    tree.set(idxes, values)
+    min_tree.set(idxes, values)
+
+    assert np.isclose(tree.sum(), 8.0)
+    assert np.isclose(tree.sum(2, 7), 7.0)
+    assert np.isclose(min_tree.min(), 1.0)
+    assert np.isclose(min_tree.min(2, 8), 3.0)
+    assert np.allclose(tree.get([1, 3, 6]), [1.0, 3.0, 4.0])
+
+
+def test_batched_set_matches_setitem():
+    batched = SumSegmentTree(64)
+    single = SumSegmentTree(64)
+    idxes = np.random.randint(0, 64, 100)
+    values = np.random.random(100)
+
+    batched.set(idxes, values)
+    for idx, value in zip(idxes, values):
+        single[idx] = value
+
+    assert np.allclose(batched._value, single._value)
+
+
+def test_batched_prefixsum_idx():
+    tree = SumSegmentTree(4)
+
+    tree[0] = 0.5
+    tree[1] = 1.0
+    tree[2] = 1.0
+    tree[3] = 3.0
+
+    masses = [0.00, 0.55, 0.99, 1.51, 3.00, 5.50]
+    assert list(tree.find_prefixsum_idx(np.array(masses))) == \
+        [tree.find_prefixsum_idx(m) for m in masses]
+    assert list(tree.find_prefixsum_idx(np.array(masses))) == \
+        [0, 1, 1, 2, 3, 3]
+
+
 if __name__ == "__main__":
     test_tree_set()
     test_tree_set_overlap()
     test_prefixsum_idx()
     test_prefixsum_idx2()
     test_max_interval_tree()
+    test_batched_set()
+    test_batched_set_matches_setitem()
+    test_batched_prefixsum_idx()
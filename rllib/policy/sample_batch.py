@@ -3,7 +3,8 @@ import collections
 import numpy as np
 
 from ray.rllib.utils.annotations import PublicAPI, DeveloperAPI
-from ray.rllib.utils.compression import pack, unpack, is_compressed
+from ray.rllib.utils.compression import pack, unpack, unpack_rows, \
+    is_compressed
 from ray.rllib.utils.memory import concat_aligned
 
 # Default policy id for single agent environments
@@ -199,8 +200,11 @@ class SampleBatch:
                 if bulk:
                     self.data[key] = pack(self.data[key])
                 else:
-                    self.data[key] = np.array(
-                        [pack(o) for o in self.data[key]])
+                    # Object dtype: a bytes dtype array would strip trailing
+                    # null bytes from the packed data.
+                    packed = np.empty(len(self.data[key]), dtype=object)
+                    packed[:] = [pack(o) for o in self.data[key]]
+                    self.data[key] = packed
 
     @DeveloperAPI
     def decompress_if_needed(self, columns=frozenset(["obs", "new_obs"])):
@@ -210,8 +214,7 @@ class SampleBatch:
                 if is_compressed(arr):
                     self.data[key] = unpack(arr)
                 elif len(arr) > 0 and is_compressed(arr[0]):
-                    self.data[key] = np.array(
-                        [unpack(o) for o in self.data[key]])
+                    self.data[key] = unpack_rows(arr)
 
     def __str__(self):
         return "SampleBatch({})".format(str(self.data))
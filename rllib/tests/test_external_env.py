@@ -1,6 +1,8 @@
 import gym
 import numpy as np
 import random
+import threading
+import time
 import unittest
 import uuid
 
@@ -11,6 +13,8 @@ from ray.rllib.evaluation.rollout_worker import RolloutWorker
 from ray.rllib.env.external_env import ExternalEnv
 from ray.rllib.tests.test_rollout_worker import (BadPolicy, MockPolicy,
                                                  MockEnv)
+from ray.rllib.utils.policy_client import PolicyClient
+from ray.rllib.utils.policy_server import PolicyServer
 from ray.tune.registry import register_env
 
 
@@ -113,6 +117,91 @@ class MultiServing(ExternalEnv):
                     del cur_obs[i]
 
 
+class BatchedServing(ExternalEnv):
+    def __init__(self, env_creator):
+        self.env_creator = env_creator
+        self.env = env_creator()
+        ExternalEnv.__init__(self, self.env.action_space,
+                             self.env.observation_space)
+
+    def run(self):
+        envs = [self.env_creator() for _ in range(5)]
+        cur_obs = {}
+        while True:
+            for env in envs:
+                if env not in cur_obs:
+                    cur_obs[env] = (self.start_episode(), env.reset())
+            actions = self.get_actions(
+                {eid: obs
+                 for eid, obs in cur_obs.values()})
+            for env, (eid, _) in list(cur_obs.items()):
+                obs, reward, done, _ = env.step(actions[eid])
+                cur_obs[env] = (eid, obs)
+                self.log_returns(eid, reward)
+                if done:
+                    self.end_episode(eid, obs)
+                    del cur_obs[env]
+
+
+class BatchedOffPolicyServing(ExternalEnv):
+    def __init__(self, env_creator, fixed_action):
+        self.env_creator = env_creator
+        self.env = env_creator()
+        self.fixed_action = fixed_action
+        ExternalEnv.__init__(self, self.env.action_space,
+                             self.env.observation_space)
+
+    def run(self):
+        envs = [self.env_creator() for _ in range(5)]
+        cur_obs = {}
+        while True:
+            for env in envs:
+                if env not in cur_obs:
+                    cur_obs[env] = (self.start_episode(), env.reset())
+            self.log_actions({eid: obs
+                              for eid, obs in cur_obs.values()},
+                             {eid: self.fixed_action
+                              for eid, _ in cur_obs.values()})
+            for env, (eid, _) in list(cur_obs.items()):
+                obs, reward, done, _ = env.step(self.fixed_action)
+                cur_obs[env] = (eid, obs)
+                self.log_returns(eid, reward)
+                if done:
+                    self.end_episode(eid, obs)
+                    del cur_obs[env]
+
+
+class ServerServing(ExternalEnv):
+    def __init__(self, env):
+        ExternalEnv.__init__(self, env.action_space, env.observation_space)
+        self.started = threading.Event()
+        self.server = None
+
+    def run(self):
+        # Port 0 picks a free port.
+        self.server = PolicyServer(self, "localhost", 0)
+        self.started.set()
+        self.server.serve_forever()
+
+
+def _run_client(client, env, stop):
+    while not stop.is_set():
+        eid = client.start_episode()
+        obs = env.reset()
+        done = False
+        while not done:
+            action = client.get_action(eid, obs)
+            obs, reward, done, info = env.step(action)
+            client.log_returns(eid, reward, info=info)
+        client.end_episode(eid, obs)
+
+
+def _flat_weights(weights):
+    if isinstance(weights, dict):
+        weights = [weights[k] for k in sorted(weights)]
+    return np.concatenate([np.ravel(w) for w in weights])
+
+
 class TestExternalEnv(unittest.TestCase):
     def testExternalEnvCompleteEpisodes(self):
         ev = RolloutWorker(
@@ -134,6 +223,17 @@ class TestExternalEnv(unittest.TestCase):
             batch = ev.sample()
             self.assertEqual(batch.count, 40)
 
+    def testExternalEnvBatchedActions(self):
+        ev = RolloutWorker(
+            env_creator=lambda _: BatchedServing(lambda: MockEnv(25)),
+            policy=MockPolicy,
+            batch_steps=40,
+            batch_mode="complete_episodes")
+        for _ in range(3):
+            batch = ev.sample()
+            self.assertGreaterEqual(batch.count, 50)
+            self.assertEqual(batch.count % 25, 0)
+
     def testExternalEnvOffPolicy(self):
         ev = RolloutWorker(
             env_creator=lambda _: SimpleOffPolicyServing(MockEnv(25), 42),
@@ -146,6 +246,19 @@ class TestExternalEnv(unittest.TestCase):
             self.assertEqual(batch["actions"][0], 42)
             self.assertEqual(batch["actions"][-1], 42)
 
+    def testExternalEnvBatchedOffPolicy(self):
+        ev = RolloutWorker(
+            env_creator=lambda _: BatchedOffPolicyServing(
+                lambda: MockEnv(25), 42),
+            policy=MockPolicy,
+            batch_steps=40,
+            batch_mode="complete_episodes")
+        for _ in range(3):
+            batch = ev.sample()
+            self.assertGreaterEqual(batch.count, 50)
+            self.assertEqual(batch.count % 25, 0)
+            self.assertTrue(all(a == 42 for a in batch["actions"]))
+
     def testExternalEnvBadActions(self):
         ev = RolloutWorker(
             env_creator=lambda _: SimpleServing(MockEnv(25)),
@@ -195,6 +308,48 @@ class TestExternalEnv(unittest.TestCase):
                 return
         raise Exception("failed to improve reward")
 
+    def testLocalInferenceClient(self):
+        register_env("test4",
+                     lambda _: ServerServing(gym.make("CartPole-v0")))
+        pg = PGTrainer(env="test4", config={"num_workers": 0})
+        serving = pg.workers.local_worker().env
+        self.assertTrue(serving.started.wait(10))
+        port = serving.server.server_address[1]
+        client = PolicyClient(
+            "http://localhost:{}".format(port),
+            inference_mode="local",
+            update_interval=0.1)
+        initial_weights = _flat_weights(pg.get_policy().get_weights())
+        self.assertTrue(
+            np.allclose(
+                _flat_weights(client._local.policy.get_weights()),
+                initial_weights))
+
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_run_client,
+            args=(client, gym.make("CartPole-v0"), stop))
+        thread.daemon = True
+        thread.start()
+        try:
+            # The server only gets steps from the samples the client
+            # reports.
+            result = pg.train()
+            self.assertGreater(result["timesteps_total"], 0)
+            self.assertGreater(result["episodes_this_iter"], 0)
+
+            weights = _flat_weights(pg.get_policy().get_weights())
+            self.assertFalse(np.allclose(weights, initial_weights))
+            deadline = time.time() + 10
+            while not np.allclose(
+                    _flat_weights(client._local.policy.get_weights()),
+                    weights):
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            serving.server.shutdown()
+
     def testExternalEnvHorizonNotSupported(self):
         ev = RolloutWorker(
             env_creator=lambda _: SimpleServing(MockEnv(25)),
@@ -41,6 +41,28 @@ class RunningStatTest(unittest.TestCase):
             assert np.allclose(rs.mean, rs1.mean)
             assert np.allclose(rs.std, rs1.std)
 
+    def testPushBatch(self):
+        for shape in [(), (3, ), (3, 4)]:
+            rs1 = RunningStat(shape)
+            rs2 = RunningStat(shape)
+            for _ in range(3):
+                batch = np.random.randn(7, *shape)
+                for val in batch:
+                    rs1.push(val)
+                rs2.push_batch(batch)
+                self.assertEqual(rs1.n, rs2.n)
+                self.assertTrue(np.allclose(rs1.mean, rs2.mean))
+                self.assertTrue(np.allclose(rs1.var, rs2.var))
+
+    def testToArray(self):
+        for shape in [(), (3, ), (3, 4)]:
+            rs = RunningStat(shape)
+            rs.push_batch(np.random.randn(5, *shape))
+            rs2 = RunningStat.from_array(rs.to_array(), shape)
+            self.assertEqual(rs2.n, 5)
+            self.assertTrue(np.allclose(rs.mean, rs2.mean))
+            self.assertTrue(np.allclose(rs.var, rs2.var))
+
 
 class MSFTest(unittest.TestCase):
     def testBasic(self):
@@ -68,6 +90,28 @@ class MSFTest(unittest.TestCase):
             self.assertEqual(filt.buffer.n, 5)
             self.assertEqual(filt.rs.n, 15)
 
+            filt.apply_delta(filt2.as_delta())
+            self.assertEqual(filt.buffer.n, 5)
+            self.assertEqual(filt.rs.n, 20)
+
+    def testVectorized(self):
+        for shape in [(), (3, ), (3, 4, 4)]:
+            filt = MeanStdFilter(shape)
+            filt2 = MeanStdFilter(shape)
+            batch = np.random.randn(6, *shape)
+            for val in batch:
+                filt(val)
+            out = filt2(batch)
+            self.assertEqual(out.shape, batch.shape)
+            self.assertEqual(filt2.rs.n, 6)
+            self.assertEqual(filt2.buffer.n, 6)
+            self.assertTrue(np.allclose(filt.rs.mean, filt2.rs.mean))
+            self.assertTrue(np.allclose(filt.rs.std, filt2.rs.std))
+            self.assertTrue(
+                np.allclose(filt2(batch, update=False), [
+                    filt(val, update=False) for val in batch
+                ]))
+
 
 class FilterManagerTest(unittest.TestCase):
     def setUp(self):
@@ -12,9 +12,11 @@ import unittest
 import ray
 from ray.rllib.agents.pg import PGTrainer
 from ray.rllib.agents.pg.pg_tf_policy import PGTFPolicy
-from ray.rllib.offline import IOContext, JsonWriter, JsonReader
+from ray.rllib.offline import IOContext, JsonWriter, JsonReader, \
+    ColumnarWriter, ColumnarReader, MixedInput, PrefetchInput, \
+    ShuffledInput, is_columnar_input
 from ray.rllib.offline.json_writer import _to_json
-from ray.rllib.policy.sample_batch import SampleBatch
+from ray.rllib.policy.sample_batch import SampleBatch, MultiAgentBatch
 from ray.rllib.tests.test_multi_agent_env import MultiCartpole
 from ray.tune.registry import register_env
 
@@ -71,6 +73,26 @@ class AgentIOTest(unittest.TestCase):
         self.assertEqual(result["timesteps_total"], 250)  # read from input
         self.assertTrue(np.isnan(result["episode_reward_mean"]))
 
+    def testAgentColumnarOutputAndInput(self):
+        PGTrainer(
+            env="CartPole-v0",
+            config={
+                "output": self.test_dir,
+                "output_format": "columnar",
+                "sample_batch_size": 250,
+            }).train()
+        self.assertEqual(
+            len(glob.glob(self.test_dir + "/output-*.columnar")), 1)
+        agent = PGTrainer(
+            env="CartPole-v0",
+            config={
+                "input": self.test_dir,
+                "input_evaluation": [],
+            })
+        result = agent.train()
+        self.assertEqual(result["timesteps_total"], 250)  # read from input
+        self.assertTrue(np.isnan(result["episode_reward_mean"]))
+
     def testSplitByEpisode(self):
         splits = SAMPLES.split_by_episode()
         self.assertEqual(len(splits), 3)
@@ -323,6 +345,144 @@ class JsonIOTest(unittest.TestCase):
         self.assertRaises(ValueError, lambda: reader.next())
 
 
+class ColumnarIOTest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def testReadWrite(self):
+        writer = ColumnarWriter(self.test_dir, max_file_size=5000)
+        for i in range(100):
+            writer.write(make_sample_batch(i))
+        self.assertGreater(len(os.listdir(self.test_dir)), 1)
+        self.assertTrue(is_columnar_input(self.test_dir))
+        reader = ColumnarReader(self.test_dir)
+        seen_a = set()
+        for i in range(1000):
+            batch = reader.next()
+            self.assertEqual(batch["obs"].dtype, np.int64)
+            seen_a.add(batch["actions"][0])
+        self.assertGreater(len(seen_a), 90)
+        self.assertLess(len(seen_a), 101)
+
+    def testRoundTrip(self):
+        obs = np.random.random((4, 3, 2)).astype(np.float32)
+        batch = SampleBatch({
+            "obs": obs,
+            "dones": np.array([False, False, True, False]),
+            "infos": [{
+                "a": i
+            } for i in range(4)],
+        })
+        multi = MultiAgentBatch({"p0": SAMPLES, "p1": batch}, 8)
+        writer = ColumnarWriter(self.test_dir)
+        writer.write(batch)
+        writer.write(multi)
+        writer.cur_file.close()
+        path = glob.glob(self.test_dir + "/*.columnar")[0]
+        reader = ColumnarReader([path])
+        out = reader.next()
+        self.assertTrue(np.array_equal(out["obs"], obs))
+        self.assertTrue(np.array_equal(out["dones"], batch["dones"]))
+        self.assertEqual(list(out["infos"]), list(batch["infos"]))
+        # Columns are copy-on-write views of the file.
+        out["obs"][0] = 0
+        out = reader.next()
+        self.assertEqual(out.count, 8)
+        self.assertTrue(
+            np.array_equal(out.policy_batches["p0"]["actions"],
+                           SAMPLES["actions"]))
+        self.assertEqual(out.policy_batches["p1"].count, 4)
+        out = reader.next()
+        self.assertTrue(np.array_equal(out["obs"], obs))
+
+    def testSkipsTruncatedRecordsAndEmptyFiles(self):
+        writer = ColumnarWriter(self.test_dir)
+        writer.write(make_sample_batch(0))
+        writer.write(make_sample_batch(1))
+        writer.cur_file.close()
+        path = glob.glob(self.test_dir + "/*.columnar")[0]
+        with open(path, "rb+") as f:
+            f.truncate(os.path.getsize(path) - 8)
+        open(self.test_dir + "/empty.columnar", "w").close()
+        reader = ColumnarReader(self.test_dir)
+        seen_a = set()
+        for i in range(10):
+            seen_a.add(reader.next()["actions"][0])
+        self.assertEqual(seen_a, {0})
+
+    def testAbortOnAllEmptyInputs(self):
+        open(self.test_dir + "/empty.columnar", "w").close()
+        reader = ColumnarReader([self.test_dir + "/empty.columnar"])
+        self.assertRaises(ValueError, lambda: reader.next())
+
+
+class PrefetchInputTest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for writer_cls in [JsonWriter, ColumnarWriter]:
+            writer = writer_cls(self.test_dir, max_file_size=500)
+            for i in range(100):
+                writer.write(make_sample_batch(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def readActions(self, reader, n):
+        return [reader.next()["actions"][0] for _ in range(n)]
+
+    def testReadsAllBatches(self):
+        for reader in [
+                JsonReader(self.test_dir + "/*.json"),
+                ColumnarReader(self.test_dir)
+        ]:
+            reader = PrefetchInput(reader, num_workers=3, seed=0)
+            # Files of the next pass over the inputs may be started before
+            # all of the current pass are done.
+            self.assertEqual(
+                set(self.readActions(reader, 150)), set(range(100)))
+            stats = reader.stats()
+            self.assertGreater(stats["batches_per_s"], 0)
+            self.assertGreater(stats["bytes_per_s"], 0)
+            self.assertGreater(stats["files_read"], 0)
+            self.assertLessEqual(stats["queue_depth"], 64)
+
+    def testSeededOrder(self):
+        def read(seed):
+            return self.readActions(
+                PrefetchInput(
+                    JsonReader(self.test_dir + "/*.json"), seed=seed), 150)
+
+        self.assertEqual(read(1), read(1))
+        self.assertNotEqual(read(1), read(2))
+
+    def testMixedInputSeededOrder(self):
+        def read(seed):
+            ioctx = IOContext(self.test_dir, {
+                "seed": seed,
+                "input_prefetch_workers": 2
+            }, 1, None)
+            return self.readActions(
+                MixedInput({
+                    self.test_dir + "/*.json": 1.0
+                }, ioctx), 150)
+
+        self.assertEqual(read(1), read(1))
+        self.assertNotEqual(read(1), read(2))
+
+    def testComposesWithShuffledInput(self):
+        reader = ShuffledInput(
+            PrefetchInput(ColumnarReader(self.test_dir), num_workers=2), 10)
+        self.assertLess(max(self.readActions(reader, 50)), 100)
+
+    def testAbortOnAllEmptyInputs(self):
+        open(self.test_dir + "/empty", "w").close()
+        reader = PrefetchInput(JsonReader([self.test_dir + "/empty"]))
+        self.assertRaises(ValueError, lambda: reader.next())
+
+
 if __name__ == "__main__":
     ray.init(num_cpus=1)
     unittest.main(verbosity=2)
@@ -375,6 +375,26 @@ class TestMultiAgentEnv(unittest.TestCase):
         batch = ev.sample()
         self.assertEqual(batch.count, 200)
 
+    def testMultiAgentSampleGroupedRemote(self):
+        # Allow to be run via Unittest.
+        ray.init(num_cpus=4, ignore_reinit_error=True)
+        act_space = gym.spaces.Discrete(2)
+        obs_space = gym.spaces.Discrete(2)
+        ev = RolloutWorker(
+            env_creator=lambda _: BasicMultiAgent(5),
+            policy={
+                "p0": (MockPolicy, obs_space, act_space, {}),
+                "p1": (MockPolicy, obs_space, act_space, {}),
+            },
+            policy_mapping_fn=lambda agent_id: "p{}".format(agent_id % 2),
+            batch_steps=50,
+            num_envs=5,
+            remote_worker_envs=True,
+            num_envs_per_remote_actor=2)
+        batch = ev.sample()
+        self.assertEqual(batch.count, 250)
+        self.assertEqual(len(ev.async_env.actors), 3)
+
     def testMultiAgentSampleWithHorizon(self):
         act_space = gym.spaces.Discrete(2)
         obs_space = gym.spaces.Discrete(2)
@@ -51,6 +51,13 @@ class BadPolicy(MockPolicy):
         raise Exception("intentional error")
 
 
+class RecordObsBatchPolicy(MockPolicy):
+    def compute_actions(self, obs_batch, *args, **kwargs):
+        self.obs_batch_types = getattr(self, "obs_batch_types", set())
+        self.obs_batch_types.add(type(obs_batch))
+        return MockPolicy.compute_actions(self, obs_batch, *args, **kwargs)
+
+
 class FailOnStepEnv(gym.Env):
     def __init__(self):
         self.observation_space = gym.spaces.Discrete(1)
@@ -80,6 +87,24 @@ class MockEnv(gym.Env):
         return 0, 1, self.i >= self.episode_length, {}
 
 
+class MockBoxEnv(gym.Env):
+    def __init__(self, episode_length):
+        self.episode_length = episode_length
+        self.i = 0
+        self.observation_space = gym.spaces.Box(
+            0, episode_length, (2, ), dtype=np.float32)
+        self.action_space = gym.spaces.Discrete(2)
+
+    def reset(self):
+        self.i = 0
+        return np.full(2, self.i, dtype=np.float32)
+
+    def step(self, action):
+        self.i += 1
+        return np.full(2, self.i, dtype=np.float32), 1, \
+            self.i >= self.episode_length, {}
+
+
 class MockEnv2(gym.Env):
     def __init__(self, episode_length):
         self.episode_length = episode_length
@@ -361,6 +386,24 @@ class TestRolloutWorker(unittest.TestCase):
         result = collect_metrics(ev, [])
         self.assertEqual(result["episodes_this_iter"], 8)
 
+    def test_vector_env_obs_buffer(self):
+        ev = RolloutWorker(
+            env_creator=lambda _: MockBoxEnv(episode_length=5),
+            policy=RecordObsBatchPolicy,
+            batch_mode="truncate_episodes",
+            batch_steps=7,
+            num_envs=4,
+            vector_env_obs_buffer=True)
+        for _ in range(8):
+            batch = ev.sample()
+            self.assertEqual(batch.count, 28)
+            # Obs kept for the batches must not be overwritten by later steps.
+            self.assertTrue(np.all(batch["new_obs"] == batch["obs"] + 1))
+        self.assertIn(np.ndarray, ev.get_policy().obs_batch_types)
+        # Arrays are reused once the batches referencing them are built.
+        obs_buffers = ev.async_env.vector_env.obs_buffers
+        self.assertLess(len(obs_buffers.arrays), obs_buffers.num_writes)
+
     def test_truncate_episodes(self):
         ev = RolloutWorker(
             env_creator=lambda _: MockEnv(10),
@@ -0,0 +1,99 @@
+import gym
+import numpy as np
+import time
+import unittest
+
+import ray
+from ray.rllib.env.subprocess_vector_env import SubprocVectorEnv
+from ray.rllib.evaluation.rollout_worker import RolloutWorker
+from ray.rllib.tests.test_rollout_worker import MockBoxEnv, MockPolicy
+
+
+class CounterEnv(gym.Env):
+    """Observes its env index and step count, steps slower for higher ids."""
+
+    def __init__(self, env_index, step_time_s=0.0):
+        self.env_index = env_index
+        self.step_time_s = step_time_s
+        self.t = 0
+        self.observation_space = gym.spaces.Box(
+            0, 1000, (2, ), dtype=np.float32)
+        self.action_space = gym.spaces.Discrete(2)
+
+    def reset(self):
+        self.t = 0
+        return np.array([self.env_index, self.t], dtype=np.float32)
+
+    def step(self, action):
+        time.sleep(self.step_time_s * self.env_index)
+        if action == "fail":
+            raise ValueError("intentional error")
+        self.t += 1
+        return np.array([self.env_index, self.t], dtype=np.float32), \
+            action, self.t >= 10, {"t": self.t}
+
+
+def make_vector_env(num_envs, step_time_s=0.0):
+    env = CounterEnv(0)
+    return SubprocVectorEnv(
+        lambda i: CounterEnv(i, step_time_s),
+        num_envs,
+        action_space=env.action_space,
+        observation_space=env.observation_space)
+
+
+class TestSubprocVectorEnv(unittest.TestCase):
+    def test_vector_step(self):
+        env = make_vector_env(3)
+        obs = env.vector_reset()
+        self.assertEqual(obs.tolist(), [[0, 0], [1, 0], [2, 0]])
+        obs, rewards, dones, infos = env.vector_step([1, 2, 3])
+        self.assertEqual(obs.tolist(), [[0, 1], [1, 1], [2, 1]])
+        self.assertEqual(rewards, [1, 2, 3])
+        self.assertEqual(dones, [False, False, False])
+        self.assertEqual(infos, [{"t": 1}] * 3)
+        # Obs returned earlier are not changed by later steps.
+        env.vector_step([0, 0, 0])
+        self.assertEqual(obs.tolist(), [[0, 1], [1, 1], [2, 1]])
+        self.assertEqual(env.reset_at(1).tolist(), [1, 0])
+        env.close()
+
+    def test_wait_for_first_ready(self):
+        env = make_vector_env(3, step_time_s=0.5)
+        env.vector_reset()
+        env.step_async({0: 0, 1: 0, 2: 0})
+        ready = env.wait(min_ready=1)
+        self.assertEqual(list(ready), [0])
+        self.assertEqual(ready[0][0].tolist(), [0, 1])
+        # The slow envs can be waited for while the fast one keeps stepping.
+        env.step_async({0: 0})
+        ready = env.wait()
+        self.assertEqual(sorted(ready), [0, 1, 2])
+        self.assertEqual(ready[0][0].tolist(), [0, 2])
+        env.close()
+
+    def test_env_error(self):
+        env = make_vector_env(2)
+        env.vector_reset()
+        self.assertRaises(RuntimeError,
+                          lambda: env.vector_step(["fail", "fail"]))
+
+    def test_rollout_worker(self):
+        ev = RolloutWorker(
+            env_creator=lambda _: MockBoxEnv(episode_length=5),
+            policy=MockPolicy,
+            batch_mode="truncate_episodes",
+            batch_steps=5,
+            num_envs=4,
+            subprocess_worker_envs=True,
+            subprocess_env_min_ready=2)
+        for _ in range(4):
+            batch = ev.sample()
+            self.assertGreaterEqual(batch.count, 20)
+            self.assertTrue(np.all(batch["new_obs"] == batch["obs"] + 1))
+        ev.stop()
+
+
+if __name__ == "__main__":
+    ray.init(num_cpus=4)
+    unittest.main(verbosity=2)
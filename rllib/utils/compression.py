@@ -3,6 +3,7 @@ from ray.rllib.utils.annotations import DeveloperAPI
 import logging
 import time
 import base64
+import struct
 import numpy as np
 from ray import cloudpickle as pickle
 from six import string_types
@@ -18,6 +19,12 @@ except ImportError:
                    "To install lz4, run `pip install lz4`.")
     LZ4_ENABLED = False
 
+# Prefix of arrays packed in the binary format. Never a valid start of an LZ4
+# frame (magic 04 22 4D 18) or a base64 string, so formats can be told apart.
+_ARRAY_MAGIC = b"\x93RLA"
+# Magic, dtype string length, number of dimensions.
+_ARRAY_HEADER = struct.Struct("<4sBB")
+
 
 @DeveloperAPI
 def compression_supported():
@@ -25,13 +32,27 @@ def compression_supported():
 
 
 @DeveloperAPI
-def pack(data):
+def pack(data, binary=True):
+    """Compresses data with LZ4.
+
+    Numeric numpy arrays are packed in a binary format: a small header with
+    the dtype and shape followed by an LZ4 frame of the raw array buffer, so
+    neither pickling nor base64 is needed. Other objects are pickled first.
+
+    Arguments:
+        data (obj): Object to compress.
+        binary (bool): If False, return the legacy pickled, base64 encoded
+            ASCII string instead of bytes, e.g. for text formats like JSON.
+    """
     if LZ4_ENABLED:
-        data = pickle.dumps(data)
-        data = lz4.frame.compress(data)
-        # TODO(ekl) we shouldn't need to base64 encode this data, but this
-        # seems to not survive a transfer through the object store if we don't.
-        data = base64.b64encode(data).decode("ascii")
+        if not binary:
+            data = pickle.dumps(data)
+            data = lz4.frame.compress(data)
+            data = base64.b64encode(data).decode("ascii")
+        elif isinstance(data, np.ndarray) and data.dtype.kind in "biufc":
+            data = _pack_array(data)
+        else:
+            data = lz4.frame.compress(pickle.dumps(data))
     return data
 
 
@@ -43,14 +64,46 @@ def pack_if_needed(data):
 
 
 @DeveloperAPI
-def unpack(data):
+def unpack(data, out=None):
+    """Decompresses data produced by `pack`, in either format.
+
+    Arguments:
+        data (bytes|str): Packed data.
+        out (np.ndarray): Optional preallocated array of the right shape and
+            dtype to copy the decompressed array into. The data is still
+            decompressed into a temporary buffer first, since lz4.frame
+            can't decompress into existing memory.
+    """
     if LZ4_ENABLED:
-        data = base64.b64decode(data)
+        if isinstance(data, string_types):
+            data = base64.b64decode(data)
+        if data[:len(_ARRAY_MAGIC)] == _ARRAY_MAGIC:
+            return _unpack_array(data, out)
         data = lz4.frame.decompress(data)
         data = pickle.loads(data)
+    if out is not None:
+        out[...] = data
+        return out
     return data
 
 
+@DeveloperAPI
+def unpack_rows(packed):
+    """Decompresses a sequence of packed arrays into one stacked array.
+
+    The result is allocated once from the first row's shape and dtype, and
+    every row is copied into its slot once decompressed, instead of
+    stacking a list of the decompressed rows.
+    """
+    first = unpack(packed[0])
+    out = np.empty(
+        (len(packed), ) + np.shape(first), dtype=np.asarray(first).dtype)
+    out[0] = first
+    for i in range(1, len(packed)):
+        unpack(packed[i], out=out[i])
+    return out
+
+
 @DeveloperAPI
 def unpack_if_needed(data):
     if is_compressed(data):
@@ -63,26 +116,58 @@ def is_compressed(data):
     return isinstance(data, bytes) or isinstance(data, string_types)
 
 
-# Intel(R) Core(TM) i7-4600U CPU @ 2.10GHz
-# Compression speed: 753.664 MB/s
-# Compression ratio: 87.4839812046
-# Decompression speed: 910.9504 MB/s
+def _pack_array(array):
+    if not array.flags["C_CONTIGUOUS"]:
+        array = array.copy()
+    dtype = array.dtype.str.encode("ascii")
+    header = _ARRAY_HEADER.pack(_ARRAY_MAGIC, len(dtype), array.ndim)
+    shape = struct.pack("<{}q".format(array.ndim), *array.shape)
+    # Compress straight from the array's memory, viewed as raw bytes.
+    payload = lz4.frame.compress(array.reshape(-1).view(np.uint8))
+    return b"".join([header, dtype, shape, payload])
+
+
+def _unpack_array(data, out):
+    _, dtype_len, ndim = _ARRAY_HEADER.unpack_from(data)
+    offset = _ARRAY_HEADER.size
+    dtype = np.dtype(data[offset:offset + dtype_len].decode("ascii"))
+    offset += dtype_len
+    shape = struct.unpack_from("<{}q".format(ndim), data, offset)
+    offset += 8 * ndim
+    # A bytearray is mutable, so the array can wrap it without a copy and
+    # still be writeable.
+    buf = lz4.frame.decompress(
+        memoryview(data)[offset:], return_bytearray=True)
+    array = np.frombuffer(buf, dtype=dtype).reshape(shape)
+    if out is None:
+        return array
+    np.copyto(out, array)
+    return out
+
+
+# 32x80x80x4 float64 ones, single core, MB/s of uncompressed data:
+#                  compress  ratio  decompress  decompress (preallocated)
+#   base64/pickle    1815     177      1055        963
+#   binary          12924     237      1291       1153
 if __name__ == "__main__":
     size = 32 * 80 * 80 * 4
     data = np.ones(size).reshape((32, 80, 80, 4))
-
-    count = 0
-    start = time.time()
-    while time.time() - start < 1:
-        pack(data)
-        count += 1
-    compressed = pack(data)
-    print("Compression speed: {} MB/s".format(count * size * 4 / 1e6))
-    print("Compression ratio: {}".format(round(size * 4 / len(compressed), 2)))
-
-    count = 0
-    start = time.time()
-    while time.time() - start < 1:
-        unpack(compressed)
-        count += 1
-    print("Decompression speed: {} MB/s".format(count * size * 4 / 1e6))
+    out = np.empty_like(data)
+
+    def bench(name, fn):
+        count = 0
+        start = time.time()
+        while time.time() - start < 1:
+            fn()
+            count += 1
+        print("{}: {} MB/s".format(name, round(count * data.nbytes / 1e6, 1)))
+
+    for binary in [False, True]:
+        print("== {} format".format("binary" if binary else "base64"))
+        compressed = pack(data, binary=binary)
+        bench("Compression speed", lambda: pack(data, binary=binary))
+        print("Compression ratio: {}".format(
+            round(data.nbytes / len(compressed), 2)))
+        bench("Decompression speed", lambda: unpack(compressed))
+        bench("Decompression speed (preallocated)",
+              lambda: unpack(compressed, out=out))
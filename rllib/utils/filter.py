@@ -31,6 +31,18 @@ class Filter:
     def as_serializable(self):
         raise NotImplementedError
 
+    def as_delta(self):
+        """Returns the accumulated state as compact arrays.
+
+        This is the part of as_serializable() that apply_delta() needs, and
+        is cheaper to ship from remote workers.
+        """
+        raise NotImplementedError
+
+    def apply_delta(self, delta):
+        """Updates self with a delta from as_delta() of another filter."""
+        raise NotImplementedError
+
 
 class NoFilter(Filter):
     is_concurrent = True
@@ -59,6 +71,12 @@ class NoFilter(Filter):
     def as_serializable(self):
         return self
 
+    def as_delta(self):
+        return None
+
+    def apply_delta(self, delta):
+        pass
+
 
 # http://www.johndcook.com/blog/standard_deviation/
 class RunningStat:
@@ -90,6 +108,39 @@ class RunningStat:
             self._M[...] += delta / self._n
             self._S[...] += delta * delta * n1 / self._n
 
+    def push_batch(self, x):
+        """Vectorized version of push() for a batch of inputs [N, ...]."""
+        self.update(RunningStat.from_batch(x, self.shape))
+
+    @staticmethod
+    def from_batch(x, shape):
+        """Creates the statistics of a batch of inputs [N, ...]."""
+        x = np.asarray(x)
+        stat = RunningStat(shape)
+        if x.shape[1:] != stat.shape:
+            raise ValueError(
+                "Unexpected input shape {}, expected (N, ) + {}".format(
+                    x.shape, stat.shape))
+        if x.shape[0] > 0:
+            stat._n = x.shape[0]
+            stat._M = np.mean(x, axis=0, dtype=np.float64)
+            stat._S = np.sum(np.square(x - stat._M), axis=0)
+        return stat
+
+    def to_array(self):
+        """Packs n, mean and sum of squares into one flat array."""
+        return np.concatenate([[self._n], self._M.ravel(), self._S.ravel()])
+
+    @staticmethod
+    def from_array(array, shape):
+        """Unpacks the statistics of to_array()."""
+        stat = RunningStat(shape)
+        size = stat._M.size
+        stat._n = int(array[0])
+        stat._M = array[1:1 + size].reshape(shape)
+        stat._S = array[1 + size:].reshape(shape)
+        return stat
+
     def update(self, other):
         n1 = self._n
         n2 = other._n
@@ -176,6 +227,10 @@ class MeanStdFilter(Filter):
         if with_buffer:
             self.buffer = other.buffer.copy()
 
+    def apply_delta(self, delta):
+        """Applies a buffer from as_delta() of another filter."""
+        self.rs.update(RunningStat.from_array(delta, self.shape))
+
     def copy(self):
         """Returns a copy of Filter."""
         other = MeanStdFilter(self.shape)
@@ -185,6 +240,9 @@ class MeanStdFilter(Filter):
     def as_serializable(self):
         return self.copy()
 
+    def as_delta(self):
+        return self.buffer.to_array()
+
     def sync(self, other):
         """Syncs all fields together from other filter.
 
@@ -213,10 +271,10 @@ class MeanStdFilter(Filter):
         x = np.asarray(x)
         if update:
             if len(x.shape) == len(self.rs.shape) + 1:
-                # The vectorized case.
-                for i in range(x.shape[0]):
-                    self.rs.push(x[i])
-                    self.buffer.push(x[i])
+                # The vectorized case, merges the statistics of the batch.
+                batch = RunningStat.from_batch(x, self.shape)
+                self.rs.update(batch)
+                self.buffer.update(batch)
             else:
                 # The unvectorized case.
                 self.rs.push(x)
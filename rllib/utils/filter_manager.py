@@ -15,17 +15,21 @@ class FilterManager:
         """Aggregates all filters from remote evaluators.
 
         Local copy is updated and then broadcasted to all remote evaluators.
+        Only the deltas accumulated by the remote filters since the last
+        synchronization are fetched, as compact arrays.
 
         Args:
             local_filters (dict): Filters to be synchronized.
             remotes (list): Remote evaluators with filters.
             update_remote (bool): Whether to push updates to remote filters.
         """
-        remote_filters = ray_get_and_free(
-            [r.get_filters.remote(flush_after=True) for r in remotes])
-        for rf in remote_filters:
+        remote_deltas = ray_get_and_free([
+            r.get_filters.remote(flush_after=True, deltas=True)
+            for r in remotes
+        ])
+        for rd in remote_deltas:
             for k in local_filters:
-                local_filters[k].apply_changes(rf[k], with_buffer=False)
+                local_filters[k].apply_delta(rd[k])
         if update_remote:
             copies = {k: v.as_serializable() for k, v in local_filters.items()}
             remote_copy = ray.put(copies)
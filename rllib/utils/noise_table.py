@@ -0,0 +1,143 @@
+import collections
+import time
+
+import numpy as np
+
+import ray
+
+# The noise is generated in blocks, each from its own seeded generator, so
+# that any part of the table can be regenerated without the ones before it.
+NOISE_BLOCK_SIZE = 1 << 20
+
+
+def _noise_block(seed, block):
+    noise = np.random.RandomState([seed, block]).randn(NOISE_BLOCK_SIZE)
+    return noise.astype(np.float32)
+
+
+@ray.remote
+def create_shared_noise(count, seed=123):
+    """Create a large array of noise to be shared by all workers.
+
+    The array is stored once in the object store. Workers that are passed its
+    object ID all map the same read-only copy of their node.
+    """
+    noise = np.empty(count, dtype=np.float32)
+    for block in range((count + NOISE_BLOCK_SIZE - 1) // NOISE_BLOCK_SIZE):
+        start = block * NOISE_BLOCK_SIZE
+        end = min(start + NOISE_BLOCK_SIZE, count)
+        noise[start:end] = _noise_block(seed, block)[:end - start]
+    return noise
+
+
+class SharedNoiseTable:
+    """Table of Gaussian noise, from which perturbations are sliced."""
+
+    def __init__(self, noise):
+        self.noise = noise
+        assert self.noise.dtype == np.float32
+
+    def __len__(self):
+        return len(self.noise)
+
+    def get(self, i, dim):
+        return self.noise[i:i + dim]
+
+    def get_batch(self, indices, dim):
+        """Returns the noise vectors at indices as an array [N, dim]."""
+        windows = np.lib.stride_tricks.as_strided(
+            self.noise,
+            shape=(len(self.noise) - dim + 1, dim),
+            strides=(self.noise.strides[0], ) * 2,
+            writeable=False)
+        return windows[np.asarray(indices, dtype=np.int64)]
+
+    def sample_index(self, dim):
+        return np.random.randint(0, len(self) - dim + 1)
+
+    def weighted_sum(self, weights, indices, dim, batch_size=500):
+        """Sums the noise vectors at indices, weighted by weights.
+
+        Returns:
+            total (np.ndarray): Weighted sum of shape [dim].
+            count (int): Number of vectors summed.
+        """
+        weights = np.asarray(weights, dtype=np.float32)
+        total = np.zeros(dim, dtype=np.float32)
+        for start in range(0, len(indices), batch_size):
+            total += np.dot(weights[start:start + batch_size],
+                            self.get_batch(
+                                indices[start:start + batch_size], dim))
+        return total, len(indices)
+
+
+class LazyNoiseTable(SharedNoiseTable):
+    """Noise table that regenerates its blocks when they are read.
+
+    It holds the same values as create_shared_noise() with the same count and
+    seed, without keeping the whole table in memory. The most recently used
+    `max_cached_blocks` blocks (4MB each) are cached.
+
+    Perturbations are read at uniformly random offsets, so a read misses the
+    cache with probability 1 - max_cached_blocks / num_blocks: about 70% for
+    the default 64 of the ~239 blocks of a 250M table. Every miss
+    regenerates a block of NOISE_BLOCK_SIZE floats, which takes a few
+    milliseconds. This is cheap next to the rollouts of a perturbation, but
+    for small models and short episodes it is worth raising the cache size
+    (see the benchmark in __main__).
+    """
+
+    def __init__(self, count, seed=123, max_cached_blocks=64):
+        self.count = count
+        self.seed = seed
+        self.max_cached_blocks = max_cached_blocks
+        self._blocks = collections.OrderedDict()
+
+    def __len__(self):
+        return self.count
+
+    def get(self, i, dim):
+        first = i // NOISE_BLOCK_SIZE
+        last = (i + dim - 1) // NOISE_BLOCK_SIZE
+        offset = i - first * NOISE_BLOCK_SIZE
+        if first == last:
+            return self._block(first)[offset:offset + dim]
+        blocks = [self._block(block) for block in range(first, last + 1)]
+        return np.concatenate(blocks)[offset:offset + dim]
+
+    def get_batch(self, indices, dim):
+        batch = np.empty((len(indices), dim), dtype=np.float32)
+        # Reads the indices in order, so each block is generated once.
+        for row in np.argsort(indices, kind="stable"):
+            batch[row] = self.get(indices[row], dim)
+        return batch
+
+    def _block(self, block):
+        if block in self._blocks:
+            self._blocks.move_to_end(block)
+            return self._blocks[block]
+        noise = _noise_block(self.seed, block)
+        noise.flags.writeable = False
+        self._blocks[block] = noise
+        if len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+        return noise
+
+
+if __name__ == "__main__":
+    count = 250000000
+    dim = 10000
+    num_blocks = (count + NOISE_BLOCK_SIZE - 1) // NOISE_BLOCK_SIZE
+    for max_cached_blocks in [16, 64, 128, num_blocks]:
+        noise = LazyNoiseTable(count, max_cached_blocks=max_cached_blocks)
+        # Warm up the cache.
+        for _ in range(max_cached_blocks * 4):
+            noise.get(noise.sample_index(dim), dim)
+        reads = 0
+        start = time.time()
+        while time.time() - start < 3:
+            noise.get(noise.sample_index(dim), dim)
+            reads += 1
+        print("{} of {} blocks cached: {:.2f}ms per read".format(
+            max_cached_blocks, num_blocks,
+            (time.time() - start) * 1000 / reads))
@@ -1,5 +1,10 @@
 import logging
 import pickle
+import threading
+import time
+import uuid
+
+import numpy as np
 
 from ray.rllib.utils.annotations import PublicAPI
 
@@ -16,17 +21,50 @@ except ImportError:
 
 @PublicAPI
 class PolicyClient:
-    """REST client to interact with a RLlib policy server."""
+    """REST client to interact with a RLlib policy server.
+
+    Requests are sent over a persistent (keep-alive) connection.
+
+    With inference_mode="local", the client builds a local copy of the
+    server's policy and computes actions without any request. Experiences
+    are buffered and shipped to the server as a SampleBatch, and the policy
+    weights are pulled from the server, every `update_interval` seconds in
+    a background thread. This needs the policy's framework (e.g., TF) on the
+    client and is only supported for single-agent envs.
+
+    Arguments:
+        address (str): Server address, e.g. "http://localhost:9900".
+        inference_mode (str): Either "remote" to get actions from the server,
+            or "local" to compute them on the client.
+        update_interval (float): In local inference mode, how often to ship
+            experiences and pull weights, in seconds.
+    """
 
     START_EPISODE = "START_EPISODE"
     GET_ACTION = "GET_ACTION"
+    GET_ACTIONS = "GET_ACTIONS"
     LOG_ACTION = "LOG_ACTION"
     LOG_RETURNS = "LOG_RETURNS"
     END_EPISODE = "END_EPISODE"
+    GET_POLICY_SPEC = "GET_POLICY_SPEC"
+    GET_WEIGHTS = "GET_WEIGHTS"
+    REPORT_SAMPLES = "REPORT_SAMPLES"
 
     @PublicAPI
-    def __init__(self, address):
+    def __init__(self,
+                 address,
+                 inference_mode="remote",
+                 update_interval=10.0):
         self._address = address
+        self._session = None  # lazily created
+        if inference_mode == "local":
+            self._local = _LocalInference(self, update_interval)
+        elif inference_mode == "remote":
+            self._local = None
+        else:
+            raise ValueError(
+                "inference_mode must be either 'local' or 'remote', got "
+                "{}".format(inference_mode))
 
     @PublicAPI
     def start_episode(self, episode_id=None, training_enabled=True):
@@ -42,6 +80,8 @@ class PolicyClient:
             episode_id (str): Unique string id for the episode.
         """
 
+        if self._local:
+            return self._local.start_episode(episode_id, training_enabled)
         return self._send({
             "episode_id": episode_id,
             "command": PolicyClient.START_EPISODE,
@@ -59,12 +99,37 @@ class PolicyClient:
         Returns:
             action (obj): Action from the env action space.
         """
+        if self._local:
+            return self._local.get_actions({episode_id: observation
+                                            })[episode_id]
         return self._send({
             "command": PolicyClient.GET_ACTION,
             "observation": observation,
             "episode_id": episode_id,
         })["action"]
 
+    @PublicAPI
+    def get_actions(self, observations):
+        """Record observations of several episodes and get their actions.
+
+        This takes a single request, and the observations are evaluated
+        together in one policy forward pass on the server.
+
+        Arguments:
+            observations (dict): Current environment observation keyed by
+                the episode id returned from start_episode().
+
+        Returns:
+            actions (dict): Actions from the env action space keyed by
+                episode id.
+        """
+        if self._local:
+            return self._local.get_actions(observations)
+        return self._send({
+            "command": PolicyClient.GET_ACTIONS,
+            "observations": observations,
+        })["actions"]
+
     @PublicAPI
     def log_action(self, episode_id, observation, action):
         """Record an observation and (off-policy) action taken.
@@ -74,6 +139,8 @@ class PolicyClient:
             observation (obj): Current environment observation.
             action (obj): Action for the observation.
         """
+        if self._local:
+            return self._local.log_action(episode_id, observation, action)
         self._send({
             "command": PolicyClient.LOG_ACTION,
             "observation": observation,
@@ -93,6 +160,8 @@ class PolicyClient:
             episode_id (str): Episode id returned from start_episode().
             reward (float): Reward from the environment.
         """
+        if self._local:
+            return self._local.log_returns(episode_id, reward, info)
         self._send({
             "command": PolicyClient.LOG_RETURNS,
             "reward": reward,
@@ -108,6 +177,8 @@ class PolicyClient:
             episode_id (str): Episode id returned from start_episode().
             observation (obj): Current environment observation.
         """
+        if self._local:
+            return self._local.end_episode(episode_id, observation)
         self._send({
             "command": PolicyClient.END_EPISODE,
             "observation": observation,
@@ -115,10 +186,194 @@ class PolicyClient:
         })
 
     def _send(self, data):
+        if self._session is None:
+            self._session = requests.Session()
         payload = pickle.dumps(data)
-        response = requests.post(self._address, data=payload)
+        response = self._session.post(self._address, data=payload)
         if response.status_code != 200:
             logger.error("Request failed {}: {}".format(response.text, data))
         response.raise_for_status()
         parsed = pickle.loads(response.content)
         return parsed
+
+
+class _LocalInference:
+    """Local policy copy and experience buffer of a PolicyClient."""
+
+    def __init__(self, client, update_interval):
+        # Imported here, since remote inference doesn't need the policy
+        # frameworks on the client.
+        from ray.rllib.evaluation.rollout_worker import RolloutWorker
+        from ray.rllib.evaluation.sample_batch_builder import \
+            SampleBatchBuilder
+        from ray.rllib.policy.sample_batch import DEFAULT_POLICY_ID
+
+        # The update thread has its own connection to the server, so that
+        # reporting samples doesn't hold up requests of the env.
+        self.client = PolicyClient(client._address)
+        self.update_interval = update_interval
+        spec = pickle.loads(
+            self.client._send({
+                "command": PolicyClient.GET_POLICY_SPEC
+            })["spec"])
+        config = spec["config"]
+        # The worker only serves as a container of the policy with its
+        # preprocessor and filter, its sampler is never used.
+        self.worker = RolloutWorker(
+            env_creator=lambda _: _LocalInferenceEnv(
+                spec["action_space"], spec["observation_space"]),
+            policy=spec["policy_class"],
+            policy_config=config,
+            model_config=config["model"],
+            preprocessor_pref=config["preprocessor_pref"],
+            observation_filter=config["observation_filter"])
+        self.policy = self.worker.policy_map[DEFAULT_POLICY_ID]
+        self.preprocessor = self.worker.preprocessors[DEFAULT_POLICY_ID]
+        self.filter = self.worker.filters[DEFAULT_POLICY_ID]
+        self.clip_actions = config["clip_actions"]
+        self.builder = SampleBatchBuilder()
+        # Batches built from the builder but not yet sent to the server.
+        self.pending_samples = []
+        # episode id -> _LocalEpisode
+        self.episodes = {}
+        # Guards the policy and the experience buffer against the update
+        # thread.
+        self.lock = threading.Lock()
+        self._update_weights()
+        thread = threading.Thread(target=self._run_updates)
+        thread.daemon = True
+        thread.start()
+
+    def start_episode(self, episode_id, training_enabled):
+        if episode_id is None:
+            episode_id = uuid.uuid4().hex
+        if episode_id in self.episodes:
+            raise ValueError(
+                "Episode {} is already started".format(episode_id))
+        self.episodes[episode_id] = _LocalEpisode(
+            self.policy.get_initial_state(),
+            np.zeros_like(
+                _flatten_action(self.policy.action_space.sample())),
+            training_enabled)
+        return episode_id
+
+    def get_actions(self, observations):
+        actions = {}
+        with self.lock:
+            for episode_id, observation in observations.items():
+                episode = self._get(episode_id)
+                obs = self.filter(
+                    self.preprocessor.transform(observation), update=False)
+                action, episode.rnn_state, _ = \
+                    self.policy.compute_single_action(
+                        obs,
+                        episode.rnn_state,
+                        prev_action=episode.prev_action,
+                        prev_reward=episode.prev_reward,
+                        clip_actions=self.clip_actions)
+                self._add_step(episode_id, episode, observation, action)
+                actions[episode_id] = action
+        return actions
+
+    def log_action(self, episode_id, observation, action):
+        with self.lock:
+            self._add_step(episode_id, self._get(episode_id), observation,
+                           action)
+
+    def log_returns(self, episode_id, reward, info):
+        with self.lock:
+            episode = self._get(episode_id)
+            episode.cur_reward += reward
+            if info:
+                episode.cur_info = info
+
+    def end_episode(self, episode_id, observation):
+        with self.lock:
+            episode = self._get(episode_id)
+            self._add_row(episode_id, episode, observation, done=True)
+            del self.episodes[episode_id]
+
+    def _get(self, episode_id):
+        if episode_id not in self.episodes:
+            raise ValueError("Episode {} not found.".format(episode_id))
+        return self.episodes[episode_id]
+
+    def _add_step(self, episode_id, episode, observation, action):
+        if episode.last_obs is not None:
+            self._add_row(episode_id, episode, observation, done=False)
+        episode.last_obs = observation
+        episode.last_action = action
+        episode.prev_action = _flatten_action(action)
+        episode.prev_reward = episode.cur_reward
+        episode.cur_reward = 0.0
+        episode.cur_info = {}
+
+    def _add_row(self, episode_id, episode, new_obs, done):
+        # Rewards and infos are logged after the action, so a step is only
+        # complete once the next observation is known.
+        if episode.training_enabled and episode.last_obs is not None:
+            self.builder.add_values(
+                eps_id=episode_id,
+                obs=episode.last_obs,
+                actions=episode.last_action,
+                rewards=episode.cur_reward,
+                dones=done,
+                infos=episode.cur_info,
+                new_obs=new_obs)
+
+    def _run_updates(self):
+        while True:
+            time.sleep(self.update_interval)
+            try:
+                self._report_samples()
+                self._update_weights()
+            except Exception:
+                logger.exception("Error updating the local policy")
+
+    def _report_samples(self):
+        with self.lock:
+            if self.builder.count > 0:
+                self.pending_samples.append(self.builder.build_and_reset())
+        # A batch is only dropped once the server received it, so a failed
+        # request (e.g. a server restart) retries it on the next update.
+        while self.pending_samples:
+            self.client._send({
+                "command": PolicyClient.REPORT_SAMPLES,
+                "samples": self.pending_samples[0],
+            })
+            self.pending_samples.pop(0)
+
+    def _update_weights(self):
+        response = self.client._send({"command": PolicyClient.GET_WEIGHTS})
+        with self.lock:
+            self.worker.set_weights(response["weights"])
+            self.worker.sync_filters(response["filters"])
+
+
+class _LocalEpisode:
+    """Tracked state of an episode with local inference."""
+
+    def __init__(self, rnn_state, prev_action, training_enabled):
+        self.rnn_state = rnn_state
+        self.prev_action = prev_action
+        self.prev_reward = 0.0
+        self.training_enabled = training_enabled
+        self.last_obs = None
+        self.last_action = None
+        self.cur_reward = 0.0
+        self.cur_info = {}
+
+
+def _flatten_action(action):
+    from ray.rllib.evaluation.episode import _flatten_action
+    return _flatten_action(action)
+
+
+def _LocalInferenceEnv(action_space, observation_space):
+    from ray.rllib.env.external_env import ExternalEnv
+
+    class LocalInferenceEnv(ExternalEnv):
+        def run(self):
+            pass
+
+    return LocalInferenceEnv(action_space, observation_space)
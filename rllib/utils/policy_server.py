@@ -4,6 +4,7 @@ import traceback
 from http.server import SimpleHTTPRequestHandler, HTTPServer
 from socketserver import ThreadingMixIn
 
+from ray import cloudpickle
 from ray.rllib.utils.annotations import PublicAPI
 from ray.rllib.utils.policy_client import PolicyClient
 
@@ -15,6 +16,15 @@ class PolicyServer(ThreadingMixIn, HTTPServer):
     This launches a multi-threaded server that listens on the specified host
     and port to serve policy requests and forward experiences to RLlib.
 
+    Connections are kept alive across requests, with one thread per client
+    connection. Observations from all clients that wait for an action are
+    evaluated together in a single policy forward pass, and a client can
+    ask for the actions of many episodes at once with get_actions().
+
+    Clients with inference_mode="local" get the policy spec and weights from
+    the RolloutWorker that runs the env, and report their experiences as
+    SampleBatches, which are replayed into the env as off-policy actions.
+
     Examples:
         >>> class CartpoleServing(ExternalEnv):
                def __init__(self):
@@ -34,14 +44,19 @@ class PolicyServer(ThreadingMixIn, HTTPServer):
                 pg.train()
 
         >>> client = PolicyClient("localhost:8900")
+        >>> # or, to compute actions on the client:
+        >>> client = PolicyClient("localhost:8900", inference_mode="local")
         >>> eps_id = client.start_episode()
         >>> action = client.get_action(eps_id, obs)
+        >>> actions = client.get_actions({eps_id: obs, eps_id_2: obs_2})
         >>> ...
         >>> client.log_returns(eps_id, reward)
         >>> ...
         >>> client.log_returns(eps_id, reward)
     """
 
+    daemon_threads = True
+
     @PublicAPI
     def __init__(self, external_env, address, port):
         handler = _make_handler(external_env)
@@ -50,18 +65,30 @@ class PolicyServer(ThreadingMixIn, HTTPServer):
 
 def _make_handler(external_env):
     class Handler(SimpleHTTPRequestHandler):
+        # Keeps connections alive, which needs a Content-Length header on
+        # all responses.
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, don't delay the body.
+        disable_nagle_algorithm = True
+
         def do_POST(self):
             content_len = int(self.headers.get("Content-Length"), 0)
             raw_body = self.rfile.read(content_len)
             parsed_input = pickle.loads(raw_body)
             try:
-                response = self.execute_command(parsed_input)
+                response = pickle.dumps(self.execute_command(parsed_input))
                 self.send_response(200)
+                self.send_header("Content-Length", str(len(response)))
                 self.end_headers()
-                self.wfile.write(pickle.dumps(response))
+                self.wfile.write(response)
             except Exception:
                 self.send_error(500, traceback.format_exc())
 
+        def log_request(self, code="-", size="-"):
+            # Only log failed requests, logging each one is a bottleneck.
+            if code != 200:
+                SimpleHTTPRequestHandler.log_request(self, code, size)
+
         def execute_command(self, args):
             command = args["command"]
             response = {}
@@ -71,6 +98,9 @@ def _make_handler(external_env):
             elif command == PolicyClient.GET_ACTION:
                 response["action"] = external_env.get_action(
                     args["episode_id"], args["observation"])
+            elif command == PolicyClient.GET_ACTIONS:
+                response["actions"] = external_env.get_actions(
+                    args["observations"])
             elif command == PolicyClient.LOG_ACTION:
                 external_env.log_action(args["episode_id"],
                                         args["observation"], args["action"])
@@ -80,8 +110,73 @@ def _make_handler(external_env):
             elif command == PolicyClient.END_EPISODE:
                 external_env.end_episode(args["episode_id"],
                                          args["observation"])
+            elif command == PolicyClient.GET_POLICY_SPEC:
+                response["spec"] = _get_policy_spec()
+            elif command == PolicyClient.GET_WEIGHTS:
+                worker = _get_worker()
+                response["weights"] = worker.get_weights()
+                response["filters"] = worker.get_filters()
+            elif command == PolicyClient.REPORT_SAMPLES:
+                _replay_samples(external_env, args["samples"])
             else:
                 raise Exception("Unknown command: {}".format(command))
             return response
 
     return Handler
+
+
+def _get_worker():
+    # Imported here to avoid a circular import of ray.rllib.utils.
+    from ray.rllib.evaluation.rollout_worker import get_global_worker
+    return get_global_worker()
+
+
+def _get_policy_spec():
+    from ray.rllib.policy.sample_batch import DEFAULT_POLICY_ID
+
+    worker = _get_worker()
+    if set(worker.policy_map) != {DEFAULT_POLICY_ID}:
+        raise ValueError(
+            "Local inference is only supported for single-agent envs.")
+    policy = worker.policy_map[DEFAULT_POLICY_ID]
+    # Pickled on its own, since the policy class and the config (e.g., its
+    # callbacks) may not be importable by reference.
+    return cloudpickle.dumps({
+        "policy_class": type(policy),
+        "config": worker.policy_config,
+        "observation_space": policy.observation_space,
+        "action_space": policy.action_space,
+    })
+
+
+def _replay_samples(external_env, samples):
+    """Logs the steps of a SampleBatch into the env as off-policy actions.
+
+    The episodes are replayed side by side, so each of their steps is
+    processed in the same sampler poll. Episodes that aren't done in the
+    batch are left open, to be continued by the next batch.
+    """
+    episodes = {}
+    for batch in samples.split_by_episode():
+        episode_id = batch["eps_id"][0]
+        if episode_id in episodes:
+            episodes[episode_id] = episodes[episode_id].concat(batch)
+        else:
+            episodes[episode_id] = batch
+    for episode_id in episodes:
+        if episode_id not in external_env._episodes:
+            external_env.start_episode(episode_id)
+    for t in range(max(batch.count for batch in episodes.values())):
+        observations, actions = {}, {}
+        for episode_id, batch in episodes.items():
+            if t < batch.count:
+                observations[episode_id] = batch["obs"][t]
+                actions[episode_id] = batch["actions"][t]
+        external_env.log_actions(observations, actions)
+        for episode_id, batch in episodes.items():
+            if t < batch.count:
+                external_env.log_returns(episode_id, batch["rewards"][t],
+                                         batch["infos"][t])
+                if t == batch.count - 1 and batch["dones"][t]:
+                    external_env.end_episode(episode_id,
+                                             batch["new_obs"][t])
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from ray.rllib.policy.sample_batch import SampleBatch
+from ray.rllib.utils.compression import pack, unpack, unpack_rows, \
+    is_compressed
+
+
+class CompressionTest(unittest.TestCase):
+    def test_binary_roundtrip(self):
+        arrays = [
+            np.arange(24, dtype=np.float32).reshape((2, 3, 4)),
+            np.zeros((84, 84, 4), dtype=np.uint8),
+            np.array([True, False]),
+            np.array(3.5),
+            np.arange(12).reshape((3, 4))[:, 1::2],  # non-contiguous
+        ]
+        for array in arrays:
+            packed = pack(array)
+            self.assertIsInstance(packed, bytes)
+            self.assertTrue(is_compressed(packed))
+            unpacked = unpack(packed)
+            self.assertEqual(unpacked.dtype, array.dtype)
+            self.assertTrue(np.array_equal(unpacked, array))
+            # Unpacked arrays are writeable like pickled ones were.
+            unpacked[...] = 0
+
+    def test_unpack_into_preallocated(self):
+        array = np.random.random((5, 6))
+        out = np.empty_like(array)
+        self.assertIs(unpack(pack(array), out=out), out)
+        self.assertTrue(np.array_equal(out, array))
+
+    def test_legacy_and_pickled_formats(self):
+        array = np.arange(10)
+        text = pack(array, binary=False)
+        self.assertIsInstance(text, str)
+        self.assertTrue(np.array_equal(unpack(text), array))
+        # Non-numeric data falls back to pickling.
+        data = {"a": [1, 2], "b": "c"}
+        self.assertEqual(unpack(pack(data)), data)
+
+    def test_unpack_rows(self):
+        rows = np.random.randint(0, 255, (7, 4, 4), dtype=np.uint8)
+        stacked = unpack_rows([pack(r) for r in rows])
+        self.assertEqual(stacked.dtype, np.uint8)
+        self.assertTrue(np.array_equal(stacked, rows))
+
+    def test_sample_batch_compress(self):
+        obs = np.zeros((3, 8, 8), dtype=np.float32)
+        obs[1] = 1.0
+        for bulk in [False, True]:
+            batch = SampleBatch({"obs": obs.copy(), "new_obs": obs + 1})
+            batch.compress(bulk=bulk)
+            batch.decompress_if_needed()
+            self.assertTrue(np.array_equal(batch["obs"], obs))
+            self.assertTrue(np.array_equal(batch["new_obs"], obs + 1))
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
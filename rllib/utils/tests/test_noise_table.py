@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from ray.rllib.utils.noise_table import NOISE_BLOCK_SIZE, LazyNoiseTable, \
+    SharedNoiseTable
+
+
+class NoiseTableTest(unittest.TestCase):
+    def test_get_batch(self):
+        noise = SharedNoiseTable(np.random.randn(1000).astype(np.float32))
+        indices = [0, 7, 990, 7]
+        batch = noise.get_batch(indices, 10)
+        self.assertEqual(batch.shape, (4, 10))
+        for row, index in zip(batch, indices):
+            self.assertTrue(np.array_equal(row, noise.get(index, 10)))
+
+    def test_weighted_sum(self):
+        noise = SharedNoiseTable(np.random.randn(1000).astype(np.float32))
+        weights = np.random.randn(9)
+        indices = np.random.randint(0, 990, size=9)
+        total, count = noise.weighted_sum(weights, indices, 10, batch_size=4)
+        expected = sum(w * noise.get(i, 10) for w, i in zip(weights, indices))
+        self.assertEqual(count, 9)
+        self.assertEqual(total.dtype, np.float32)
+        self.assertTrue(np.allclose(total, expected, atol=1e-5))
+
+    def test_lazy_matches_shared(self):
+        count = 2 * NOISE_BLOCK_SIZE + 100
+        # Same as create_shared_noise(), which needs a running Ray.
+        array = np.concatenate([
+            LazyNoiseTable(count)._block(block) for block in range(3)
+        ])[:count]
+        shared = SharedNoiseTable(array)
+        lazy = LazyNoiseTable(count, max_cached_blocks=1)
+        self.assertEqual(len(lazy), count)
+        # Within a block, across blocks and at the end of the table.
+        indices = [5, NOISE_BLOCK_SIZE - 20, count - 50]
+        for index in indices:
+            self.assertTrue(
+                np.array_equal(lazy.get(index, 50), shared.get(index, 50)))
+        self.assertTrue(
+            np.array_equal(
+                lazy.get_batch(indices, 50), shared.get_batch(indices, 50)))
+        self.assertLessEqual(len(lazy._blocks), 1)
+
+
+if __name__ == "__main__":
+    import pytest
+    import sys
+    sys.exit(pytest.main(["-v", __file__]))
@@ -14,6 +14,19 @@ class WindowStat:
         self.count += 1
         self.idx %= len(self.items)
 
+    def push_batch(self, objs):
+        """Pushes all items of a sequence, like calling push() on each."""
+        n = len(self.items)
+        num_objs = len(objs)
+        self.count += num_objs
+        # Only the last n items remain in the window.
+        start = (self.idx + max(0, num_objs - n)) % n
+        objs = list(objs[-n:])
+        head = min(len(objs), n - start)
+        self.items[start:start + head] = objs[:head]
+        self.items[:len(objs) - head] = objs[head:]
+        self.idx = (self.idx + num_objs) % n
+
     def stats(self):
         if not self.count:
             quantiles = []